@@ -1,17 +1,17 @@
-from .database import engine, Base
-from .models import User
+from .database import Base
+from .migrations import upgrade_to_head, get_current_revisions
 
 
 def init_db():
     try:
-        # Base.metadata.drop_all(bind=engine)
-        # print("drop table")
-        Base.metadata.create_all(bind=engine)
-        print("📊 Tables created:")
+        # Schema changes go through versioned Alembic migrations rather than
+        # Base.metadata.create_all(), so the database revision is tracked.
+        upgrade_to_head()
+        print(f"📊 Database at revision: {', '.join(sorted(get_current_revisions()))}")
         for table in Base.metadata.tables.keys():
             print(f"   - {table}")
     except Exception as e:
-        print(f"❌ Error creating database tables: {e}")
+        print(f"❌ Error migrating database: {e}")
         raise
 
 
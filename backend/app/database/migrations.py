@@ -0,0 +1,59 @@
+# app/database/migrations.py - Alembic helpers for startup schema checks
+import logging
+import os
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+# off: skip the check, warn: log and keep serving, strict: refuse to start
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn").lower()
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def get_alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+
+def get_head_revisions() -> set:
+    return set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+
+
+def get_current_revisions() -> set:
+    with engine.connect() as conn:
+        return set(MigrationContext.configure(conn).get_current_heads())
+
+
+def upgrade_to_head():
+    command.upgrade(get_alembic_config(), "head")
+
+
+def verify_schema():
+    """Compare the database revision with the migration heads on disk."""
+    if SCHEMA_CHECK == "off":
+        return
+
+    heads = get_head_revisions()
+    current = get_current_revisions()
+    if current == heads:
+        logger.info("Database schema at revision %s", ", ".join(sorted(heads)))
+        return
+
+    message = (
+        f"Database schema is at {sorted(current) or 'no revision'}, "
+        f"expected {sorted(heads)}. Run `alembic upgrade head` from backend/."
+    )
+    if SCHEMA_CHECK == "strict":
+        raise SchemaOutOfDateError(message)
+    logger.warning(message)
@@ -3,6 +3,7 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Float,
     Text,
     ForeignKey,
     ARRAY,
@@ -10,12 +11,14 @@ from sqlalchemy import (
     Time,
     Date,
     JSON,
+    UniqueConstraint,
+    Index,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import time, datetime
-from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, JSONB
 
 
 class User(Base):
@@ -47,13 +50,22 @@ class UserFHIRMapping(Base):
 
 class SymptomIntensity(Base):
     __tablename__ = "symptom_intensity"
-    id = Column(Integer, primary_key=True, index=True)
+    # Monthly RANGE partitions on created_at, see app/database/partitions.py
+    __table_args__ = (
+        Index("ix_symptom_intensity_user_created", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symptom_name = Column(String(100), nullable=False)
     intensity = Column(Integer, nullable=False)  # 1-10 scale
     duration_minutes = Column(Integer, default=0)
     notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())  # CHANGED
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,  # partition key must be part of the primary key
+        server_default=func.now(),
+    )
 
     # Relationship to User
     user = relationship("User", back_populates="symptom_intensities")
@@ -61,6 +73,15 @@ class SymptomIntensity(Base):
 
 class SymptomFrequency(Base):
     __tablename__ = "symptom_frequency"
+    __table_args__ = (
+        # Target of the ON CONFLICT upsert in SymptomTrackingService
+        UniqueConstraint(
+            "user_id",
+            "symptom_name",
+            "month_year",
+            name="uq_symptom_frequency_user_symptom_month",
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symptom_name = Column(String(100), nullable=False)
@@ -74,8 +95,34 @@ class SymptomFrequency(Base):
     user = relationship("User", back_populates="symptom_frequencies")
 
 
+class SymptomDailyRollup(Base):
+    """Per-user, per-symptom, per-local-day aggregate of symptom_intensity.
+
+    Maintained on write by SymptomTrackingService so dashboard reads touch
+    one row per symptom-day instead of every event.
+    """
+
+    __tablename__ = "symptom_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "symptom_name", "local_date", name="uq_symptom_daily_rollup"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    symptom_name = Column(String(100), nullable=False)
+    local_date = Column(Date, nullable=False)  # Tampa date
+    event_count = Column(Integer, nullable=False, default=0)
+    intensity_sum = Column(Integer, nullable=False, default=0)
+    intensity_min = Column(Integer)
+    intensity_max = Column(Integer)
+    duration_sum = Column(Integer, nullable=False, default=0)
+
+
 class Reminder(Base):
     __tablename__ = "reminders"
+    __table_args__ = (Index("ix_reminders_user_active", "user_id", "is_active"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
@@ -100,13 +147,23 @@ class Reminder(Base):
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        Index("ix_chat_sessions_user_updated", "user_id", "updated_at"),
+        # Containment (@>) lookups, e.g. sessions whose symptom_terms has X
+        Index(
+            "ix_chat_sessions_context_data",
+            "context_data",
+            postgresql_using="gin",
+            postgresql_ops={"context_data": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.now)  # Tampa time
     updated_at = Column(DateTime, default=datetime.now)  # Tampa time
     is_active = Column(Boolean, default=True)
-    context_data = Column(JSON)  # Store symptoms, meds, etc. as conversation progresses
+    context_data = Column(JSONB)  # Symptoms, meds, etc. as conversation progresses
 
     # Relationship
     user = relationship("User", back_populates="chat_sessions")
@@ -117,16 +174,59 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # Monthly RANGE partitions on timestamp, see app/database/partitions.py
+    __table_args__ = (
+        # Keyset pagination on (timestamp, id) within a session
+        Index("ix_chat_messages_session_timestamp_id", "session_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"))
     role = Column(String(20))  # 'user' or 'assistant'
     content = Column(Text)
     message_type = Column(
         String(20), default="text"
     )  # 'text', 'symptom', 'analysis_request'
-    timestamp = Column(DateTime, default=datetime.now)  # Tampa time
+    timestamp = Column(
+        DateTime,
+        primary_key=True,  # partition key must be part of the primary key
+        default=datetime.now,  # Tampa time
+        server_default=func.now(),
+    )
     message_metadata = Column(JSON)  # Store any additional data like symptom details
 
     # Relationship
     session = relationship("ChatSession", back_populates="messages")
+
+
+class ProviderDirectoryEntry(Base):
+    """Healthcare provider imported from the NPPES NPI registry.
+
+    Placed at the centroid of the practice ZIP; loaded by
+    app/scripts/import_nppes.py and queried by ProviderDirectory.
+    """
+
+    __tablename__ = "provider_directory"
+    __table_args__ = (
+        # Bounding-box scans for "nearest N <specialty>" queries
+        Index(
+            "ix_provider_directory_specialty_lat_lng",
+            "specialty",
+            "latitude",
+            "longitude",
+        ),
+    )
+
+    npi = Column(String(10), primary_key=True)
+    name = Column(String(255), nullable=False)
+    specialty = Column(String(50), nullable=False)  # key of SPECIALTY_TAXONOMIES
+    taxonomy_code = Column(String(10), nullable=False)
+    address = Column(String(255))
+    city = Column(String(100))
+    state = Column(String(2))
+    zipcode = Column(String(5), nullable=False)
+    phone = Column(String(20))
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
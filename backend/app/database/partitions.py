@@ -0,0 +1,237 @@
+# app/database/partitions.py - monthly partition maintenance and retention
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key column, and whether the key is timestamptz.
+# Partition names are <table>_pYYYYMM (see migration 0003).
+PARTITIONED_TABLES: Dict[str, Dict] = {
+    "symptom_intensity": {"key": "created_at", "tz": True},
+    "chat_messages": {"key": "timestamp", "tz": False},
+}
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# 0 keeps partitions forever; otherwise partitions older than this many
+# months are archived and dropped by archive_old_partitions()
+RETENTION_MONTHS = {
+    "symptom_intensity": int(os.getenv("SYMPTOM_RETENTION_MONTHS", "0")),
+    "chat_messages": int(os.getenv("CHAT_RETENTION_MONTHS", "0")),
+}
+ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "archive")
+ARCHIVE_FORMAT = os.getenv("PARTITION_ARCHIVE_FORMAT", "csv")  # csv | parquet
+# Rows fetched per server-side cursor batch; each batch is one Parquet row group
+ARCHIVE_BATCH_ROWS = int(os.getenv("PARTITION_ARCHIVE_BATCH_ROWS", "50000"))
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+# pg_advisory_xact_lock key serializing partition DDL across gunicorn
+# workers and the cron script
+PARTITION_LOCK_KEY = 0x70617274
+
+
+def _lock_partitions(conn) -> None:
+    """Block until no other process is creating or archiving partitions.
+
+    Released when the caller's transaction ends.
+    """
+    conn.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY}
+    )
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month: date, tz: bool) -> str:
+    return f"{month.isoformat()} 00:00:00+00" if tz else month.isoformat()
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def list_partitions(conn, table: str) -> List[str]:
+    rows = conn.execute(
+        text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            ORDER BY c.relname
+        """),
+        {"table": table},
+    )
+    return [r.relname for r in rows]
+
+
+def create_month_partition(conn, table: str, month: date) -> bool:
+    """Create the partition for `month` if missing. Returns True if created.
+
+    The partition is built as a standalone table and attached afterwards, so
+    rows that already landed in the DEFAULT partition for that month can be
+    moved into it first (a plain CREATE ... PARTITION OF would fail then).
+    """
+    spec = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    if name in list_partitions(conn, table):
+        return False
+
+    key = spec["key"]
+    lower = _bound(month, spec["tz"])
+    upper = _bound(_add_months(month, 1), spec["tz"])
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    moved = conn.execute(
+        text(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default
+                WHERE {key} >= :lower AND {key} < :upper
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """),
+        {"lower": lower, "upper": upper},
+    ).rowcount
+    conn.execute(
+        text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+    if moved:
+        logger.info("Moved %d rows from %s_default into %s", moved, table, name)
+    return True
+
+
+def ensure_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Make sure this month and the next `months_ahead` months have partitions.
+
+    Every worker calls this at startup; the first one to take the lock
+    creates what is missing and the rest find it already there.
+    """
+    created = []
+    this_month = date.today().replace(day=1)
+    with engine.begin() as conn:
+        _lock_partitions(conn)
+        for table in PARTITIONED_TABLES:
+            for n in range(months_ahead + 1):
+                month = _add_months(this_month, n)
+                if create_month_partition(conn, table, month):
+                    created.append(partition_name(table, month))
+    if created:
+        logger.info("Created partitions: %s", ", ".join(created))
+    return created
+
+
+def _arrow_schema(pa, description):
+    """Parquet schema from the cursor's Postgres type OIDs.
+
+    Fixed up front rather than inferred per batch, where an all-NULL column
+    would come out as type null. json and unmapped types are stored as text.
+    """
+    types = {
+        16: pa.bool_(),
+        20: pa.int64(),
+        21: pa.int16(),
+        23: pa.int32(),
+        700: pa.float32(),
+        701: pa.float64(),
+        1082: pa.date32(),
+        1114: pa.timestamp("us"),
+        1184: pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(col[0], types.get(col[1], pa.string())) for col in description])
+
+
+def _as_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _arrow_table(pa, schema, rows):
+    columns = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if field.type == pa.string():
+            values = [_as_text(v) for v in values]
+        columns.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _export_partition(conn, name: str, fmt: str, archive_dir: str) -> str:
+    os.makedirs(archive_dir, exist_ok=True)
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("PARTITION_ARCHIVE_FORMAT=parquet requires pyarrow")
+        result = conn.execute(
+            text(f"SELECT * FROM {name}").execution_options(stream_results=True)
+        )
+        schema = _arrow_schema(pa, result.cursor.description)
+        path = os.path.join(archive_dir, f"{name}.parquet")
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for rows in result.partitions(ARCHIVE_BATCH_ROWS):
+                writer.write_table(_arrow_table(pa, schema, rows))
+        return path
+
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    with gzip.open(path, "wt", newline="") as f:
+        # COPY streams straight from the server without building Python rows
+        conn.connection.cursor().copy_expert(
+            f"COPY {name} TO STDOUT WITH CSV HEADER", f
+        )
+    return path
+
+
+def archive_old_partitions(
+    retention_months: Optional[Dict[str, int]] = None,
+    archive_dir: str = ARCHIVE_DIR,
+    fmt: str = ARCHIVE_FORMAT,
+) -> List[str]:
+    """Detach, export and drop monthly partitions past their retention window.
+
+    Each partition is handled in its own transaction: it is detached, copied
+    to `<archive_dir>/<partition>.csv.gz` (or .parquet), and only dropped
+    once the export has been written.
+    """
+    retention_months = retention_months or RETENTION_MONTHS
+    this_month = date.today().replace(day=1)
+    archived = []
+    for table in PARTITIONED_TABLES:
+        keep = retention_months.get(table, 0)
+        if keep <= 0:
+            continue
+        cutoff = _add_months(this_month, -keep)
+        with engine.connect() as conn:
+            partitions = list_partitions(conn, table)
+        for name in partitions:
+            match = _PARTITION_NAME.search(name)
+            if not match:
+                continue  # DEFAULT partition
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            if month >= cutoff:
+                continue
+            with engine.begin() as conn:
+                _lock_partitions(conn)
+                if name not in list_partitions(conn, table):
+                    continue  # archived by another run meanwhile
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                path = _export_partition(conn, name, fmt, archive_dir)
+                conn.execute(text(f"DROP TABLE {name}"))
+            archived.append(path)
+            logger.info("Archived %s -> %s", name, path)
+    return archived
@@ -1,3 +1,6 @@
+import logging
+from functools import partial
+from anyio import from_thread
 from app.database.models import User, UserFHIRMapping
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from sqlalchemy.orm import Session
@@ -13,28 +16,39 @@ from app.schemas.schemas import (
 from app.services.fhir_service import FHIRService
 from app.services.triage_service import triage_rules
 from app.services.llm_service import require_json_with_retry
+from app.services.resilience import REQUEST_DEADLINE, with_deadline
 from app.services.symptom_tracking_service import SymptomTrackingService
+from app.services.symptom_write_buffer import (
+    symptom_write_buffer,
+    SYMPTOM_WRITE_BEHIND,
+)
 from app.services.rag_service import get_medical_context
 from app.services.auth_service import get_current_user
 from app.services.map_service import maps_service
 from app.services.healthcare_analyzer import analyze_healthcare_needs
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/ehr-advice", response_model=EnhancedAdviceOutWithReminders)
+@with_deadline(REQUEST_DEADLINE)
 def enhanced_advice_with_ehr(
     inp: SymptomInput,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print("📥 EHR_ADVICE RECEIVED INPUT:")
-    print(f"  Symptoms: {inp.symptoms}")
-    print(f"  Age: {inp.age}")
-    print(f"  Sex: {inp.sex}")
-    print(f"  Duration: {inp.duration}")
-    print(f"  Meds: {inp.meds}")
-    print(f"  Conditions: {inp.conditions}")
+    # Symptoms, meds and conditions are patient data: debug level only
+    logger.debug(
+        "ehr-advice input: symptoms=%r age=%s sex=%s duration=%r meds=%r "
+        "conditions=%r",
+        inp.symptoms,
+        inp.age,
+        inp.sex,
+        inp.duration,
+        inp.meds,
+        inp.conditions,
+    )
 
     mapping = (
         db.query(UserFHIRMapping)
@@ -46,7 +60,7 @@ def enhanced_advice_with_ehr(
         mapping = UserFHIRMapping(user_id=current_user.id, fhir_patient_id="example")
         db.add(mapping)
         db.commit()
-        print(f"Mapped user {current_user.id} to mock patient")
+        logger.info("Mapped user %s to mock patient", current_user.id)
     ehr_data = FHIRService.get_patient_profile(mapping.fhir_patient_id)
 
     # 1. Triage first (safety check)
@@ -58,7 +72,7 @@ def enhanced_advice_with_ehr(
     try:
         medical_context = get_medical_context(inp.symptoms, min_results=2)
     except Exception as e:
-        print(f"Medical context failed: {e}")
+        logger.warning("Medical context failed: %s", e)
         medical_context = {"articles": []}
 
     # 3. Get EHR data for LLM context
@@ -74,7 +88,7 @@ def enhanced_advice_with_ehr(
         "source": "mock_ehr",
     }
 
-    print(f"📋 Using REAL EHR data from patient: {ehr_data['name']}")
+    logger.debug("Using EHR data from patient: %s", ehr_data["name"])
 
     system = (
         "You are a clinical decision support assistant. "
@@ -181,23 +195,18 @@ def enhanced_advice_with_ehr(
         f"IMPORTANT: Generate realistic symptom_analysis based on the actual patient description."
     )
 
-    print("🔍 PROMPT SENT TO LLM:")
-    print(f"System: {system[:200]}...")
-    print(f"User: {user[:500]}...")
+    logger.debug("Prompt sent to LLM: system=%.200r user=%.500r", system, user)
 
     message = [
         {"role": "system", "content": system},
         {"role": "user", "content": user},
     ]
 
-    print("🤖 Generating medical advice with EHR context...")
-    response = require_json_with_retry(message)
-
-    print(f"🔍 LLM RESPONSE TYPE: {type(response)}")
-    print(f"🔍 LLM RESPONSE CONTENT: {response}")
+    response = require_json_with_retry(message, task="clinical")
+    logger.debug("LLM response: %.1000r", response)
 
     if isinstance(response, str):
-        print(f"❌ LLM failed to return JSON, got string: {response}")
+        logger.error("LLM failed to return JSON (%d chars)", len(response))
         # Create a fallback response structure
         response = {
             "possible_diagnosis": ["Unable to analyze - AI service issue"],
@@ -216,7 +225,7 @@ def enhanced_advice_with_ehr(
             "ai_reminder_suggestions": [],
         }
     elif "error" in response:
-        print(f"❌ LLM returned error: {response}")
+        logger.error("LLM returned error: %s", response.get("error"))
         # Convert error response to proper format
         response = {
             "possible_diagnosis": ["Service temporarily unavailable"],
@@ -233,12 +242,12 @@ def enhanced_advice_with_ehr(
     if "symptom_analysis" in response and response["symptom_analysis"]:
         symptom_analysis = response["symptom_analysis"]
         symptom_intensities_to_store = symptom_analysis.get("intensities", [])
-        print(
-            f"📊 LLM provided {len(symptom_intensities_to_store)} symptom intensities"
+        logger.debug(
+            "LLM provided %d symptom intensities", len(symptom_intensities_to_store)
         )
     else:
         # FALLBACK: Create basic symptom analysis if LLM didn't provide it
-        print("⚠️ LLM did not provide symptom_analysis, creating fallback analysis")
+        logger.warning("LLM did not provide symptom_analysis, using fallback analysis")
         symptom_intensities_to_store = create_fallback_symptom_analysis(
             inp.symptoms, inp.duration
         )
@@ -246,7 +255,7 @@ def enhanced_advice_with_ehr(
     # Store each symptom intensity
     user_id = current_user.id
 
-    stored_count = 0
+    tracking_batch = []
     for intensity_data in symptom_intensities_to_store:
         # Validate the intensity data
         if (
@@ -254,23 +263,28 @@ def enhanced_advice_with_ehr(
             and "symptom_name" in intensity_data
             and "intensity" in intensity_data
         ):
-            tracking_data = SymptomIntensityCreate(
-                user_id=user_id,
-                symptom_name=intensity_data["symptom_name"],
-                intensity=intensity_data["intensity"],
-                duration_minutes=intensity_data.get("duration_minutes", 0),
-                notes=intensity_data.get("notes", "AI-analyzed from chat session"),
-            )
-            success = SymptomTrackingService.record_symptom_intensity(db, tracking_data)
-            if success:
-                stored_count += 1
-                print(
-                    f"✅ Stored: {intensity_data['symptom_name']} (intensity: {intensity_data['intensity']}/10)"
+            tracking_batch.append(
+                SymptomIntensityCreate(
+                    user_id=user_id,
+                    symptom_name=intensity_data["symptom_name"],
+                    intensity=intensity_data["intensity"],
+                    duration_minutes=intensity_data.get("duration_minutes", 0),
+                    notes=intensity_data.get("notes", "AI-analyzed from chat session"),
                 )
+            )
         else:
-            print(f"❌ Invalid intensity data format: {intensity_data}")
+            logger.warning("Invalid intensity data format: %r", intensity_data)
 
-    print(f"📊 Recorded {stored_count} symptom intensities")
+    # One multi-row write for the whole analysis instead of one per symptom.
+    # With write-behind enabled it is queued and flushed off the request path.
+    if SYMPTOM_WRITE_BEHIND:
+        stored_count = symptom_write_buffer.submit(tracking_batch)
+    else:
+        stored_count = SymptomTrackingService.record_symptom_intensities(
+            db, tracking_batch
+        )
+
+    logger.info("Recorded %d symptom intensities", stored_count)
 
     # 5. Smart healthcare provider recommendations (NEW)
     healthcare_recommendations = None
@@ -279,27 +293,31 @@ def enhanced_advice_with_ehr(
     user_zipcode = ehr_data.get("zipcode")
 
     if user_zipcode:
-        print(f"📍 User location from EHR: {user_zipcode}")
+        logger.debug("User location from EHR: %s", user_zipcode)
 
         # Use SEPARATE prompt to analyze healthcare needs
         healthcare_analysis = analyze_healthcare_needs(inp.symptoms)
         needed_specialty = healthcare_analysis.get("needed_specialty", "primary_care")
         urgency = healthcare_analysis.get("urgency", "routine")
 
-        print(f"🩺 Healthcare analysis: {needed_specialty} (urgency: {urgency})")
-        print(
-            f"   Reasoning: {healthcare_analysis.get('reasoning', 'No reasoning provided')}"
-        )
+        logger.info("Healthcare analysis: %s (urgency: %s)", needed_specialty, urgency)
+        logger.debug("Healthcare reasoning: %s", healthcare_analysis.get("reasoning"))
 
         # Only recommend if not emergency and specific specialty needed
         if urgency != "emergency" and needed_specialty != "primary_care":
-            print(
-                f"🔍 Searching for {needed_specialty} providers near {user_zipcode}..."
+            logger.debug(
+                "Searching for %s providers near %s", needed_specialty, user_zipcode
             )
-            print(f"🔍 Specialty from LLM: {needed_specialty}")
 
-            providers = maps_service.get_providers_by_zipcode(
-                zipcode=user_zipcode, specialty=needed_specialty, max_results=3
+            # This route runs in the threadpool; the Maps client is async and
+            # shares its connection pool on the event loop
+            providers = from_thread.run(
+                partial(
+                    maps_service.get_providers_by_zipcode,
+                    zipcode=user_zipcode,
+                    specialty=needed_specialty,
+                    max_results=3,
+                )
             )
 
             if providers:
@@ -311,28 +329,29 @@ def enhanced_advice_with_ehr(
                     ),
                     provider_type=needed_specialty,
                 )
-                print(
-                    f"✅ Found {len(providers)} {needed_specialty} providers near {user_zipcode}"
+                logger.info(
+                    "Found %d %s providers near %s",
+                    len(providers),
+                    needed_specialty,
+                    user_zipcode,
                 )
             else:
-                print(f"❌ No {needed_specialty} providers found near {user_zipcode}")
+                logger.info(
+                    "No %s providers found near %s", needed_specialty, user_zipcode
+                )
         else:
             if urgency == "emergency":
-                print("🚨 Emergency situation - skipping provider recommendations")
+                logger.info("Emergency situation - skipping provider recommendations")
             elif needed_specialty == "primary_care":
-                print(
-                    "🏥 General symptoms - primary care recommended, skipping specialist search"
-                )
+                logger.debug("Primary care recommended, skipping specialist search")
     else:
-        print("❌ No user location available in EHR data")
+        logger.info("No user location available in EHR data")
 
     # Combine responses
     response_data = dict(response)
     if healthcare_recommendations:
         response_data["healthcare_recommendations"] = healthcare_recommendations
-        print("🎯 Added healthcare recommendations to response")
-    else:
-        print("ℹ️ No healthcare recommendations to add")
+        logger.debug("Added healthcare recommendations to response")
 
     return response_data
 
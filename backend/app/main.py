@@ -1,28 +1,146 @@
 # app/main.py - FIXED VERSION
+from app.logging_config import setup_logging
+
+# Before the app imports below, so import-time messages are captured too
+setup_logging()
+
+import logging
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from sqlalchemy import text
-from app.database.database import engine, Base
-from app.routes import triage, advice, referrals, rx_draft, auth, patient_profile, chat
-from app.services.auth_service import verify_token_service
+from app.database.database import engine, async_engine, get_pool_metrics
+from app.database.migrations import verify_schema, SchemaOutOfDateError
+from app.database.partitions import ensure_partitions
+from app.middleware import RequestMiddleware
+from app.routes import (
+    triage,
+    advice,
+    referrals,
+    rx_draft,
+    clinical,
+    auth,
+    patient_profile,
+    chat,
+)
+from app.services.auth_service import token_cache, user_cache, verify_token_service
+from app.services.map_service import maps_service
+from app.openrouter_client import llm_stats
+from app.services.password_hasher import password_hasher
+from app.services.provider_cache import provider_cache
+from app.services.resilience import DeadlineExceeded
+from app.services.single_flight import single_flight_stats
+from app.services.symptom_write_buffer import symptom_write_buffer
+from app.services.zip_centroids import zip_centroids
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
-# try:
-#     Base.metadata.create_all(bind=engine)
-# except Exception as e:
-#     print(f"❌ Error creating tables: {e}")
 app = FastAPI(title="AI Doctor Backend (OpenRouter)")
+logger = logging.getLogger(__name__)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    logger.warning("Deadline exceeded on %s: %s", request.url.path, exc)
+    return JSONResponse(
+        status_code=504, content={"detail": "The AI service took too long. Retry."}
+    )
+
+
+@app.on_event("startup")
+def check_database_schema():
+    # Tables are managed by Alembic (backend/migrations); see init_db.py
+    try:
+        verify_schema()
+    except SchemaOutOfDateError:
+        raise
+    except Exception as e:
+        logger.error("Schema check failed: %s", e)
+
+
+@app.on_event("startup")
+def create_upcoming_partitions():
+    try:
+        ensure_partitions()
+    except Exception as e:
+        logger.error("Partition maintenance failed: %s", e)
+
+
+@app.on_event("startup")
+def start_symptom_write_buffer():
+    # Runs even with write-behind off, to replay spilled records
+    symptom_write_buffer.start()
+
+
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+
+@app.on_event("startup")
+def load_zip_centroids():
+    zip_centroids.load()
+
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.stop()
+
+
+@app.on_event("shutdown")
+def stop_symptom_write_buffer():
+    # Flushes pending records; anything that can't be written is spilled
+    symptom_write_buffer.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+async def close_maps_client():
+    await maps_service.close()
+
 #
 # EHR Configuration
 EHR_ENABLED = True
 FHIR_BASE_URL = os.getenv("FHIR_BASE_URL", "https://hapi.fhir.org/baseR4")
 
-print(f" EHR Integration: {'ENABLED' if EHR_ENABLED else 'DISABLED'}")
-print(f" FHIR Server: {FHIR_BASE_URL}")
+logger.info(
+    "EHR integration %s, FHIR server %s",
+    "enabled" if EHR_ENABLED else "disabled",
+    FHIR_BASE_URL,
+)
+
+# Skip auth for these public endpoints and everything below them
+PUBLIC_PATHS = [
+    "/auth/login",
+    "/auth/register",
+    "/auth/verify",
+    "/health",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/favicon.ico",
+    "/patient/discover",
+    # "/patient/profile",
+    # "/patient/medications",
+    # "/ehr-advice",
+    # "/analytics",
+]
+# Public as-is, but not their sub-paths ("/triage/batch" needs a token)
+EXACT_PUBLIC_PATHS = ["/", "/triage"]
+# Added before CORS so CORS stays outermost and 401s carry its headers
+app.add_middleware(
+    RequestMiddleware,
+    public_paths=PUBLIC_PATHS,
+    exact_public_paths=EXACT_PUBLIC_PATHS,
+    verify_token=verify_token_service,
+)
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 app.add_middleware(
@@ -34,82 +152,13 @@ app.add_middleware(
 )
 
 
-# Add to main.py for debugging
-@app.middleware("http")
-async def debug_auth(request: Request, call_next):
-    auth_header = request.headers.get("Authorization")
-    if auth_header:
-        print(f"🔐 Token present for: {request.url.path}")
-    else:
-        print(f"🔓 No token for: {request.url.path}")
-
-    response = await call_next(request)
-    return response
-
-
-@app.middleware("http")
-async def authenticate_request(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return await call_next(request)
-
-    # Skip auth for these public endpoints
-    public_paths = [
-        "/auth/login",
-        "/auth/register",
-        "/auth/verify",
-        "/health",
-        "/",
-        "/docs",
-        "/redoc",
-        "/openapi.json",
-        "/favicon.ico",
-        "/patient/discover",
-        # "/patient/profile",
-        # "/patient/medications",
-        # "/ehr-advice",
-        "/triage",
-        # "/analytics",
-    ]
-
-    # Check if path starts with any public path
-    if any(request.url.path.startswith(path) for path in public_paths):
-        return await call_next(request)
-
-    # Check for Authorization header
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-
-    token = auth_header.replace("Bearer ", "")
-    payload = verify_token_service(token)
-
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    print(f"🔐 Auth: Valid token for user {payload.get('sub')} - {request.url.path}")
-
-    response = await call_next(request)
-    return response
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(">>", request.method, request.url.path)
-    try:
-        resp = await call_next(request)
-        print("<<", resp.status_code, request.url.path)
-        return resp
-    except Exception as e:
-        print("!!", request.url.path, repr(e))
-        raise
-
-
 # Include base routers
 app.include_router(auth.router)
 app.include_router(triage.router)
 app.include_router(advice.router)
 app.include_router(referrals.router)
 app.include_router(rx_draft.router)
+app.include_router(clinical.router)
 
 # Conditionally include EHR routers
 if EHR_ENABLED:
@@ -119,34 +168,34 @@ if EHR_ENABLED:
 
         app.include_router(ehr_advice_router)
         app.include_router(patient_profile_router)
-        print("✅ EHR routes registered: /ehr-advice, /patient/profile")
+        logger.info("EHR routes registered: /ehr-advice, /patient/profile")
     except ImportError as e:
-        print(f"Failed to import EHR: {e}")
+        logger.warning("Failed to import EHR: %s", e)
 
 analytics_succeed = False
 try:
     from app.routes.analytics import router as analytics_router
 
     app.include_router(analytics_router)
-    print("✅ Analytics routes registered")
+    logger.info("Analytics routes registered")
     analytics_succeed = True
 except ImportError as e:
-    print(f"Analytics routes not available: {e}")
+    logger.warning("Analytics routes not available: %s", e)
 
 try:
     from app.routes.reminders import router as reminders_router
 
     app.include_router(reminders_router)
-    print("✅ Reminder routes registered")
+    logger.info("Reminder routes registered")
 except ImportError as e:
-    print(f"Reminder routes not available: {e}")
+    logger.warning("Reminder routes not available: %s", e)
 
 try:
     from app.routes.chat import router as chat_router
 
     app.include_router(chat_router)
 except ImportError as e:
-    print(f"Chat not available: {e}")
+    logger.warning("Chat not available: %s", e)
 
 
 @app.get("/")
@@ -174,6 +223,11 @@ async def health():
             "service": "AI Doctor Chatbot API",
             "database_test": db_test,
             "ehr_integration": "enabled" if EHR_ENABLED else "disabled",
+            "db_pool": get_pool_metrics(),
+            "auth_cache": {"tokens": token_cache.stats(), "users": user_cache.stats()},
+            "provider_cache": provider_cache.stats(),
+            "single_flight": single_flight_stats(),
+            "llm": llm_stats(),
         }
 
         if EHR_ENABLED:
@@ -0,0 +1,172 @@
+# app/middleware.py - auth, request logging and timing in one ASGI layer
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Optional
+from app.logging_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# Client-supplied X-Request-ID values are kept only if they look like ids
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class PathTrie:
+    """Public-path lookup by URL segment, built once at startup.
+
+    "/docs" matches "/docs" and "/docs/oauth2-redirect" but not "/docs-x".
+    Paths added with prefix=False (e.g. "/") only match exactly.
+    """
+
+    __slots__ = ("children", "exact", "prefix")
+
+    def __init__(self):
+        self.children: Dict[str, "PathTrie"] = {}
+        self.exact = False
+        self.prefix = False
+
+    @staticmethod
+    def _segments(path: str):
+        return [s for s in path.split("/") if s]
+
+    def add(self, path: str, prefix: bool = True):
+        node = self
+        for segment in self._segments(path):
+            node = node.children.setdefault(segment, PathTrie())
+        node.exact = True
+        node.prefix = node.prefix or prefix
+
+    def match(self, path: str) -> bool:
+        node = self
+        for segment in self._segments(path):
+            if node.prefix:
+                return True
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return node.exact
+
+
+class RequestMiddleware:
+    """Pure ASGI replacement for the @app.middleware("http") auth/log layers.
+
+    Checks the bearer token on non-public paths (answering 401 itself),
+    stores the verified claims in scope["state"] for get_current_user, and
+    logs method, path, status and duration. Response messages are forwarded
+    as they arrive, so streaming bodies are not buffered.
+    """
+
+    def __init__(
+        self,
+        app,
+        public_paths: Iterable[str] = (),
+        exact_public_paths: Iterable[str] = (),
+        verify_token: Optional[Callable[[str], Optional[dict]]] = None,
+    ):
+        self.app = app
+        self.verify_token = verify_token
+        self.public = PathTrie()
+        for path in public_paths:
+            self.public.add(path)
+        for path in exact_public_paths:
+            self.public.add(path, prefix=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        request_id = _header(scope, b"x-request-id")
+        if not request_id or not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        context = request_id_var.set(request_id)
+        logger.debug("Request started: %s %s", method, path)
+
+        status = None
+
+        def log_response():
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(
+                "%s %s %s %.1fms",
+                method,
+                path,
+                status,
+                elapsed,
+                extra={
+                    "method": method,
+                    "path": path,
+                    "status": status,
+                    "duration_ms": round(elapsed, 1),
+                },
+            )
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = f"{(time.perf_counter() - start) * 1000:.1f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                headers.append((b"x-process-time-ms", elapsed.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                log_response()
+
+        try:
+            if method != "OPTIONS" and not self.public.match(path):
+                error = self._authenticate(scope)
+                if error:
+                    await self._unauthorized(send_wrapper, error)
+                    return
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception("Unhandled error on %s %s", method, path)
+            raise
+        finally:
+            request_id_var.reset(context)
+
+    def _authenticate(self, scope) -> Optional[str]:
+        """Returns an error message, or None after storing the claims."""
+        auth_header = _header(scope, b"authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return "Missing or invalid token"
+
+        token = auth_header[len("Bearer ") :]
+        payload = self.verify_token(token)
+        if not payload:
+            return "Invalid or expired token"
+
+        # Route dependencies (get_current_user) reuse these instead of re-decoding
+        state = scope.setdefault("state", {})
+        state["token"] = token
+        state["token_payload"] = payload
+        return None
+
+    @staticmethod
+    async def _unauthorized(send, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"www-authenticate", b"Bearer"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -5,12 +5,24 @@
 # variables like OPENROUTER_API_KEY, APP_REFERER, etc.
 # from your local .env file into os.environ.
 # This makes development and local testing much easier.
+import logging
 import requests
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from app.services.resilience import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    LatencyTracker,
+    time_remaining,
+)
+from app.services.single_flight import single_flight
 
 load_dotenv()  # so local runs pick up .env
 
+logger = logging.getLogger(__name__)
+
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 if not OPENROUTER_API_KEY or not OPENROUTER_API_KEY.startswith("sk-or-"):
     raise RuntimeError("OPENROUTER_API_KEY missing or malformed.")
@@ -36,11 +48,118 @@ APP_TITLE = os.getenv("APP_TITLE", "AI Doctor App")
 # This helps catch missing or invalid keys early on startup.
 
 # ------------------------------------------------------
-# Step 5: Define the chat_completion function
+# Step 5: Model routing by task class
+# ------------------------------------------------------
+# Each call site names a task class; the class picks the models (tried in
+# order), max_tokens, temperature and timeout. Any of them can be set from
+# the environment, e.g. LLM_CLASSIFY_MODELS="model-a,model-b" or
+# LLM_CLINICAL_MAX_TOKENS=600.
+DEFAULT_MODEL = "meta-llama/llama-3.3-70b-instruct:free"
+SMALL_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
+
+
+def _task_profile(task, models, max_tokens, temperature, timeout):
+    prefix = f"LLM_{task.upper()}_"
+    models = os.getenv(prefix + "MODELS", models)
+    return {
+        "models": [m.strip() for m in models.split(",") if m.strip()],
+        "max_tokens": int(os.getenv(prefix + "MAX_TOKENS", max_tokens)),
+        "temperature": float(os.getenv(prefix + "TEMPERATURE", temperature)),
+        "timeout": float(os.getenv(prefix + "TIMEOUT", timeout)),
+    }
+
+
+TASK_PROFILES = {
+    # Short structured answers: keywords, specialty/urgency, mode switches
+    "classify": _task_profile(
+        "classify", f"{SMALL_MODEL},{DEFAULT_MODEL}", "300", "0.0", "15"
+    ),
+    # Conversational replies in /chat
+    "chat": _task_profile("chat", DEFAULT_MODEL, "400", "0.5", "60"),
+    # Patient advice, diagnosis, referrals and Rx drafts
+    "clinical": _task_profile("clinical", DEFAULT_MODEL, "400", "0.5", "60"),
+}
+
+
+class LLMUnavailable(RuntimeError):
+    """Timeout, rate limit or provider error; another model may still answer."""
+
+    def __init__(self, message, status_code=None, timed_out=False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.timed_out = timed_out
+
+
+# ------------------------------------------------------
+# Step 6: Hedging and circuit breakers
+# ------------------------------------------------------
+# If a request is still running after the model's p95 latency, a second one
+# is sent (to the next model in the task's list, or the same model again if
+# it is the only one) and whichever finishes first wins. Each model has a
+# circuit breaker, so a degraded model is skipped instead of tying up
+# workers until it times out.
+LLM_HEDGING = os.getenv("LLM_HEDGING", "true").lower() == "true"
+# Hedge delay until a model has LLM_HEDGE_MIN_SAMPLES recorded latencies
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "10"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "32"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# No same-model hedges for this long after the model answered 429
+LLM_RATE_LIMIT_COOLDOWN = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN", "60"))
+
+_breakers = {}
+_latencies = {}
+_rate_limited_at = {}  # model -> time.monotonic() of its last 429
+_hedge_stats = {"hedged": 0, "hedge_wins": 0}
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm"
+)
+
+
+def _breaker(model) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers.setdefault(
+            model, CircuitBreaker(model, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
+        )
+    return _breakers[model]
+
+
+def _latency(model) -> LatencyTracker:
+    if model not in _latencies:
+        _latencies.setdefault(model, LatencyTracker())
+    return _latencies[model]
+
+
+def _rate_limited(model) -> bool:
+    at = _rate_limited_at.get(model)
+    return at is not None and time.monotonic() - at < LLM_RATE_LIMIT_COOLDOWN
+
+
+def _hedge_delay(model) -> float:
+    p95 = _latency(model).percentile(0.95, LLM_HEDGE_MIN_SAMPLES)
+    return LLM_HEDGE_DELAY if p95 is None else p95
+
+
+def llm_stats():
+    return {
+        **_hedge_stats,
+        "models": {
+            model: {
+                **breaker.stats(),
+                "p95_ms": round((_latency(model).percentile(0.95) or 0) * 1000),
+            }
+            for model, breaker in list(_breakers.items())
+        },
+    }
+
+
+# ------------------------------------------------------
+# Step 7: Define the completion functions
 # ------------------------------------------------------
-# This function sends a POST request to OpenRouter's chat endpoint.
-# It uses your LLM model (e.g. meta-llama/llama-3.3-70b-instruct:free)
-# and returns the model’s response text.
+# chat_completion sends one POST request to OpenRouter's chat endpoint for a
+# single model and returns the model’s response text. complete() applies a
+# task profile, hedging, circuit breakers and the request deadline.
 
 
 def extract_medical_keywords(symptoms_text: str) -> list[str] | None:
@@ -55,14 +174,15 @@ def extract_medical_keywords(symptoms_text: str) -> list[str] | None:
     MEDICAL KEYWORDS:
     """
     try:
-        response = chat_completion(
+        response = complete(
             [
                 {
                     "role": "system",
                     "content": "You are a medical transcription assistant. Extract only medical symptoms and conditions.",
                 },
                 {"role": "user", "content": prompt},
-            ]
+            ],
+            task="classify",
         )
         keywords = response.strip()
         if "\n" in keywords:
@@ -70,11 +190,129 @@ def extract_medical_keywords(symptoms_text: str) -> list[str] | None:
         keywords = keywords.split(",")
         return keywords
     except Exception as e:
-        print(f"LLM extraction failed: {e}")
+        logger.warning("LLM extraction failed: %s", e)
         return None
 
 
-def chat_completion(messages, model="meta-llama/llama-3.3-70b-instruct:free"):
+def _call_model(messages, model, params, hedge=False, capped=False):
+    """One upstream call, feeding the model's breaker and latency window.
+
+    `hedge` marks a second request to a model that is already running one;
+    `capped` means the timeout was cut short by the request deadline. Callers
+    that joined an identical in-flight request leave the breaker and latency
+    window to the caller that made it, so one upstream call counts once.
+    """
+    start = time.monotonic()
+    if hedge:
+        # A same-model hedge must not be coalesced into the request it hedges
+        led, outcome = chat_completion.flight.share(
+            object(), chat_completion.__wrapped__, messages, model=model, **params
+        )
+    else:
+        led, outcome = chat_completion.share(messages, model=model, **params)
+    if not led:
+        return outcome.result()
+    try:
+        result = outcome.result()
+    except LLMUnavailable as e:
+        if e.status_code == 429:
+            _rate_limited_at[model] = time.monotonic()
+        # Neither a deadline-shortened timeout nor a 429 provoked by our own
+        # hedge says the model is unhealthy
+        if not (e.timed_out and capped) and not (e.status_code == 429 and hedge):
+            _breaker(model).record_failure()
+        raise
+    except Exception:
+        # Any other error (bad request, auth) still means the model answered
+        _breaker(model).record_success()
+        raise
+    _latency(model).record(time.monotonic() - start)
+    _breaker(model).record_success()
+    return result
+
+
+def complete(messages, task="clinical", **overrides):
+    """chat_completion with the task's profile.
+
+    Tries the profile's models in order, skipping those whose circuit is
+    open and moving on when one times out, is rate limited (429) or fails
+    upstream (5xx). Slow requests are hedged (see Step 6), and nothing
+    waits past the deadline set by the route. `overrides` replaces models,
+    max_tokens, temperature or timeout for this call.
+    """
+    profile = {**TASK_PROFILES[task], **overrides}
+    models = profile.pop("models")
+    # With a single model, the hedge is a second request to the same model
+    attempts = iter(models if len(models) > 1 else models * 2)
+    pending = {}
+    last_error = None
+
+    def launch(hedge=False) -> bool:
+        for model in attempts:
+            if not _breaker(model).allow():
+                logger.warning("%s model %s skipped, circuit open", task, model)
+                continue
+            remaining = time_remaining()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(f"{task} completion deadline exceeded")
+            same_model = any(m == model for m, _ in pending.values())
+            if same_model and _rate_limited(model):
+                logger.info("%s hedge to %s skipped, rate limited", task, model)
+                continue
+            params = dict(profile)
+            capped = remaining is not None and remaining < params["timeout"]
+            if capped:
+                params["timeout"] = remaining
+            future = _hedge_executor.submit(
+                _call_model, messages, model, params, same_model, capped
+            )
+            pending[future] = (model, hedge)
+            return True
+        return False
+
+    if not launch():
+        raise LLMUnavailable(f"No {task} model available: circuits open")
+    while pending:
+        wait_for = time_remaining()
+        can_hedge = LLM_HEDGING and len(pending) == 1
+        if can_hedge:
+            model = next(iter(pending.values()))[0]
+            delay = _hedge_delay(model)
+            wait_for = delay if wait_for is None else min(delay, wait_for)
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        if not done:
+            remaining = time_remaining()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(f"{task} completion deadline exceeded")
+            if can_hedge and launch(hedge=True):
+                _hedge_stats["hedged"] += 1
+                logger.info("%s request to %s is slow, hedging", task, model)
+            continue
+
+        for future in done:
+            model, hedge = pending.pop(future)
+            try:
+                result = future.result()
+            except LLMUnavailable as e:
+                last_error = e
+                logger.warning("%s model %s unavailable: %s", task, model, e)
+                continue
+            if hedge:
+                _hedge_stats["hedge_wins"] += 1
+            # Any request still running finishes in the background, unused
+            return result
+
+        if not pending and not launch():
+            raise last_error
+
+
+# timeout is capped by each caller's remaining deadline, so it varies
+# between otherwise identical requests and must not split them
+@single_flight("chat_completion", exclude=("timeout",))
+def chat_completion(
+    messages, model=DEFAULT_MODEL, max_tokens=400, temperature=0.5, timeout=60
+):
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
@@ -85,16 +323,30 @@ def chat_completion(messages, model="meta-llama/llama-3.3-70b-instruct:free"):
     payload = {
         "model": model,
         "messages": messages,
-        "max_tokens": 400,
-        "temperature": 0.5,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
     }
 
     # Make the POST request to the API
-    r = requests.post(
-        f"{OPENROUTER_BASE}/chat/completions", json=payload, headers=headers, timeout=60
-    )
+    try:
+        r = requests.post(
+            f"{OPENROUTER_BASE}/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=timeout,
+        )
+    except (requests.Timeout, requests.ConnectionError) as e:
+        raise LLMUnavailable(
+            f"OpenRouter request failed: {e}",
+            timed_out=isinstance(e, requests.Timeout),
+        ) from e
+    if r.status_code == 429 or r.status_code >= 500:
+        raise LLMUnavailable(
+            f"OpenRouter API error {r.status_code}: {r.text[:500]}",
+            status_code=r.status_code,
+        )
     if not r.ok:
-        # If unauthorized or server error, print details
+        # If unauthorized or bad request, print details
         raise RuntimeError(f"OpenRouter API error {r.status_code}: {r.text[:500]}")
 
     # Return the model’s text output
@@ -2,42 +2,50 @@ from fastapi import APIRouter, HTTPException
 from app.schemas.schemas import SymptomInput, AdviceOut
 from app.services.triage_service import triage_rules
 from app.services.llm_service import require_json_with_retry, PATIENT_RX_BLOCK
+from app.services.resilience import REQUEST_DEADLINE, with_deadline
 
 router = APIRouter()
 
 
+def build_advice_messages(inp: SymptomInput):
+    system = (
+        "You are a clinical decision support assistant for patients. "
+        "NEVER diagnose. NEVER provide medication names/doses to patients. "
+        "Return JSON ONLY with keys: advice[], when_to_seek_care[], disclaimer."
+    )
+    user = (
+        f"Age: {inp.age}\nSex: {inp.sex}\nSymptoms: {inp.symptoms}\nDuration: {
+            inp.duration
+        }\n"
+        f"Meds: {inp.meds}\nConditions: {inp.conditions}\nSchema example:\n"
+        + '{"advice":[{"step":"Hydration","details":"Small sips of water."}],"when_to_seek_care":["Trouble breathing"],"disclaimer":"This is not a diagnosis."}'
+    )
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+def blocks_patient_rx(data: dict) -> bool:
+    """Post-filter: True if patient-facing advice contains dosing instructions."""
+    full = " ".join(
+        f"{x.get('step', '')} {x.get('details', '')}" for x in data.get("advice", [])
+    )
+    return bool(PATIENT_RX_BLOCK.search(full))
+
+
 @router.post("/advice", response_model=AdviceOut)
+@with_deadline(REQUEST_DEADLINE)
 def route_advice(inp: SymptomInput):
     # First check for emergencies using triage
     triage = triage_rules(inp.symptoms)
     if triage.risk == "emergency":
         raise HTTPException(400, "Possible emergency. Call emergency services now.")
 
-    def build_messages():
-        system = (
-            "You are a clinical decision support assistant for patients. "
-            "NEVER diagnose. NEVER provide medication names/doses to patients. "
-            "Return JSON ONLY with keys: advice[], when_to_seek_care[], disclaimer."
-        )
-        user = (
-            f"Age: {inp.age}\nSex: {inp.sex}\nSymptoms: {inp.symptoms}\nDuration: {
-                inp.duration
-            }\n"
-            f"Meds: {inp.meds}\nConditions: {inp.conditions}\nSchema example:\n"
-            + '{"advice":[{"step":"Hydration","details":"Small sips of water."}],"when_to_seek_care":["Trouble breathing"],"disclaimer":"This is not a diagnosis."}'
-        )
-        return [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ]
-
-    data = require_json_with_retry(build_messages)
+    data = require_json_with_retry(build_advice_messages(inp), task="clinical")
 
     # Post-filter: block dosing in patient-facing advice
-    full = " ".join(
-        f"{x.get('step', '')} {x.get('details', '')}" for x in data.get("advice", [])
-    )
-    if PATIENT_RX_BLOCK.search(full):
+    if blocks_patient_rx(data):
         raise HTTPException(400, "Medication instructions to patients are not allowed.")
 
     return AdviceOut(**data)
@@ -1,7 +1,9 @@
 # routes/analytics.py - FIXED SYNTAX ERROR VERSION
+import logging
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_read_db
 from app.services.symptom_tracking_service import SymptomTrackingService
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
@@ -9,12 +11,72 @@ from app.services.auth_service import get_current_user
 from app.database.models import User
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def build_intensity_series(intensity_data) -> Dict[str, Any]:
+    """Shape per-symptom daily rows into chart series in a single pass.
+
+    The per-day average across symptoms comes from the SQL window column
+    `day_avg_intensity`, so the overall trend is a dict lookup per date
+    instead of a scan of every symptom series.
+    """
+    symptoms_data = {}
+    day_averages = {}
+
+    for record in intensity_data:
+        # FIXED: Proper date formatting for frontend
+        date_str = (
+            record.date.strftime("%Y-%m-%d")
+            if hasattr(record.date, "strftime")
+            else str(record.date)
+        )
+
+        symptom_name = record.symptom_name
+        if symptom_name not in symptoms_data:
+            symptoms_data[symptom_name] = {"name": symptom_name, "data": []}
+
+        # FIXED: Use daily_avg_intensity only (individual intensity is no longer in SELECT)
+        intensity_value = (
+            float(record.daily_avg_intensity)
+            if record.daily_avg_intensity is not None
+            else 0
+        )
+
+        symptoms_data[symptom_name]["data"].append(
+            {
+                "date": date_str,
+                "intensity": intensity_value,
+                "occurrences": int(record.daily_occurrences)
+                if record.daily_occurrences
+                else 1,
+            }
+        )
+
+        if date_str not in day_averages:
+            day_averages[date_str] = (
+                float(record.day_avg_intensity)
+                if record.day_avg_intensity is not None
+                else 0
+            )
+
+    dates = sorted(day_averages)
+    overall_trend = [
+        {"date": date_str, "average_intensity": round(day_averages[date_str], 2)}
+        for date_str in dates
+    ]
+
+    return {
+        "dates": dates,
+        "symptoms": symptoms_data,
+        "overall_trend": overall_trend,
+    }
 
 
 @router.get("/analytics/symptom-intensity")
-def get_symptom_intensity(
+async def get_symptom_intensity(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get symptom intensity data - UPDATED FOR FIXED SQL"""
@@ -22,7 +84,7 @@ def get_symptom_intensity(
         user_id = current_user.id
 
         # Use existing service method
-        intensity_data = SymptomTrackingService.get_symptom_intensity_history(
+        intensity_data = await SymptomTrackingService.get_symptom_intensity_history(
             db, user_id, days
         )
 
@@ -33,72 +95,14 @@ def get_symptom_intensity(
                 "timezone": "US/Eastern",
             }
 
-        # Simple transformation
-        dates_set = set()
-        symptoms_data = {}
-
-        for record in intensity_data:
-            # FIXED: Proper date formatting for frontend
-            date_str = (
-                record.date.strftime("%Y-%m-%d")
-                if hasattr(record.date, "strftime")
-                else str(record.date)
-            )
-            dates_set.add(date_str)
-
-            symptom_name = record.symptom_name
-            if symptom_name not in symptoms_data:
-                symptoms_data[symptom_name] = {"name": symptom_name, "data": []}
-
-            # FIXED: Use daily_avg_intensity only (individual intensity is no longer in SELECT)
-            intensity_value = (
-                float(record.daily_avg_intensity)
-                if record.daily_avg_intensity is not None
-                else 0
-            )
-
-            symptoms_data[symptom_name]["data"].append(
-                {
-                    "date": date_str,
-                    "intensity": intensity_value,
-                    "occurrences": int(record.daily_occurrences)
-                    if record.daily_occurrences
-                    else 1,
-                }
-            )
-
-        dates = sorted(list(dates_set))
-
-        # Simple overall trend
-        overall_trend = []
-        for date_str in dates:
-            date_intensities = []
-            for symptom_data in symptoms_data.values():
-                point = next(
-                    (p for p in symptom_data["data"] if p["date"] == date_str), None
-                )
-                if point and point["intensity"] > 0:
-                    date_intensities.append(point["intensity"])
-
-            avg_intensity = (
-                sum(date_intensities) / len(date_intensities) if date_intensities else 0
-            )
-            overall_trend.append(
-                {"date": date_str, "average_intensity": round(avg_intensity, 2)}
-            )
-
         return {
             "success": True,
-            "data": {
-                "dates": dates,
-                "symptoms": symptoms_data,
-                "overall_trend": overall_trend,
-            },
+            "data": build_intensity_series(intensity_data),
             "timezone": "US/Eastern",
         }
 
     except Exception as e:
-        print(f"❌ Error in symptom intensity endpoint: {str(e)}")
+        logger.exception("Error in symptom intensity endpoint: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -108,15 +112,15 @@ def get_symptom_intensity(
 
 
 @router.get("/analytics/symptom-frequency")
-def get_symptom_frequency(
+async def get_symptom_frequency(
     months: int = 6,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get symptom frequency data - KEEP WORKING VERSION"""
     try:
         user_id = current_user.id
-        frequency_data = SymptomTrackingService.get_symptom_frequency(
+        frequency_data = await SymptomTrackingService.get_symptom_frequency(
             db, user_id, months
         )
 
@@ -141,13 +145,14 @@ def get_symptom_frequency(
 
 
 @router.get("/analytics/symptom-summary")
-def get_symptom_summary(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def get_symptom_summary(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
 ):
     """Get overall symptom summary"""
     try:
         user_id = current_user.id
-        summary = SymptomTrackingService.get_symptom_summary(db, user_id)
+        summary = await SymptomTrackingService.get_symptom_summary(db, user_id)
         return {"success": True, "summary": summary}
     except Exception as e:
         return {
@@ -158,8 +163,9 @@ def get_symptom_summary(
 
 
 @router.get("/analytics/debug-timezone")
-def debug_timezone(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def debug_timezone(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
 ):
     """Debug endpoint to check timezone issues"""
     try:
@@ -180,7 +186,7 @@ def debug_timezone(
             ORDER BY created_at DESC
             LIMIT 5
         """)
-        result = db.execute(query, {"user_id": current_user.id})
+        result = await db.execute(query, {"user_id": current_user.id})
         rows = result.fetchall()
 
         debug_data = []
@@ -208,12 +214,15 @@ def debug_timezone(
 
 
 @router.get("/analytics/debug-symptoms-raw")
-def debug_symptoms_raw(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def debug_symptoms_raw(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
 ):
     """Debug endpoint to see raw symptom data"""
     try:
-        debug_data = SymptomTrackingService.debug_symptom_data(db, current_user.id)
+        debug_data = await SymptomTrackingService.debug_symptom_data(
+            db, current_user.id
+        )
 
         formatted_data = []
         for row in debug_data:
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import logging
 from app.database.database import get_db
 from app.database.models import User
 from app.schemas.schemas import (
@@ -20,14 +21,25 @@ from app.services.auth_service import (
     get_current_user,
     verify_token_service,
 )
+from app.services.password_hasher import PasswordHasherBusy
 from typing import Annotated
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+logger = logging.getLogger(__name__)
 
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[User, Depends(get_current_user)]
 
 
+def _hasher_busy():
+    logger.warning("Password hasher saturated, rejecting request")
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.get("/test")
 def test_db_connection(db: db_dependency):
     try:
@@ -46,26 +58,25 @@ def test_db_connection(db: db_dependency):
 
 @router.post("/register", response_model=Token)
 def register(user_data: UserCreate, db: db_dependency):
-    print(f"📝 Registration attempt for: {user_data.username}, {user_data.email}")
+    logger.info("Registration attempt for: %s", user_data.username)
 
     try:
         existing_user = (
             db.query(User).filter(User.username == user_data.username).first()
         )
         if existing_user:
-            print("❌ Username already exists")
+            logger.info("Username already exists")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
             )
 
         existing_email = db.query(User).filter(User.email == user_data.email).first()
         if existing_email:
-            print("❌ Email already exists")
+            logger.info("Email already exists")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Email already existed"
             )
 
-        print("✅ Creating new user...")
         hashed_password = get_password_hash(user_data.password)
         db_user = User(
             username=user_data.username,
@@ -78,7 +89,7 @@ def register(user_data: UserCreate, db: db_dependency):
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
-        print(f"✅ User created: {db_user.username}")
+        logger.info("User created: %s", db_user.username)
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
@@ -87,9 +98,12 @@ def register(user_data: UserCreate, db: db_dependency):
         )
         return {"access_token": access_token, "token_type": "bearer"}
 
+    except PasswordHasherBusy:
+        db.rollback()
+        raise _hasher_busy()
     except Exception as e:
         db.rollback()
-        print(f"❌ Registration error: {str(e)}")
+        logger.exception("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed",
@@ -100,8 +114,11 @@ def register(user_data: UserCreate, db: db_dependency):
 def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    print(f"🔐 Login attempt - identifier: '{form_data.username}'")
-    user = authenticate_user(db, form_data.username, form_data.password)
+    logger.info("Login attempt - identifier: %r", form_data.username)
+    try:
+        user = authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
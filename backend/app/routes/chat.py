@@ -1,27 +1,36 @@
 # app/routes/chat.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 import json  # ADD THIS IMPORT
-from app.database.database import get_db
+import logging
+from app.database.database import get_db, get_async_db, get_async_read_db
 from app.schemas.schemas import (
     ChatInput,
+    ChatMessagePage,
     ChatResponse,
     ChatSessionResponse,
     EnhancedAdviceOutWithReminders,
 )
 from app.services.chat_service import ChatService
 from app.services.conversational_ai_service import ConversationalAIService
+from app.services.resilience import DeadlineExceeded, REQUEST_DEADLINE, with_deadline
 from app.services.auth_service import get_current_user
 from app.database.models import User
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/chat", response_model=ChatResponse)
+@with_deadline(REQUEST_DEADLINE)
 async def chat_endpoint(
     chat_input: ChatInput,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -29,28 +38,41 @@ async def chat_endpoint(
     """
     # Get or create session
     if chat_input.session_id:
-        session = ChatService.get_session(db, chat_input.session_id, current_user.id)
+        session = await ChatService.get_session(
+            db, chat_input.session_id, current_user.id
+        )
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
     else:
         # Create new session
-        session = ChatService.create_session(db, current_user.id)
+        session = await ChatService.create_session(db, current_user.id)
 
     # Get conversation history
-    history_messages = ChatService.get_session_messages(db, session.id)
+    history_messages = await ChatService.get_session_messages(
+        db, session.id, since=session.created_at
+    )
     conversation_history = [
         {"role": msg.role, "content": msg.content} for msg in history_messages
     ]
 
-    # Save user message
-    user_message = ChatService.add_message(db, session.id, "user", chat_input.message)
+    # The user message is saved with the assistant reply in one write at the
+    # end of the turn; keep its arrival time so the two stay in order
+    user_message = {
+        "role": "user",
+        "content": chat_input.message,
+        "timestamp": datetime.now(),  # Tampa time
+    }
+    context_updates = {}
 
     # ANALYZE: Should we switch to analysis mode?
-    analysis_check = ConversationalAIService.analyze_conversation_for_medical_context(
-        chat_input.message, conversation_history
+    # The LLM client is synchronous; run it off the event loop
+    analysis_check = await run_in_threadpool(
+        ConversationalAIService.analyze_conversation_for_medical_context,
+        chat_input.message,
+        conversation_history,
     )
 
-    print(f"🔍 Analysis Check: {analysis_check}")
+    logger.debug("Analysis Check: %s", analysis_check)
 
     # STRATEGY: Only offer analysis if we have good info AND user seems to want it
     should_offer_analysis = (
@@ -69,23 +91,19 @@ async def chat_endpoint(
 
         # Also update context with extracted symptoms for later use
         if analysis_check.get("extracted_symptoms"):
-            ChatService.update_session_context(
-                db, session.id, {"symptoms": analysis_check["extracted_symptoms"]}
-            )
+            context_updates["symptoms"] = analysis_check["extracted_symptoms"]
 
     else:
         # NORMAL CONVERSATION MODE
-        conversational_response = (
-            ConversationalAIService.generate_conversational_response(
-                chat_input.message, conversation_history, session.context_data or {}
-            )
+        conversational_response = await run_in_threadpool(
+            ConversationalAIService.generate_conversational_response,
+            chat_input.message,
+            conversation_history,
+            session.context_data or {},
         )
 
         # FIX: Handle both string and dictionary responses
-        print(
-            f"🔍 DEBUG: conversational_response type: {type(conversational_response)}"
-        )
-        print(f"🔍 DEBUG: conversational_response content: {conversational_response}")
+        logger.debug("Conversational response: %.500r", conversational_response)
 
         if isinstance(conversational_response, str):
             try:
@@ -109,16 +127,17 @@ async def chat_endpoint(
 
             # Update session context if new medical info was extracted
             if conversational_response.get("update_context"):
-                ChatService.update_session_context(
-                    db, session.id, conversational_response["update_context"]
-                )
+                context_updates.update(conversational_response["update_context"])
         else:
             # Fallback response
             response_content = "Hello! I'm here to help with your health concerns. How are you feeling today?"
 
-    # Save assistant response
-    assistant_message = ChatService.add_message(
-        db, session.id, "assistant", response_content
+    # Save both messages, the updated_at bump and the context merge together
+    _, assistant_message = await ChatService.save_turn(
+        db,
+        session.id,
+        [user_message, {"role": "assistant", "content": response_content}],
+        context_updates,
     )
 
     return ChatResponse(
@@ -134,9 +153,11 @@ async def chat_endpoint(
 @router.post(
     "/chat/{session_id}/analyze", response_model=EnhancedAdviceOutWithReminders
 )
+@with_deadline(REQUEST_DEADLINE)
 async def analyze_chat_session(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    sync_db: Session = Depends(get_db),  # ehr_advice still runs on the sync session
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -144,22 +165,25 @@ async def analyze_chat_session(
     This triggers your existing ehr_advice system with extracted data
     """
     # Verify session belongs to user
-    session = ChatService.get_session(db, session_id, current_user.id)
+    session = await ChatService.get_session(db, session_id, current_user.id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Get all messages from this session
-    messages = ChatService.get_session_messages(db, session_id, limit=100)
+    messages = await ChatService.get_session_messages(
+        db, session_id, limit=100, since=session.created_at
+    )
     conversation_history = [
         {"role": msg.role, "content": msg.content} for msg in messages
     ]
 
     # Extract medical context from the entire conversation
-    medical_context = ConversationalAIService.extract_medical_context_from_conversation(
-        conversation_history
+    medical_context = await run_in_threadpool(
+        ConversationalAIService.extract_medical_context_from_conversation,
+        conversation_history,
     )
 
-    print(f"🩺 Extracted Medical Context: {medical_context}")
+    logger.debug("Extracted medical context: %s", medical_context)
 
     # Use your existing ehr_advice logic but with conversation-extracted context
     from app.ehr.ehr_advice import enhanced_advice_with_ehr
@@ -174,79 +198,145 @@ async def analyze_chat_session(
         conditions=medical_context.get("conditions", []),
         duration=medical_context.get("duration"),
     )
-    # DEBUG: Print exactly what we're sending to EHR analysis
-    print("🎯 SENDING TO EHR ANALYSIS:")
-    print(f"  Age: {symptom_input.age}")
-    print(f"  Sex: {symptom_input.sex}")
-    print(f"  Symptoms: {symptom_input.symptoms}")
-    print(f"  Medications: {symptom_input.meds}")
-    print(f"  Conditions: {symptom_input.conditions}")
-    print(f"  Duration: {symptom_input.duration}")
-
-    # Add a message indicating we're switching to analysis mode
-    ChatService.add_message(
-        db,
-        session_id,
-        "assistant",
-        "I'm now analyzing your symptoms with your medical history. Please wait a moment...",
-        "analysis_request",
-    )
+    logger.debug("Sending to EHR analysis: %s", symptom_input)
+
+    # Message indicating we're switching to analysis mode; it is saved along
+    # with the outcome below, in a single write
+    analysis_notice = {
+        "role": "assistant",
+        "content": "I'm now analyzing your symptoms with your medical history. Please wait a moment...",
+        "message_type": "analysis_request",
+        "timestamp": datetime.now(),  # Tampa time
+    }
 
     # Call your existing analysis function (this does triage, EHR lookup, LLM analysis, etc.)
     try:
-        analysis_result_dict = enhanced_advice_with_ehr(symptom_input, db, current_user)
+        # Sync DB + LLM work goes to the threadpool so the event loop stays free
+        analysis_result_dict = await run_in_threadpool(
+            enhanced_advice_with_ehr, symptom_input, sync_db, current_user
+        )
         analysis_result = EnhancedAdviceOutWithReminders(**analysis_result_dict)
         # Save the analysis result as a message
         analysis_summary = f"Analysis complete: {', '.join(analysis_result.possible_diagnosis) if analysis_result.possible_diagnosis else 'See recommendations'}"
-        ChatService.add_message(
+        await ChatService.save_turn(
             db,
             session_id,
-            "assistant",
-            analysis_summary,
-            "medical_advice",
-            {"analysis_data": analysis_result.dict()},
+            [
+                analysis_notice,
+                {
+                    "role": "assistant",
+                    "content": analysis_summary,
+                    "message_type": "medical_advice",
+                    "message_metadata": {"analysis_data": analysis_result.dict()},
+                },
+            ],
         )
 
         return analysis_result
+    except DeadlineExceeded:
+        # The route's time budget is spent; let it answer 504
+        raise
     except Exception as e:
-        print(f"Analysis failed: {e}")
-        ChatService.add_message(
+        logger.exception("Analysis failed: %s", e)
+        await ChatService.save_turn(
             db,
             session_id,
-            "assistant",
-            "I apologize, but I'm having trouble analyzing your symptoms right now. Please try again later.",
-            "error",
+            [
+                analysis_notice,
+                {
+                    "role": "assistant",
+                    "content": "I apologize, but I'm having trouble analyzing your symptoms right now. Please try again later.",
+                    "message_type": "error",
+                },
+            ],
         )
         raise HTTPException(status_code=500, detail="Analysis failed")
 
 
 @router.get("/chat/sessions", response_model=List[ChatSessionResponse])
 async def get_chat_sessions(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    symptom: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
 ):
-    """Get all chat sessions for the current user"""
-    sessions = ChatService.get_user_sessions(db, current_user.id)
+    """Get all chat sessions for the current user, optionally only those
+    whose context mentions `symptom`"""
+    if symptom:
+        return await ChatService.find_sessions_mentioning(db, current_user.id, symptom)
+    sessions = await ChatService.get_user_sessions(db, current_user.id)
     return sessions
 
 
 @router.get("/chat/sessions/{session_id}", response_model=ChatSessionResponse)
 async def get_chat_session(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get a specific chat session with all its messages"""
-    session = ChatService.get_session(db, session_id, current_user.id)
+    """Get a specific chat session with its latest messages.
+
+    Older messages are fetched page by page from /chat/sessions/{id}/messages.
+    """
+    session = await ChatService.get_session(db, session_id, current_user.id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Get messages for this session
-    messages = ChatService.get_session_messages(db, session_id)
-    session.messages = messages
+    # Get the latest page of messages for this session
+    messages = await ChatService.get_session_messages(
+        db, session_id, since=session.created_at
+    )
+    # Populate the relationship without a lazy load or a pending change
+    set_committed_value(session, "messages", messages)
 
     return session
 
 
+@router.get("/chat/sessions/{session_id}/messages", response_model=ChatMessagePage)
+async def get_chat_messages(
+    session_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Page through a session's messages, newest page first.
+
+    Without a cursor this returns the latest `limit` messages. Pass
+    `older_cursor` back as `before` to load earlier messages, or
+    `newer_cursor` as `after` to load later ones.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after")
+    try:
+        before_key = ChatService.decode_cursor(before) if before else None
+        after_key = ChatService.decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    session = await ChatService.get_session(db, session_id, current_user.id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    messages, has_older, has_newer = await ChatService.get_messages_page(
+        db,
+        session_id,
+        limit=limit,
+        before=before_key,
+        after=after_key,
+        since=session.created_at,
+    )
+    return ChatMessagePage(
+        messages=messages,
+        older_cursor=(
+            ChatService.encode_cursor(messages[0]) if messages and has_older else None
+        ),
+        newer_cursor=(
+            ChatService.encode_cursor(messages[-1]) if messages and has_newer else None
+        ),
+    )
+
+
 @router.get("/chat/debug-test")
 async def debug_test(current_user: User = Depends(get_current_user)):
     """Debug endpoint to test authentication"""
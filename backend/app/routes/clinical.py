@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from app.routes.advice import blocks_patient_rx, build_advice_messages
+from app.routes.referrals import build_referral_messages
+from app.routes.rx_draft import build_rx_draft_messages
+from app.schemas.schemas import (
+    AdviceOut,
+    ClinicalBundleOut,
+    ReferralOut,
+    RxDraftOut,
+    SymptomInput,
+)
+from app.services.llm_service import require_json_with_retry
+from app.services.resilience import REQUEST_DEADLINE, with_deadline
+from app.services.triage_service import triage_rules
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# false: always use the three separate prompts, run concurrently
+CLINICAL_BUNDLE_SINGLE_CALL = (
+    os.getenv("CLINICAL_BUNDLE_SINGLE_CALL", "true").lower() == "true"
+)
+# Room for all three parts; each legacy prompt gets 400
+CLINICAL_BUNDLE_MAX_TOKENS = int(os.getenv("CLINICAL_BUNDLE_MAX_TOKENS", "1200"))
+
+PARTS = {
+    "advice": (AdviceOut, build_advice_messages),
+    "referral": (ReferralOut, build_referral_messages),
+    "rx_draft": (RxDraftOut, build_rx_draft_messages),
+}
+
+BUNDLE_EXAMPLE = {
+    "advice": {
+        "advice": [{"step": "Hydration", "details": "Small sips of water."}],
+        "when_to_seek_care": ["Trouble breathing"],
+        "disclaimer": "This is not a diagnosis.",
+    },
+    "referral": {
+        "suggested_specialties": [{"name": "Pulmonology", "reason": "Chronic cough"}],
+        "pre_referral_workup": ["Chest X-ray", "Spirometry"],
+        "priority": "routine",
+    },
+    "rx_draft": {
+        "candidates": [
+            {
+                "drug_class": "Inhaled corticosteroid",
+                "example": "budesonide DPI",
+                "use_case": "Persistent asthma",
+                "contraindications": ["hypersensitivity"],
+                "monitoring": ["symptom diary"],
+            }
+        ],
+        "notes": "Draft for clinician review—do not display to patient.",
+    },
+}
+
+
+def build_bundle_messages(inp: SymptomInput):
+    system = (
+        "You are a clinical decision support assistant. "
+        "Return JSON ONLY with three keys: advice, referral, rx_draft.\n"
+        "advice is shown to the PATIENT: NEVER diagnose, NEVER provide "
+        "medication names/doses. Keys: advice[], when_to_seek_care[], disclaimer.\n"
+        "referral is a specialist referral draft for CLINICIANS: no patient "
+        "instructions, no dosing. Keys: suggested_specialties[], "
+        "pre_referral_workup[], priority (routine|expedited|urgent).\n"
+        "rx_draft is a CLINICIAN-ONLY medication class draft: no dosing. "
+        "Keys: candidates[], notes."
+    )
+    user = (
+        f"Age: {inp.age}\nSex: {inp.sex}\nSymptoms: {inp.symptoms}\n"
+        f"Duration: {inp.duration}\nMeds: {inp.meds}\n"
+        f"Conditions: {inp.conditions}\nSchema example:\n"
+        + json.dumps(BUNDLE_EXAMPLE, ensure_ascii=False)
+    )
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+def _raise_if_failed(data):
+    """503 when the completion itself failed (no model available, circuit
+    open); retrying the other prompts would only fail the same way."""
+    if isinstance(data, dict) and "error" in data:
+        logger.warning("Clinical bundle completion failed: %s", data["error"])
+        raise HTTPException(503, "Clinical model unavailable, try again shortly")
+
+
+def _parse_part(name: str, data: dict):
+    """The validated model for one part of the combined reply, or None."""
+    part = data.get(name)
+    if not isinstance(part, dict):
+        return None
+    if name == "advice" and blocks_patient_rx(part):
+        logger.warning("Combined reply put dosing in patient advice; regenerating")
+        return None
+    try:
+        return PARTS[name][0](**part)
+    except ValidationError:
+        return None
+
+
+@router.post("/clinical_bundle", response_model=ClinicalBundleOut)
+@with_deadline(REQUEST_DEADLINE)
+async def route_clinical_bundle(inp: SymptomInput):
+    """/advice, /referrals and /rx_draft from one completion.
+
+    Parts missing or invalid in the combined reply (or all three, with
+    CLINICAL_BUNDLE_SINGLE_CALL=false) are regenerated with their own
+    prompts, concurrently.
+    """
+    triage = triage_rules(inp.symptoms)
+    if triage.risk == "emergency":
+        raise HTTPException(400, "Possible emergency. Call emergency services now.")
+
+    parts = {}
+    if CLINICAL_BUNDLE_SINGLE_CALL:
+        data = await run_in_threadpool(
+            require_json_with_retry,
+            build_bundle_messages(inp),
+            task="clinical",
+            max_tokens=CLINICAL_BUNDLE_MAX_TOKENS,
+        )
+        _raise_if_failed(data)
+        if isinstance(data, dict):
+            parts = {name: _parse_part(name, data) for name in PARTS}
+
+    missing = [name for name in PARTS if parts.get(name) is None]
+    if missing:
+        if CLINICAL_BUNDLE_SINGLE_CALL:
+            logger.info("Clinical bundle regenerating %s", ", ".join(missing))
+        results = await asyncio.gather(
+            *(
+                run_in_threadpool(
+                    require_json_with_retry, PARTS[name][1](inp), task="clinical"
+                )
+                for name in missing
+            )
+        )
+        for data in results:
+            _raise_if_failed(data)
+        for name, data in zip(missing, results):
+            if not isinstance(data, dict):
+                raise HTTPException(502, f"Model did not return a valid {name}")
+            # Post-filter: block dosing in patient-facing advice
+            if name == "advice" and blocks_patient_rx(data):
+                raise HTTPException(
+                    400, "Medication instructions to patients are not allowed."
+                )
+            try:
+                parts[name] = PARTS[name][0](**data)
+            except ValidationError:
+                raise HTTPException(502, f"Model did not return a valid {name}")
+
+    return ClinicalBundleOut(
+        **parts, fallback=missing if CLINICAL_BUNDLE_SINGLE_CALL else []
+    )
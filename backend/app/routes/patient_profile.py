@@ -1,4 +1,5 @@
 # routes/patient_profile.py
+import logging
 from fastapi import APIRouter, HTTPException, Depends
 from app.schemas.profile_schemas import ProfileResponse, PatientProfile
 from app.services.fhir_service import FHIRService
@@ -8,6 +9,7 @@ from app.database.database import get_db
 from sqlalchemy.orm import Session
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.get("/patient/profile/me")  # New endpoint for authenticated user
@@ -31,7 +33,7 @@ def get_my_patient_profile(
 def get_patient_profile(patient_id: str):
     """Get comprehensive patient profile from FHIR"""
     try:
-        print(f"🔍 Fetching profile for patient: {patient_id}")
+        logger.debug("Fetching profile for patient: %s", patient_id)
 
         # Add validation for patient_id
         if not patient_id or patient_id.strip() == "":
@@ -40,7 +42,7 @@ def get_patient_profile(patient_id: str):
         profile_data = FHIRService.get_patient_profile(patient_id)
 
         if not profile_data:
-            print(f"❌ No profile data returned for patient: {patient_id}")
+            logger.warning("No profile data returned for patient: %s", patient_id)
             return ProfileResponse(
                 success=False, error=f"Patient {patient_id} not found in EHR system"
             )
@@ -55,10 +57,7 @@ def get_patient_profile(patient_id: str):
         return ProfileResponse(success=True, profile=profile_data)
 
     except Exception as e:
-        print(f"❌ Detailed error fetching patient profile: {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Error fetching patient profile: %s", e)
         return ProfileResponse(
             success=False, error=f"Error fetching patient profile: {str(e)}"
         )
@@ -1,27 +1,30 @@
 from fastapi import APIRouter
 from app.schemas.schemas import SymptomInput, ReferralOut
 from app.services.llm_service import require_json_with_retry
+from app.services.resilience import REQUEST_DEADLINE, with_deadline
 
 router = APIRouter()
 
 
+def build_referral_messages(inp: SymptomInput):
+    system = (
+        "You assist clinicians by drafting specialist referrals. "
+        "JSON ONLY; no patient instructions; no dosing."
+    )
+    user = (
+        f"Age: {inp.age}\nSymptoms: {inp.symptoms}\nConditions: {
+            inp.conditions
+        }\nSchema example:\n"
+        + '{"suggested_specialties":[{"name":"Pulmonology","reason":"Chronic cough"}],"pre_referral_workup":["Chest X-ray","Spirometry"],"priority":"routine"}'
+    )
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
 @router.post("/referrals", response_model=ReferralOut)
+@with_deadline(REQUEST_DEADLINE)
 def route_referrals(inp: SymptomInput):
-    def build_messages():
-        system = (
-            "You assist clinicians by drafting specialist referrals. "
-            "JSON ONLY; no patient instructions; no dosing."
-        )
-        user = (
-            f"Age: {inp.age}\nSymptoms: {inp.symptoms}\nConditions: {
-                inp.conditions
-            }\nSchema example:\n"
-            + '{"suggested_specialties":[{"name":"Pulmonology","reason":"Chronic cough"}],"pre_referral_workup":["Chest X-ray","Spirometry"],"priority":"routine"}'
-        )
-        return [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ]
-
-    data = require_json_with_retry(build_messages)
+    data = require_json_with_retry(build_referral_messages(inp), task="clinical")
     return ReferralOut(**data)
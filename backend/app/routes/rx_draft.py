@@ -1,24 +1,27 @@
 from fastapi import APIRouter
 from app.schemas.schemas import SymptomInput, RxDraftOut
 from app.services.llm_service import require_json_with_retry
+from app.services.resilience import REQUEST_DEADLINE, with_deadline
 
 router = APIRouter()
 
 
+def build_rx_draft_messages(inp: SymptomInput):
+    system = "Clinician-only medication class draft. No dosing. JSON ONLY."
+    user = (
+        f"Age: {inp.age}\nSymptoms: {inp.symptoms}\nMeds: {inp.meds}\nConditions: {
+            inp.conditions
+        }\nSchema example:\n"
+        + '{"candidates":[{"drug_class":"Inhaled corticosteroid","example":"budesonide DPI","use_case":"Persistent asthma","contraindications":["hypersensitivity"],"monitoring":["symptom diary"]}],"notes":"Draft for clinician review—do not display to patient."}'
+    )
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
 @router.post("/rx_draft", response_model=RxDraftOut)
+@with_deadline(REQUEST_DEADLINE)
 def route_rx(inp: SymptomInput):
-    def build_messages():
-        system = "Clinician-only medication class draft. No dosing. JSON ONLY."
-        user = (
-            f"Age: {inp.age}\nSymptoms: {inp.symptoms}\nMeds: {inp.meds}\nConditions: {
-                inp.conditions
-            }\nSchema example:\n"
-            + '{"candidates":[{"drug_class":"Inhaled corticosteroid","example":"budesonide DPI","use_case":"Persistent asthma","contraindications":["hypersensitivity"],"monitoring":["symptom diary"]}],"notes":"Draft for clinician review—do not display to patient."}'
-        )
-        return [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ]
-
-    data = require_json_with_retry(build_messages)
+    data = require_json_with_retry(build_rx_draft_messages(inp), task="clinical")
     return RxDraftOut(**data)
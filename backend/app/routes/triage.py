@@ -1,10 +1,96 @@
-from fastapi import APIRouter
+import json
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.schemas.schemas import SymptomInput, TriageOut
 from app.services.triage_service import triage_rules
 
 router = APIRouter()
 
+TRIAGE_BATCH_MAX = int(os.getenv("TRIAGE_BATCH_MAX", "500"))
+
 
 @router.post("/triage", response_model=TriageOut)
 def route_triage(inp: SymptomInput):
     return triage_rules(inp.symptoms)
+
+
+def _symptom_text(item) -> str:
+    """Batch items may be bare strings or objects with a `symptoms` field."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict) and isinstance(item.get("symptoms"), str):
+        return item["symptoms"]
+    raise ValueError("expected a string or an object with 'symptoms'")
+
+
+async def _ndjson_items(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _json_items(request: Request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(400, "Body must be a JSON array or NDJSON")
+    if isinstance(body, dict):
+        body = body.get("items")
+    if not isinstance(body, list):
+        raise HTTPException(400, "Body must be a JSON array or NDJSON")
+    if len(body) > TRIAGE_BATCH_MAX:
+        raise HTTPException(413, f"Batch larger than {TRIAGE_BATCH_MAX} items")
+    for item in body:
+        yield item
+
+
+_END = object()
+
+
+async def _next_item(items):
+    try:
+        return await anext(items)
+    except StopAsyncIteration:
+        return _END
+
+
+@router.post("/triage/batch")
+async def route_triage_batch(request: Request):
+    """Triage many symptom texts in one request.
+
+    Accepts a JSON array (or {"items": [...]}) or an `application/x-ndjson`
+    stream. Results are streamed back as NDJSON in input order, one line per
+    item, so a bad line only fails itself.
+    """
+    content_type = request.headers.get("content-type", "")
+    is_ndjson = "ndjson" in content_type or "jsonlines" in content_type
+    items = _ndjson_items(request) if is_ndjson else _json_items(request)
+    # Pull the first item before streaming so body errors still map to 4xx.
+    first = await _next_item(items)
+
+    async def results():
+        index, item = 0, first
+        while item is not _END:
+            if index >= TRIAGE_BATCH_MAX:
+                line = {"index": index, "error": "batch limit reached"}
+                yield json.dumps(line) + "\n"
+                return
+            try:
+                if is_ndjson:
+                    item = json.loads(item)
+                out = triage_rules(_symptom_text(item))
+                line = {"index": index, **out.model_dump()}
+            except (ValueError, TypeError) as e:
+                line = {"index": index, "error": str(e)}
+            yield json.dumps(line) + "\n"
+            index += 1
+            item = await _next_item(items)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -69,11 +69,20 @@ class SymptomInput(BaseModel):
 # ------------------------------------------------------
 
 
+class TriageMatch(BaseModel):
+    category: str
+    term: str
+    start: int
+    end: int
+    negated: bool = False
+
+
 class TriageOut(BaseModel):
     risk: Literal["emergency", "routine"]
     next_step: Literal["call_emergency", "self_care"]
     red_flags: List[str]
     disclaimer: str
+    matches: List[TriageMatch] = []
 
 
 # ------------------------------------------------------
@@ -128,6 +137,16 @@ class RxDraftOut(BaseModel):
     notes: str = ""
 
 
+class ClinicalBundleOut(BaseModel):
+    """Advice (patient-facing) plus the clinician referral and Rx drafts."""
+
+    advice: AdviceOut
+    referral: ReferralOut
+    rx_draft: RxDraftOut
+    # Parts regenerated with their own prompt after the combined call
+    fallback: List[Literal["advice", "referral", "rx_draft"]] = []
+
+
 class SymptomIntensity(BaseModel):
     symptom_name: str
     intensity: int = Field(ge=1, le=10)
@@ -281,9 +300,10 @@ class HealthcareProvider(BaseModel):
     total_ratings: Optional[int] = None
     open_now: Optional[bool] = None
     distance_km: Optional[float] = None
-    place_id: str
+    place_id: Optional[str] = None  # None for directory entries Places didn't match
     types: List[str] = []
     google_maps_url: str
+    npi: Optional[str] = None
 
 
 class HealthcareRecommendations(BaseModel):
@@ -317,6 +337,12 @@ class ChatMessageResponse(ChatMessageBase):
         from_attributes = True
 
 
+class ChatMessagePage(BaseModel):
+    messages: List[ChatMessageResponse]  # oldest first
+    older_cursor: Optional[str] = None  # pass as ?before= for the previous page
+    newer_cursor: Optional[str] = None  # pass as ?after= for the next page
+
+
 class ChatSessionBase(BaseModel):
     user_id: int
     context_data: Optional[Dict] = None
@@ -0,0 +1,22 @@
+# Rebuild symptom_daily_rollup from raw symptom_intensity rows.
+#   python -m app.scripts.backfill_symptom_rollup [--user-id N]
+import argparse
+
+from app.database.database import SessionLocal
+from app.services.symptom_tracking_service import SymptomTrackingService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild symptom_daily_rollup")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        SymptomTrackingService.backfill_daily_rollup(db, user_id=args.user_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Benchmark: /analytics/symptom-intensity payload shaping over a year of
+# dense multi-symptom data, old nested-scan trend vs. build_intensity_series.
+#   python -m app.scripts.bench_analytics [--db]
+# Offline, the per-day average is computed in Python, so only timings are
+# meaningful. With --db the rows are loaded into symptom_daily_rollup for a
+# throwaway user (rolled back afterwards) and read back through
+# get_symptom_intensity_history, so the SQL window average is checked
+# against the legacy trend.
+import argparse
+import asyncio
+import os
+import random
+import timeit
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-only")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.routes.analytics import build_intensity_series  # noqa: E402
+from app.services.symptom_tracking_service import SymptomTrackingService  # noqa: E402
+
+Row = namedtuple(
+    "Row",
+    "symptom_name date daily_avg_intensity daily_occurrences avg_duration "
+    "day_avg_intensity",
+)
+
+INSERT_USER_SQL = text(
+    "INSERT INTO users (username, email) VALUES (:name, :email) RETURNING id"
+)
+INSERT_ROLLUP_SQL = text("""
+    INSERT INTO symptom_daily_rollup (
+        user_id, symptom_name, local_date, event_count, intensity_sum,
+        duration_sum
+    ) VALUES (
+        :user_id, :symptom_name, :local_date, :event_count, :intensity_sum,
+        :duration_sum
+    )
+""")
+
+
+def year_of_rollups(n_symptoms: int, days: int = 365, seed: int = 7):
+    """symptom_daily_rollup rows for the last `days` local days."""
+    rng = random.Random(seed)
+    today = SymptomTrackingService.get_local_time().date()
+    rollups = []
+    for d in range(days):
+        day = today - timedelta(days=d)
+        for s in range(n_symptoms):
+            count = rng.randint(1, 6)
+            rollups.append(
+                {
+                    "symptom_name": f"symptom_{s}",
+                    "local_date": day,
+                    "event_count": count,
+                    "intensity_sum": sum(rng.randint(1, 10) for _ in range(count)),
+                    "duration_sum": 30 * count,
+                }
+            )
+    return rollups
+
+
+def rows_in_python(rollups):
+    """Query-shaped rows with the window average computed here."""
+    by_day = {}
+    for r in rollups:
+        by_day.setdefault(r["local_date"], []).append(r)
+    rows = []
+    for day in sorted(by_day):
+        day_rows = sorted(by_day[day], key=lambda r: r["symptom_name"])
+        avgs = [r["intensity_sum"] / r["event_count"] for r in day_rows]
+        day_avg = sum(avgs) / len(avgs)
+        for r, avg in zip(day_rows, avgs):
+            rows.append(
+                Row(r["symptom_name"], day, avg, r["event_count"], 30.0, day_avg)
+            )
+    return rows
+
+
+async def rows_from_db(rollups, days: int):
+    """Rows as the endpoint reads them, via the real SQL."""
+    from app.database.database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        try:
+            tag = uuid.uuid4().hex
+            user_id = (
+                await db.execute(
+                    INSERT_USER_SQL,
+                    {"name": f"bench-{tag}", "email": f"bench-{tag}@example.invalid"},
+                )
+            ).scalar_one()
+            await db.execute(
+                INSERT_ROLLUP_SQL, [{**r, "user_id": user_id} for r in rollups]
+            )
+            return await SymptomTrackingService.get_symptom_intensity_history(
+                db, user_id, days
+            )
+        finally:
+            await db.rollback()
+            # Pooled connections belong to this asyncio.run loop
+            await async_engine.dispose()
+
+
+def same_trend(legacy, new) -> bool:
+    """Equal dates and averages; the two sides sum floats in different
+    orders, so a value may land on the other side of a rounding edge."""
+    return len(legacy) == len(new) and all(
+        a["date"] == b["date"]
+        and abs(a["average_intensity"] - b["average_intensity"]) <= 0.011
+        for a, b in zip(legacy, new)
+    )
+
+
+def legacy_trend(rows):
+    """The pre-rewrite loop, kept here only as the comparison baseline."""
+    dates_set = set()
+    symptoms_data = {}
+    for record in rows:
+        date_str = record.date.strftime("%Y-%m-%d")
+        dates_set.add(date_str)
+        symptoms_data.setdefault(
+            record.symptom_name, {"name": record.symptom_name, "data": []}
+        )["data"].append(
+            {"date": date_str, "intensity": float(record.daily_avg_intensity)}
+        )
+    overall_trend = []
+    for date_str in sorted(dates_set):
+        vals = []
+        for symptom_data in symptoms_data.values():
+            point = next(
+                (p for p in symptom_data["data"] if p["date"] == date_str), None
+            )
+            if point and point["intensity"] > 0:
+                vals.append(point["intensity"])
+        avg = sum(vals) / len(vals) if vals else 0
+        overall_trend.append({"date": date_str, "average_intensity": round(avg, 2)})
+    return overall_trend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intensity shaping")
+    parser.add_argument(
+        "--db", action="store_true", help="read rows through the real SQL query"
+    )
+    args = parser.parse_args()
+
+    print(f"{'symptoms':>9} {'rows':>7} {'legacy ms':>10} {'new ms':>8}")
+    days = 365
+    for n_symptoms in (5, 20, 50):
+        rollups = year_of_rollups(n_symptoms, days)
+        if args.db:
+            rows = asyncio.run(rows_from_db(rollups, days))
+            assert len(rows) == len(rollups), "rollup rows missing from the query"
+            new = build_intensity_series(rows)["overall_trend"]
+            assert same_trend(legacy_trend(rows), new), "SQL day average differs"
+        else:
+            rows = rows_in_python(rollups)
+        runs = 3
+        legacy_t = timeit.timeit(lambda: legacy_trend(rows), number=runs)
+        new_t = timeit.timeit(lambda: build_intensity_series(rows), number=runs)
+        print(
+            f"{n_symptoms:>9} {len(rows):>7} {legacy_t / runs * 1e3:>10.1f} "
+            f"{new_t / runs * 1e3:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
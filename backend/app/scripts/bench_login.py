@@ -0,0 +1,59 @@
+# Benchmark: password verification throughput against hasher pool size.
+#   python -m app.scripts.bench_login [--logins 200] [--threads 40]
+# "inline" is the old behaviour (Argon2 in the request thread). --threads
+# mimics the API worker threadpool; rejected logins would get a 429.
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.password_hasher import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    pwd_context,
+)
+
+
+def run(hasher: PasswordHasher, hashed: str, logins: int, threads: int):
+    def login(_):
+        start = time.perf_counter()
+        try:
+            ok, _ = hasher.verify_and_update("correct horse", hashed)
+            assert ok
+        except PasswordHasherBusy:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done = sorted(t for t in latencies if t is not None)
+    p95 = done[int(len(done) * 0.95) - 1] if done else 0.0
+    return len(done) / elapsed, p95, logins - len(done)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("correct horse")
+    sizes = sorted({0, 1, 2, 4, os.cpu_count() or 1})
+    print(f"{os.cpu_count()} CPUs, {args.logins} logins, {args.threads} threads")
+    print(f"{'workers':>8} {'logins/s':>9} {'p95 ms':>8} {'rejected':>9}")
+    for workers in sizes:
+        hasher = PasswordHasher(workers=workers, max_pending=args.max_pending)
+        hasher.start()
+        try:
+            rate, p95, rejected = run(hasher, hashed, args.logins, args.threads)
+        finally:
+            hasher.stop()
+        label = "inline" if workers == 0 else str(workers)
+        print(f"{label:>8} {rate:>9.1f} {p95 * 1000:>8.1f} {rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
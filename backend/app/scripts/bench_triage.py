@@ -0,0 +1,52 @@
+# Benchmark: compiled triage matcher vs. one re.search per pattern.
+#   python -m app.scripts.bench_triage
+import random
+import re
+import string
+import timeit
+
+from app.services.triage_service import RED_FLAG_LEXICON, TriageMatcher
+
+SAMPLE = (
+    "I've had a headache for three days, no chest pain, but some nausea and "
+    "I felt dizzy this morning. My throat is sore and I have a mild fever. "
+) * 4
+
+
+def synthetic_lexicon(size: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    lexicon = {k: list(v) for k, v in RED_FLAG_LEXICON.items()}
+    categories = list(lexicon)
+    while sum(len(v) for v in lexicon.values()) < size:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        lexicon[rng.choice(categories)].append(" ".join(words))
+    return lexicon
+
+
+def naive_scan(patterns, text):
+    t = text.lower()
+    return [p for p in patterns if p.search(t)]
+
+
+def main():
+    print(f"{'terms':>7} {'naive us':>10} {'compiled us':>12}")
+    for size in (50, 250, 1000, 2500, 5000):
+        lexicon = synthetic_lexicon(size)
+        terms = [t for v in lexicon.values() for t in v]
+        naive = [re.compile(r"\b" + re.escape(t) + r"\b") for t in terms]
+        matcher = TriageMatcher(lexicon)
+
+        runs = 200
+        naive_t = timeit.timeit(lambda: naive_scan(naive, SAMPLE), number=runs)
+        compiled_t = timeit.timeit(lambda: matcher.scan(SAMPLE), number=runs)
+        print(
+            f"{len(terms):>7} {naive_t / runs * 1e6:>10.1f} "
+            f"{compiled_t / runs * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Builds data/zip_centroids.bin from the Census ZCTA Gazetteer (public domain).
+#   https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+#   python -m app.scripts.build_zip_centroids 2023_Gaz_zcta_national.zip [--out PATH]
+# Accepts the .zip as downloaded or the extracted .txt. Centroids are the
+# Census internal points (INTPTLAT/INTPTLONG) of each ZIP Code Tabulation Area.
+import argparse
+import csv
+import io
+import os
+import zipfile
+
+from app.services.zip_centroids import ZIP_CENTROIDS_PATH, write_table
+
+
+def open_gazetteer(path: str):
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        name = next(n for n in archive.namelist() if n.endswith(".txt"))
+        return io.TextIOWrapper(archive.open(name), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_centroids(path: str):
+    centroids = {}
+    with open_gazetteer(path) as f:
+        reader = csv.reader(f, delimiter="\t")
+        # The last header name carries trailing whitespace in some vintages
+        header = [name.strip() for name in next(reader)]
+        geoid = header.index("GEOID")
+        lat, lng = header.index("INTPTLAT"), header.index("INTPTLONG")
+        for row in reader:
+            if row:
+                centroids[row[geoid].strip()] = (
+                    float(row[lat]),
+                    float(row[lng]),
+                )
+    return centroids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("gazetteer", help="Census ZCTA Gazetteer .zip or .txt")
+    parser.add_argument("--out", default=ZIP_CENTROIDS_PATH)
+    args = parser.parse_args()
+
+    centroids = read_centroids(args.gazetteer)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    count = write_table(args.out, centroids)
+    print(f"Wrote {count} ZIP centroids to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Load provider_directory from the NPPES NPI registry dump (public domain).
+#   https://download.cms.gov/nppes/NPI_Files.html
+#   python -m app.scripts.import_nppes npidata_pfile_20050523-20261012.csv [--states FL,GA]
+# Keeps active providers whose primary taxonomy maps to a specialty in
+# SPECIALTY_TAXONOMIES and places them at their practice ZIP's centroid, so
+# the ZIP centroid table (build_zip_centroids) must exist first. Re-running
+# upserts by NPI; providers deactivated since the last run are removed.
+import argparse
+import csv
+import sys
+
+from sqlalchemy import text
+
+from app.database.database import engine
+from app.services.provider_directory import TAXONOMY_SPECIALTY
+from app.services.zip_centroids import ZipCentroids
+
+BATCH_SIZE = 5000
+TAXONOMY_SLOTS = 15
+
+UPSERT_SQL = text("""
+    INSERT INTO provider_directory (
+        npi, name, specialty, taxonomy_code, address, city, state, zipcode,
+        phone, latitude, longitude, updated_at
+    ) VALUES (
+        :npi, :name, :specialty, :taxonomy_code, :address, :city, :state,
+        :zipcode, :phone, :latitude, :longitude, now()
+    )
+    ON CONFLICT (npi) DO UPDATE SET
+        name = EXCLUDED.name,
+        specialty = EXCLUDED.specialty,
+        taxonomy_code = EXCLUDED.taxonomy_code,
+        address = EXCLUDED.address,
+        city = EXCLUDED.city,
+        state = EXCLUDED.state,
+        zipcode = EXCLUDED.zipcode,
+        phone = EXCLUDED.phone,
+        latitude = EXCLUDED.latitude,
+        longitude = EXCLUDED.longitude,
+        updated_at = now()
+""")
+DELETE_SQL = text("DELETE FROM provider_directory WHERE npi = ANY(:npis)")
+
+
+def primary_taxonomy(row):
+    """The taxonomy flagged primary, else the first one listed."""
+    codes = []
+    for i in range(1, TAXONOMY_SLOTS + 1):
+        code = row.get(f"Healthcare Provider Taxonomy Code_{i}", "").strip()
+        if not code:
+            continue
+        if row.get(f"Healthcare Provider Primary Taxonomy Switch_{i}") == "Y":
+            return code
+        codes.append(code)
+    return codes[0] if codes else None
+
+
+def provider_name(row):
+    if row["Entity Type Code"] == "2":
+        return row["Provider Organization Name (Legal Business Name)"].strip()
+    parts = [
+        row["Provider First Name"],
+        row["Provider Last Name (Legal Name)"],
+    ]
+    name = " ".join(p.strip().title() for p in parts if p.strip())
+    credential = row["Provider Credential Text"].strip()
+    return f"{name}, {credential}" if credential else name
+
+
+def read_providers(path, centroids, states):
+    """Yields (npi, record) with record None for providers to remove."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            npi = row["NPI"]
+            if row.get("NPI Deactivation Date") and not row.get(
+                "NPI Reactivation Date"
+            ):
+                yield npi, None
+                continue
+            state = row["Provider Business Practice Location Address State Name"]
+            if states and state not in states:
+                continue
+            taxonomy = primary_taxonomy(row)
+            specialty = TAXONOMY_SPECIALTY.get(taxonomy)
+            if specialty is None:
+                continue
+            zipcode = row["Provider Business Practice Location Address Postal Code"][
+                :5
+            ]
+            point = centroids.lookup(zipcode)
+            if point is None:
+                continue
+            yield npi, {
+                "npi": npi,
+                "name": provider_name(row)[:255],
+                "specialty": specialty,
+                "taxonomy_code": taxonomy,
+                "address": row[
+                    "Provider First Line Business Practice Location Address"
+                ].title()[:255],
+                "city": row[
+                    "Provider Business Practice Location Address City Name"
+                ].title()[:100],
+                "state": state[:2] or None,
+                "zipcode": zipcode,
+                "phone": row[
+                    "Provider Business Practice Location Address Telephone Number"
+                ][:20]
+                or None,
+                "latitude": point[0],
+                "longitude": point[1],
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import NPPES into provider_directory")
+    parser.add_argument("csv", help="npidata_pfile_*.csv from the NPPES download")
+    parser.add_argument("--states", default="", help="e.g. FL,GA (default: all)")
+    args = parser.parse_args()
+    states = {s.strip().upper() for s in args.states.split(",") if s.strip()}
+
+    centroids = ZipCentroids()
+    if not centroids.load():
+        sys.exit("ZIP centroid table missing; run app.scripts.build_zip_centroids")
+
+    upserts, deletes = [], []
+    imported = removed = 0
+    with engine.begin() as conn:
+        for npi, record in read_providers(args.csv, centroids, states):
+            if record is None:
+                deletes.append(npi)
+            else:
+                upserts.append(record)
+            if len(upserts) >= BATCH_SIZE:
+                conn.execute(UPSERT_SQL, upserts)
+                imported += len(upserts)
+                upserts = []
+                print(f"  {imported} providers imported")
+            if len(deletes) >= BATCH_SIZE:
+                removed += conn.execute(DELETE_SQL, {"npis": deletes}).rowcount
+                deletes = []
+        if upserts:
+            conn.execute(UPSERT_SQL, upserts)
+            imported += len(upserts)
+        if deletes:
+            removed += conn.execute(DELETE_SQL, {"npis": deletes}).rowcount
+        conn.execute(text("ANALYZE provider_directory"))
+
+    print(f"Imported {imported} providers, removed {removed} deactivated")
+
+
+if __name__ == "__main__":
+    main()
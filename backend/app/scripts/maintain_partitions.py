@@ -0,0 +1,28 @@
+# Create upcoming monthly partitions and archive expired ones. Run daily.
+#   python -m app.scripts.maintain_partitions [--archive] [--months-ahead N]
+import argparse
+
+from app.database.partitions import (
+    ensure_partitions,
+    archive_old_partitions,
+    PARTITION_MONTHS_AHEAD,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain time partitions")
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="detach, export and drop partitions past *_RETENTION_MONTHS",
+    )
+    args = parser.parse_args()
+
+    ensure_partitions(args.months_ahead)
+    if args.archive:
+        archive_old_partitions()
+
+
+if __name__ == "__main__":
+    main()
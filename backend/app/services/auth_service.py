@@ -2,33 +2,44 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import ExpiredSignatureError, JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 import os
+import logging
+import time
 from dotenv import load_dotenv
 from app.database.database import get_db
+from app.services.cache import ExpiringLRUCache
+from app.services.password_hasher import password_hasher
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is required")
 
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Verified tokens are remembered until their exp; users for a short TTL
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+token_cache = ExpiringLRUCache(TOKEN_CACHE_SIZE)
+user_cache = ExpiringLRUCache(USER_CACHE_SIZE)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -44,19 +55,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token_service(token: str) -> dict | None:
     """Verify JWT token and return payload"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if isinstance(payload.get("exp"), (int, float)):
+            token_cache.set(token, payload, payload["exp"])
         return payload
     except ExpiredSignatureError:
-        print("Token has expired")
+        logger.debug("Token has expired")
         return None
     except JWTError as e:
-        print(f"❌ Token verification failed: {e}")
+        logger.warning("Token verification failed: %s", e)
+        return None
+
+
+def invalidate_user(user_id: int):
+    """Drop a cached user. Every write to a users row must call this, or
+    get_current_user serves the old row for up to USER_CACHE_TTL."""
+    user_cache.pop(user_id)
+
+
+def _cached_user(user_id: int):
+    from app.database.models import User
+
+    values = user_cache.get(user_id)
+    if values is None:
         return None
+    # Fresh detached instance per request, so nothing is shared across sessions
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def _cache_user(user):
+    columns = [c.key for c in user.__mapper__.column_attrs]
+    values = {key: getattr(user, key) for key in columns if key != "hashed_password"}
+    user_cache.set(user.id, values, time.time() + USER_CACHE_TTL)
 
 
 def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
 ):
     from app.database.models import User
 
@@ -66,7 +108,10 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = verify_token_service(token)
+    # authenticate_request has usually verified this token already
+    payload = getattr(request.state, "token_payload", None)
+    if payload is None or getattr(request.state, "token", None) != token:
+        payload = verify_token_service(token)
     if not payload:
         raise credentials_exception
 
@@ -76,16 +121,24 @@ def get_current_user(
     if username is None:
         raise credentials_exception
 
+    if user_id:
+        user = _cached_user(user_id)
+        if user is not None:
+            return user
+
     user = None
     if user_id:
         user = db.query(User).filter(User.id == user_id).first()
-        print(f"Looking for user by username: {username}, found: {user is not None}")
+        logger.debug("Looking up user by id: %s, found: %s", user_id, user is not None)
     if not user and username:
         user = db.query(User).filter(User.username == username).first()
-        print(f"Looking for user by username: {username}, found: {user is not None}")
+        logger.debug(
+            "Looking up user by username: %s, found: %s", username, user is not None
+        )
     if user is None:
         raise credentials_exception
 
+    _cache_user(user)
     return user
 
 
@@ -98,10 +151,19 @@ def authenticate_user(db, username: str, password: str):
         .first()
     )
     if not user:
-        print(f"❌ User not found with username/email: {username}")
+        logger.info("User not found with username/email: %s", username)
         return False
-    if not verify_password(password, user.hashed_password):
-        print(f"❌ Password incorrect for user: {user.username}")
+    verified, new_hash = password_hasher.verify_and_update(
+        password, user.hashed_password
+    )
+    if not verified:
+        logger.info("Password incorrect for user: %s", user.username)
         return False
-    print(f"✅ Authentication successful for user: {user.username}")
+    if new_hash:
+        # pwd_context parameters changed since this hash was made
+        user.hashed_password = new_hash
+        db.commit()
+        invalidate_user(user.id)
+        logger.info("Rehashed password for user: %s", user.username)
+    logger.info("Authentication successful for user: %s", user.username)
     return user
@@ -1,49 +1,202 @@
 # app/services/chat_service.py
-from sqlalchemy.orm import Session
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import re
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.database.models import ChatSession, ChatMessage
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+
+# Splits free-text symptom lists: "headache, fever and nausea"
+_TERM_SPLIT = re.compile(r"\s*(?:,|;|/|\band\b)\s*")
+
+# Pagination cursors are signed so clients can only send back keys we issued
+CURSOR_SECRET = os.getenv("SECRET_KEY", "").encode()
+
+
+def _cursor_signature(raw: str) -> str:
+    return hmac.new(CURSOR_SECRET, raw.encode(), hashlib.sha256).hexdigest()[:16]
 
 
 class ChatService:
+    """Chat persistence on the async session (see get_async_db)."""
+
     @staticmethod
-    def create_session(
-        db: Session, user_id: int, context_data: Optional[Dict] = None
+    async def create_session(
+        db: AsyncSession, user_id: int, context_data: Optional[Dict] = None
     ) -> ChatSession:
         """Create a new chat session"""
         session = ChatSession(user_id=user_id, context_data=context_data or {})
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
         return session
 
     @staticmethod
-    def get_session(
-        db: Session, session_id: int, user_id: int
+    async def get_session(
+        db: AsyncSession, session_id: int, user_id: int
     ) -> Optional[ChatSession]:
         """Get a specific session that belongs to a user"""
-        return (
-            db.query(ChatSession)
-            .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
-            .first()
+        result = await db.execute(
+            select(ChatSession).filter(
+                ChatSession.id == session_id, ChatSession.user_id == user_id
+            )
         )
+        return result.scalars().first()
 
     @staticmethod
-    def get_user_sessions(
-        db: Session, user_id: int, limit: int = 10
+    async def get_user_sessions(
+        db: AsyncSession, user_id: int, limit: int = 10
     ) -> List[ChatSession]:
         """Get all sessions for a user, most recent first"""
-        return (
-            db.query(ChatSession)
+        # Messages are loaded up front: lazy loads aren't possible under async
+        result = await db.execute(
+            select(ChatSession)
             .filter(ChatSession.user_id == user_id)
             .order_by(ChatSession.updated_at.desc())
             .limit(limit)
-            .all()
+            .options(selectinload(ChatSession.messages))
         )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def symptom_terms(context_updates: Dict) -> List[str]:
+        """Normalized symptom terms from a context update's free-text
+        "symptoms" / "symptom" values ("Headache and fever" -> headache, fever).
+        Migration 0005 applies the same split to existing rows."""
+        terms = []
+        for key in ("symptoms", "symptom"):
+            value = context_updates.get(key)
+            values = value if isinstance(value, list) else [value]
+            for v in values:
+                if isinstance(v, str):
+                    terms.extend(_TERM_SPLIT.split(v.lower()))
+        return sorted({t.strip() for t in terms if t.strip()})
+
+    @staticmethod
+    def _context_merge(context_updates: Dict, params: Dict) -> str:
+        """SET clause merging `context_updates` into context_data server-side
+        with jsonb ||, keeping symptom_terms as the union of old and new
+        terms so it stays searchable through the GIN index."""
+        params["context"] = json.dumps(context_updates)
+        merged = "COALESCE(context_data, '{}'::jsonb) || CAST(:context AS jsonb)"
+        terms = ChatService.symptom_terms(context_updates)
+        if not terms:
+            return f"context_data = {merged}"
+        params["symptom_terms"] = json.dumps(terms)
+        return f"""context_data = {merged} || jsonb_build_object(
+                    'symptom_terms',
+                    (
+                        SELECT jsonb_agg(DISTINCT term ORDER BY term)
+                        FROM jsonb_array_elements_text(
+                            COALESCE(context_data->'symptom_terms', '[]'::jsonb)
+                            || CAST(:symptom_terms AS jsonb)
+                        ) AS term
+                    )
+                )"""
+
+    @staticmethod
+    async def find_sessions_mentioning(
+        db: AsyncSession, user_id: int, symptom: str, limit: int = 10
+    ) -> List[ChatSession]:
+        """A user's sessions whose context mentions `symptom`, most recent
+        first. Uses the GIN index on context_data via @> containment."""
+        terms = ChatService.symptom_terms({"symptom": symptom})
+        if not terms:
+            return []
+        result = await db.execute(
+            select(ChatSession)
+            .filter(
+                ChatSession.user_id == user_id,
+                ChatSession.context_data.contains({"symptom_terms": terms}),
+            )
+            .order_by(ChatSession.updated_at.desc())
+            .limit(limit)
+            .options(selectinload(ChatSession.messages))
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def save_turn(
+        db: AsyncSession,
+        session_id: int,
+        messages: List[Dict],
+        context_updates: Optional[Dict] = None,
+    ) -> List[ChatMessage]:
+        """Persist a conversation turn in one statement and one commit.
+
+        `messages` are dicts with role and content, plus optional
+        message_type, message_metadata and timestamp. One data-modifying CTE
+        inserts every message, bumps the session's updated_at and merges
+        `context_updates` into context_data. Nothing is refreshed: the
+        returned ChatMessage objects are filled from RETURNING.
+        """
+        now = datetime.now()  # Tampa time
+        rows = [
+            {
+                "role": m["role"],
+                "content": m["content"],
+                "message_type": m.get("message_type", "text"),
+                "message_metadata": m.get("message_metadata") or {},
+                "timestamp": m.get("timestamp") or now,
+            }
+            for m in messages
+        ]
+        params = {
+            "session_id": session_id,
+            "now": now,
+            "roles": [r["role"] for r in rows],
+            "contents": [r["content"] for r in rows],
+            "message_types": [r["message_type"] for r in rows],
+            "metadata": [json.dumps(r["message_metadata"]) for r in rows],
+            "timestamps": [r["timestamp"] for r in rows],
+        }
+        context_set = ""
+        if context_updates:
+            context_set = ", " + ChatService._context_merge(context_updates, params)
+
+        query = text(f"""
+            WITH new_messages AS (
+                INSERT INTO chat_messages
+                (session_id, role, content, message_type, message_metadata, timestamp)
+                SELECT CAST(:session_id AS integer), r, c, t, m, ts
+                FROM unnest(
+                    CAST(:roles AS varchar[]),
+                    CAST(:contents AS text[]),
+                    CAST(:message_types AS varchar[]),
+                    CAST(:metadata AS json[]),
+                    CAST(:timestamps AS timestamp[])
+                ) AS u(r, c, t, m, ts)
+                RETURNING id, timestamp
+            ),
+            touched AS (
+                UPDATE chat_sessions
+                SET updated_at = :now{context_set}
+                WHERE id = :session_id
+                RETURNING id
+            )
+            -- ids follow unnest order, so this matches the input order
+            SELECT id, timestamp FROM new_messages ORDER BY id
+        """)
+        result = await db.execute(query, params)
+        returned = result.fetchall()
+        await db.commit()
+
+        saved = []
+        for r, row in zip(rows, returned):
+            r["timestamp"] = row.timestamp
+            saved.append(ChatMessage(session_id=session_id, id=row.id, **r))
+        return saved
 
     @staticmethod
-    def add_message(
-        db: Session,
+    async def add_message(
+        db: AsyncSession,
         session_id: int,
         role: str,
         content: str,
@@ -51,48 +204,116 @@ class ChatService:
         message_metadata: Optional[Dict] = None,
     ) -> ChatMessage:
         """Add a message to a chat session and update the session timestamp"""
-        message = ChatMessage(
-            session_id=session_id,
-            role=role,
-            content=content,
-            message_type=message_type,
-            message_metadata=message_metadata or {},
-        )
-        db.add(message)
+        message = {
+            "role": role,
+            "content": content,
+            "message_type": message_type,
+            "message_metadata": message_metadata,
+        }
+        return (await ChatService.save_turn(db, session_id, [message]))[0]
 
-        # Update session timestamp
-        session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-        if session:
-            session.updated_at = datetime.now()  # Tampa time
+    @staticmethod
+    def encode_cursor(message: ChatMessage) -> str:
+        """Opaque, signed keyset cursor for a message's (timestamp, id)."""
+        raw = f"{message.timestamp.isoformat()}|{message.id}"
+        signed = f"{raw}|{_cursor_signature(raw)}"
+        return base64.urlsafe_b64encode(signed.encode()).decode()
 
-        db.commit()
-        db.refresh(message)
-        return message
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Inverse of encode_cursor. Raises ValueError on a malformed or
+        tampered cursor."""
+        try:
+            signed = base64.urlsafe_b64decode(cursor.encode()).decode()
+            raw, signature = signed.rsplit("|", 1)
+        except (binascii.Error, UnicodeError, ValueError) as e:
+            raise ValueError("invalid cursor") from e
+        expected = _cursor_signature(raw)
+        if not hmac.compare_digest(signature.encode(), expected.encode()):
+            raise ValueError("invalid cursor")
+        timestamp, message_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(message_id)
 
     @staticmethod
-    def get_session_messages(
-        db: Session, session_id: int, limit: int = 50
+    async def get_messages_page(
+        db: AsyncSession,
+        session_id: int,
+        limit: int = 50,
+        before: Optional[Tuple[datetime, int]] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        since: Optional[datetime] = None,
+    ) -> Tuple[List[ChatMessage], bool, bool]:
+        """Keyset page of a session's messages on (timestamp, id).
+
+        With no cursor this is the latest `limit` messages. `before` pages
+        towards older messages, `after` towards newer ones. Each page is one
+        range scan on ix_chat_messages_session_timestamp_id, so cost doesn't
+        grow with the page's position. Messages come back oldest first, with
+        flags saying whether older / newer messages exist.
+        """
+        key = tuple_(ChatMessage.timestamp, ChatMessage.id)
+        query = select(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if since is not None:
+            # Lets Postgres prune chat_messages partitions older than `since`
+            query = query.filter(ChatMessage.timestamp >= since)
+
+        if after is not None:
+            query = query.filter(key > tuple_(*after)).order_by(
+                ChatMessage.timestamp.asc(), ChatMessage.id.asc()
+            )
+        else:
+            if before is not None:
+                query = query.filter(key < tuple_(*before))
+            query = query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+
+        # One extra row tells us whether there is another page
+        result = await db.execute(query.limit(limit + 1))
+        messages = list(result.scalars().all())
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+
+        if after is not None:
+            return messages, True, has_more
+        messages.reverse()
+        return messages, has_more, before is not None
+
+    @staticmethod
+    async def get_session_messages(
+        db: AsyncSession,
+        session_id: int,
+        limit: int = 50,
+        since: Optional[datetime] = None,
     ) -> List[ChatMessage]:
-        """Get all messages from a session, oldest first"""
-        return (
-            db.query(ChatMessage)
-            .filter(ChatMessage.session_id == session_id)
-            .order_by(ChatMessage.timestamp.asc())
-            .limit(limit)
-            .all()
+        """Get the latest `limit` messages of a session, oldest first.
+
+        Used to build prompts, so long sessions keep their most recent turns.
+        Pass the session's created_at as `since` so Postgres only scans the
+        monthly chat_messages partitions from that point on.
+        """
+        messages, _, _ = await ChatService.get_messages_page(
+            db, session_id, limit=limit, since=since
         )
+        return messages
 
     @staticmethod
-    def update_session_context(
-        db: Session, session_id: int, context_updates: Dict
-    ) -> ChatSession:
-        """Update the context data for a session (like storing extracted symptoms)"""
-        session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-        if session:
-            if session.context_data is None:
-                session.context_data = {}
-            session.context_data.update(context_updates)
-            session.updated_at = datetime.now()  # Tampa time
-            db.commit()
-            db.refresh(session)
-        return session
+    async def update_session_context(
+        db: AsyncSession, session_id: int, context_updates: Dict
+    ) -> Optional[Dict]:
+        """Merge updates into a session's context data (like storing extracted
+        symptoms) server-side. Returns the merged context, or None if the
+        session doesn't exist."""
+        params = {"session_id": session_id, "now": datetime.now()}  # Tampa time
+        merge = ChatService._context_merge(context_updates, params)
+        result = await db.execute(
+            text(f"""
+                UPDATE chat_sessions
+                SET {merge},
+                    updated_at = :now
+                WHERE id = :session_id
+                RETURNING context_data
+            """),
+            params,
+        )
+        context = result.scalar()
+        await db.commit()
+        return context
@@ -48,7 +48,7 @@ class ConversationalAIService:
             {"role": "user", "content": conversation_text},
         ]
 
-        return require_json_with_retry(message)
+        return require_json_with_retry(message, task="classify")
 
     @staticmethod
     def generate_conversational_response(
@@ -103,7 +103,7 @@ class ConversationalAIService:
             {"role": "user", "content": user_prompt},
         ]
 
-        return require_json_with_retry(message)  # Pass the function, not the list
+        return require_json_with_retry(message, task="chat")
 
     @staticmethod
     def extract_medical_context_from_conversation(
@@ -135,4 +135,4 @@ class ConversationalAIService:
             {"role": "user", "content": conversation_text},
         ]
 
-        return require_json_with_retry(message)  # Pass the function, not the list
+        return require_json_with_retry(message, task="classify")
@@ -1,13 +1,17 @@
 # services/fhir_service.py - UPDATED VERSION (Real FHIR + Mock Zipcode)
+import logging
 import requests
 import os
 from typing import Optional, Dict, List
 from datetime import datetime
 import dateutil.parser
 import re
+from app.services.single_flight import single_flight
 
 FHIR_BASE_URL = os.getenv("FHIR_BASE_URL", "https://hapi.fhir.org/baseR4")
 
+logger = logging.getLogger(__name__)
+
 
 class FHIRService:
     @staticmethod
@@ -26,6 +30,7 @@ class FHIRService:
             return str(e)
 
     @staticmethod
+    @single_flight("fhir_patient_profile")
     def get_patient_profile(patient_id: str) -> Optional[Dict]:
         """Get comprehensive patient profile for display with REAL FHIR data but mock zipcode"""
         # Always use real FHIR data, but fallback to mock if needed
@@ -35,7 +40,9 @@ class FHIRService:
                 f"{FHIR_BASE_URL}/Patient/{patient_id}", timeout=10
             )
             if patient_response.status_code != 200:
-                print(f"❌ Patient not found in FHIR: {patient_id}, using mock data")
+                logger.warning(
+                    "Patient not found in FHIR: %s, using mock data", patient_id
+                )
                 return FHIRService._get_mock_patient_data()
 
             patient_data = patient_response.json()
@@ -75,16 +82,17 @@ class FHIRService:
                 "zipcode": "33620",  # ALWAYS USE MOCK ZIPCODE
             }
 
-            print(f"✅ REAL FHIR data fetched for patient: {profile['name']}")
-            print(f"   💊 Medications: {len(profile['active_medications'])}")
-            print(f"   🩺 Conditions: {len(profile['medical_conditions'])}")
-            print(f"   📍 Zipcode: {profile['zipcode']} (mock)")
+            logger.info(
+                "FHIR data fetched for patient %s: %d medications, %d conditions",
+                patient_id,
+                len(profile["active_medications"]),
+                len(profile["medical_conditions"]),
+            )
             return profile
 
         except Exception as e:
-            print(f"❌ FHIR API error: {e}")
             # Fallback to mock data
-            print("🔄 Falling back to mock data due to FHIR error")
+            logger.error("FHIR API error, falling back to mock data: %s", e)
             return FHIRService._get_mock_patient_data()
 
     @staticmethod
@@ -127,10 +135,11 @@ class FHIRService:
             "zipcode": "33620",  # Mock zipcode for fallback too
         }
 
-        print(f"✅ MOCK EHR data fetched for patient: {mock_profile['name']}")
-        print(f"   💊 Medications: {len(mock_profile['active_medications'])}")
-        print(f"   🩺 Conditions: {len(mock_profile['medical_conditions'])}")
-        print(f"   📍 Zipcode: {mock_profile['zipcode']} (mock)")
+        logger.info(
+            "Mock EHR data used: %d medications, %d conditions",
+            len(mock_profile["active_medications"]),
+            len(mock_profile["medical_conditions"]),
+        )
         return mock_profile
 
     @staticmethod
@@ -254,7 +263,7 @@ class FHIRService:
             return "Prescribed Medication"
 
         except Exception as e:
-            print(f"⚠️ Error extracting medication name: {e}")
+            logger.warning("Error extracting medication name: %s", e)
             return "Prescribed Medication"
 
     @staticmethod
@@ -312,7 +321,7 @@ class FHIRService:
             return "Medical Condition"
 
         except Exception as e:
-            print(f"⚠️ Error extracting condition name: {e}")
+            logger.warning("Error extracting condition name: %s", e)
             return "Medical Condition"
 
     @staticmethod
@@ -382,5 +391,5 @@ class FHIRService:
             return patient_list
 
         except Exception as e:
-            print(f"❌ Error discovering patients: {e}")
+            logger.error("Error discovering patients: %s", e)
             return []
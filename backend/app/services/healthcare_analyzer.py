@@ -1,6 +1,9 @@
 # Create new file: app/services/healthcare_analyzer.py
+import logging
 from app.services.llm_service import require_json_with_retry
 
+logger = logging.getLogger(__name__)
+
 
 def analyze_healthcare_needs(symptoms: str) -> dict:
     """
@@ -38,10 +41,10 @@ def analyze_healthcare_needs(symptoms: str) -> dict:
     ]
 
     try:
-        response = require_json_with_retry(prompt)
+        response = require_json_with_retry(prompt, task="classify")
         return response
     except Exception as e:
-        print(f"❌ LLM healthcare analysis failed: {e}")
+        logger.error("LLM healthcare analysis failed: %s", e)
         return {
             "needed_specialty": "hospital",
             "urgency": "routine",
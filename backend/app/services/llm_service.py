@@ -1,8 +1,12 @@
 import json
+import logging
 import re
 from json_repair import repair_json
 from fastapi import HTTPException
-from app.openrouter_client import chat_completion
+from app.openrouter_client import complete
+from app.services.resilience import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
 
 PATIENT_RX_BLOCK = re.compile(
     r"\b(take|start|increase|decrease)\b.*\b(mg|tablet|capsule|ml)\b", re.I
@@ -59,16 +63,17 @@ def parse_or_repair(raw: str) -> dict:
 #         return parse_or_repair(raw2)
 
 
-def require_json_with_retry(message):
+def require_json_with_retry(message, task="clinical", **completion_args):
+    """Completion for `task` (see TASK_PROFILES) parsed as JSON."""
     try:
-        response_text = chat_completion(message)
+        response_text = complete(message, task=task, **completion_args)
 
         parsed_response = json.loads(response_text)
-        print(f"✅ LLM returned valid JSON")
+        logger.debug("LLM returned valid JSON")
         return parsed_response
     except json.JSONDecodeError:
         # If it's not JSON, try to extract JSON from the response
-        print(f"⚠️ LLM returned non-JSON response, attempting extraction")
+        logger.warning("LLM returned non-JSON response, attempting extraction")
 
         # Look for JSON pattern in the response
         import re
@@ -77,12 +82,15 @@ def require_json_with_retry(message):
         if json_match:
             try:
                 parsed_response = json.loads(json_match.group())
-                print(f"✅ Extracted JSON from response")
+                logger.debug("Extracted JSON from response")
                 return parsed_response
             except json.JSONDecodeError:
                 pass
 
         return {"raw": response_text}
 
+    except DeadlineExceeded:
+        # The route's time budget is spent; let it answer 504
+        raise
     except Exception as e:
         return {"error": str(e)}
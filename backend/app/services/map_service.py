@@ -1,16 +1,70 @@
 # app/services/maps_service.py
+import asyncio
+import logging
 import os
-import requests
+import time
+import httpx
 from typing import List, Optional, Dict, Any
-import math
+from app.services.cache import ExpiringLRUCache
+from app.services.provider_cache import (
+    PROVIDER_CACHE_SIZE,
+    PROVIDER_CACHE_TTL,
+    haversine_km,
+    provider_cache,
+)
+from app.services.provider_directory import provider_directory
+from app.services.zip_centroids import zip_centroids
+
+logger = logging.getLogger(__name__)
+
+MAPS_TIMEOUT = float(os.getenv("MAPS_TIMEOUT", "10"))
+MAPS_MAX_CONNECTIONS = int(os.getenv("MAPS_MAX_CONNECTIONS", "20"))
+
+# Only the Contact fields nearbysearch doesn't already return. Rating,
+# user_ratings_total, geometry and opening_hours.open_now come with each
+# nearbysearch result, so requesting them again only adds to the bill.
+DETAILS_FIELDS = "formatted_phone_number,website"
+# Directory providers already have name, address and phone from NPPES
+FIND_PLACE_FIELDS = "place_id,rating,user_ratings_total"
+
+# NPI -> Find Place candidate ({} when Places has no match)
+place_matches = ExpiringLRUCache(PROVIDER_CACHE_SIZE)
 
 
 class MapsService:
+    """Async Google Places client sharing one pooled httpx connection set.
+
+    Providers come from the local NPPES directory when it covers the area,
+    with Places adding ratings and links. Otherwise a lookup is one
+    nearbysearch and one round of Place Details requests issued concurrently.
+    """
+
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_MAP_API")
         self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=MAPS_TIMEOUT,
+                limits=httpx.Limits(max_connections=MAPS_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    def get_nearby_healthcare_providers(
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.client.get(
+            url, params={"key": self.api_key.strip(), **params}
+        )
+        return response.json()
+
+    async def get_nearby_healthcare_providers(
         self,
         latitude: float,
         longitude: float,
@@ -18,20 +72,40 @@ class MapsService:
         radius: int = 20000,  # Increased to 20km
         max_results: int = 5,
     ) -> List[Dict[str, Any]]:
-        # Debug the actual parameters received
-        print(f"🔧 DEBUG: radius parameter received: {radius}")
-        print(
-            f"🔧 DEBUG: all params - lat:{latitude}, lng:{longitude}, type:{provider_type}, radius:{radius}, max_results:{max_results}"
+        providers = await provider_directory.nearest(
+            latitude, longitude, provider_type, max_results, radius / 1000
         )
-
-        print(f"🔑 API Key being used: {self.api_key}")
-        print(f"🔑 API Key length: {len(self.api_key) if self.api_key else 'None'}")
+        if providers:
+            logger.info(
+                "Found %d %r providers in the directory", len(providers), provider_type
+            )
+            if self.api_key:
+                await asyncio.gather(
+                    *(
+                        self._match_place(provider, latitude, longitude, radius)
+                        for provider in providers
+                    )
+                )
+            return providers
 
         if not self.api_key:
-            print("❌ GOOGLE_MAP_API environment variable is not set on Render!")
+            logger.error("GOOGLE_MAP_API environment variable is not set")
             return []
+        cached = provider_cache.get(
+            latitude, longitude, provider_type, radius, max_results
+        )
+        if cached is not None:
+            logger.info("Provider cache hit for %r", provider_type)
+            return cached
         try:
-            print(f"🔍 Searching for '{provider_type}' at {latitude},{longitude}")
+            logger.debug(
+                "Searching for %r at %s,%s (radius=%s, max_results=%s)",
+                provider_type,
+                latitude,
+                longitude,
+                radius,
+                max_results,
+            )
 
             # Better specialty mappings for Google Places
             specialty_mappings = {
@@ -47,199 +121,168 @@ class MapsService:
             }
 
             search_keyword = specialty_mappings.get(provider_type, provider_type)
-
-            # Try multiple search strategies
             search_url = f"{self.base_url}/nearbysearch/json"
+            location = f"{latitude},{longitude}"
 
-            # Strategy 1: Health type with broader search
-            params = {
-                "key": self.api_key.strip(),  # Strip any whitespace/newlines from API key
-                "location": f"{latitude},{longitude}",
-                "radius": radius,
-                "type": "doctor",
-                "keyword": search_keyword,
-            }
-
-            print(
-                f"🔍 Search params: type=doctor, keyword={search_keyword}, radius={radius}"
-            )
-            print(f"🔍 EXACT REQUEST URL: {search_url}")
-            print(f"🔍 EXACT PARAMS: location={latitude},{longitude}, radius={radius}")
-
-            response = requests.get(search_url, params=params, timeout=10)
-            data = response.json()
-
-            print(f"🔍 Raw API response status: {data.get('status')}")
-            if data.get("results"):
-                print(f"🔍 Raw results count: {len(data['results'])}")
-                for i, place in enumerate(data["results"][:3]):
-                    print(
-                        f"   {i + 1}. {place.get('name')} - types: {place.get('types')}"
-                    )
-            else:
-                print("🔍 No raw results found")
-
-            print(
-                f"📋 API Status: {data.get('status')}, Results: {len(data.get('results', []))}"
-            )
-
-            # If no results, try doctor type
-            if data.get("status") == "ZERO_RESULTS":
-                print("🔄 Trying fallback with type=doctor...")
-                params_fallback = {
-                    "key": self.api_key.strip(),
-                    "location": f"{latitude},{longitude}",
+            logger.debug("Search params: type=doctor, keyword=%s", search_keyword)
+            data = await self._get_json(
+                search_url,
+                {
+                    "location": location,
                     "radius": radius,
                     "type": "doctor",
                     "keyword": search_keyword,
-                }
-                response_fallback = requests.get(
-                    search_url, params=params_fallback, timeout=10
-                )
-                data_fallback = response_fallback.json()
-                print(
-                    f"📋 Fallback Status: {data_fallback.get('status')}, Results: {len(data_fallback.get('results', []))}"
-                )
-                data = data_fallback
+                },
+            )
+            logger.info(
+                "Places search status %s, %d results",
+                data.get("status"),
+                len(data.get("results", [])),
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, place in enumerate(data.get("results", [])[:3]):
+                    logger.debug(
+                        "  %d. %s - types: %s",
+                        i + 1,
+                        place.get("name"),
+                        place.get("types"),
+                    )
 
-            # If still no results, try hospital type for emergencies
+            # If no results, try hospital type for emergencies
             if data.get("status") == "ZERO_RESULTS" and provider_type == "hospital":
-                print("🔄 Trying hospital search...")
-                params_hospital = {
-                    "key": self.api_key.strip(),
-                    "location": f"{latitude},{longitude}",
-                    "radius": radius,
-                    "type": "hospital",
-                }
-                response_hospital = requests.get(
-                    search_url, params=params_hospital, timeout=10
+                logger.info("Trying hospital search")
+                data = await self._get_json(
+                    search_url,
+                    {"location": location, "radius": radius, "type": "hospital"},
                 )
-                data = response_hospital.json()
-                print(
-                    f"📋 Hospital Status: {data.get('status')}, Results: {len(data.get('results', []))}"
+                logger.info(
+                    "Hospital search status %s, %d results",
+                    data.get("status"),
+                    len(data.get("results", [])),
                 )
 
             if data.get("status") != "OK":
-                print(f"⚠️ Google Places API error: {data.get('status')}")
+                logger.warning("Google Places API error: %s", data.get("status"))
                 return []
 
-            places = data.get("results", [])[:max_results]
-
-            # Filter for relevant providers based on name and types
-            relevant_places = places
-
-            print(f"✅ Filtered to {len(relevant_places)} relevant providers")
-
-            # Enrich results
-            enriched_places = []
-            for place in relevant_places:
-                enriched_place = self._enrich_place_details(place, latitude, longitude)
-                if enriched_place:
-                    enriched_places.append(enriched_place)
+            results = data.get("results", [])
+            places = results[:max_results]
+            points = [self._place_point(place) for place in places]
+            distances = haversine_km(latitude, longitude, points)
 
+            # All details requests go out at once instead of one after another
+            enriched_places = await asyncio.gather(
+                *(
+                    self._enrich_place_details(place, distance_km)
+                    for place, distance_km in zip(places, distances)
+                )
+            )
+            provider_cache.put(
+                latitude,
+                longitude,
+                provider_type,
+                radius,
+                [
+                    (point, provider)
+                    for point, provider in zip(points, enriched_places)
+                    if point is not None
+                ],
+                complete=len(results) <= max_results,
+            )
             return enriched_places
 
         except Exception as e:
-            print(f"❌ Error fetching healthcare providers: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error fetching healthcare providers: %s", e)
             return []
 
-    def _enrich_place_details(
-        self, place: Dict[str, Any], user_lat: float = None, user_lng: float = None
-    ) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _place_point(place: Dict[str, Any]) -> Optional[tuple[float, float]]:
+        location = place.get("geometry", {}).get("location", {})
+        if "lat" in location and "lng" in location:
+            return location["lat"], location["lng"]
+        return None
+
+    async def _enrich_place_details(
+        self, place: Dict[str, Any], distance_km: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
-        Enrich place with additional details - including distance calculation
+        Enrich place with phone and website from Place Details
         """
+        result = {
+            "name": place.get("name"),
+            "address": place.get("vicinity"),
+            "phone": None,
+            "website": None,
+            "rating": place.get("rating"),
+            "total_ratings": place.get("user_ratings_total"),
+            "open_now": place.get("opening_hours", {}).get("open_now"),
+            "place_id": place.get("place_id"),
+            "types": place.get("types", []),
+            "google_maps_url": f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
+            "distance_km": distance_km,  # Add this field
+        }
         try:
-            # Get place details for additional info
-            details_url = f"{self.base_url}/details/json"
-            params = {
-                "key": self.api_key.strip(),
-                "place_id": place["place_id"],
-                "fields": "formatted_phone_number,website,opening_hours,rating,user_ratings_total,geometry",
-            }
-
-            details_response = requests.get(details_url, params=params, timeout=10)
-            details_data = details_response.json()
+            details_data = await self._get_json(
+                f"{self.base_url}/details/json",
+                {"place_id": place["place_id"], "fields": DETAILS_FIELDS},
+            )
             place_details = details_data.get("result", {})
-
-            # Calculate distance if user coordinates are provided
-            distance_km = None
-            if user_lat is not None and user_lng is not None:
-                place_location = place_details.get("geometry", {}).get("location", {})
-                if (
-                    place_location
-                    and "lat" in place_location
-                    and "lng" in place_location
-                ):
-                    distance_km = self._calculate_distance(
-                        user_lat, user_lng, place_location["lat"], place_location["lng"]
-                    )
-
-            return {
-                "name": place.get("name"),
-                "address": place.get("vicinity"),
-                "phone": place_details.get("formatted_phone_number"),
-                "website": place_details.get("website"),
-                "rating": place_details.get("rating"),
-                "total_ratings": place_details.get("user_ratings_total"),
-                "open_now": place_details.get("opening_hours", {}).get("open_now"),
-                "place_id": place.get("place_id"),
-                "types": place.get("types", []),
-                "google_maps_url": f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
-                "distance_km": distance_km,  # Add this field
-            }
-
+            result["phone"] = place_details.get("formatted_phone_number")
+            result["website"] = place_details.get("website")
         except Exception as e:
-            print(f"❌ Error enriching place details: {e}")
             # Return basic info if details fail
-            result = {
-                "name": place.get("name"),
-                "address": place.get("vicinity"),
-                "place_id": place.get("place_id"),
-                "google_maps_url": f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
-                "distance_km": None,  # Add this field even in error case
-            }
-            return result
+            logger.warning("Error enriching place details: %s", e)
+        return result
 
-    def _calculate_distance(
-        self, lat1: float, lon1: float, lat2: float, lon2: float
-    ) -> float:
-        """
-        Calculate distance between two coordinates in kilometers using Haversine formula
-        """
-        from math import radians, sin, cos, sqrt, atan2
-
-        R = 6371  # Earth's radius in kilometers
-
-        lat1_rad = radians(lat1)
-        lon1_rad = radians(lon1)
-        lat2_rad = radians(lat2)
-        lon2_rad = radians(lon2)
-
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-
-        a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    async def _match_place(
+        self, provider: Dict[str, Any], latitude: float, longitude: float, radius: int
+    ):
+        """Adds the Places rating and link to a directory provider, in place."""
+        match = place_matches.get(provider["npi"])
+        if match is None:
+            try:
+                data = await self._get_json(
+                    f"{self.base_url}/findplacefromtext/json",
+                    {
+                        "input": f"{provider['name']} {provider['address']}",
+                        "inputtype": "textquery",
+                        "fields": FIND_PLACE_FIELDS,
+                        "locationbias": f"circle:{radius}@{latitude},{longitude}",
+                    },
+                )
+            except Exception as e:
+                logger.warning("Error matching provider to a place: %s", e)
+                return
+            candidates = data.get("candidates", [])
+            match = candidates[0] if candidates else {}
+            place_matches.set(provider["npi"], match, time.time() + PROVIDER_CACHE_TTL)
+
+        if match.get("place_id"):
+            provider.update(
+                place_id=match["place_id"],
+                rating=match.get("rating"),
+                total_ratings=match.get("user_ratings_total"),
+                google_maps_url=f"https://www.google.com/maps/place/?q=place_id:{match['place_id']}",
+            )
 
-        distance = R * c
-        return round(distance, 2)
+    async def geocode_zipcode(self, zipcode: str) -> Optional[tuple[float, float]]:
+        """Convert zipcode to coordinates.
 
-    def geocode_zipcode(self, zipcode: str) -> Optional[tuple[float, float]]:
-        """Convert zipcode to coordinates"""
+        Known ZIPs come from the local centroid table; only codes missing
+        from it go to the Geocoding API.
+        """
+        coords = zip_centroids.lookup(zipcode)
+        if coords:
+            return coords
+        if not self.api_key:
+            logger.error("GOOGLE_MAP_API environment variable is not set")
+            return None
+        logger.debug("ZIP %s not in centroid table, geocoding online", zipcode)
         try:
-            url = f"https://maps.googleapis.com/maps/api/geocode/json"
-            params = {
-                "key": self.api_key.strip(),  # Strip any whitespace/newlines
-                "address": zipcode,
-                "components": "country:US",
-            }
-
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            data = await self._get_json(
+                "https://maps.googleapis.com/maps/api/geocode/json",
+                {"address": zipcode, "components": "country:US"},
+            )
 
             if data["status"] == "OK" and data["results"]:
                 location = data["results"][0]["geometry"]["location"]
@@ -247,20 +290,20 @@ class MapsService:
 
             return None
         except Exception as e:
-            print(f"❌ Geocoding failed: {e}")
+            logger.warning("Geocoding failed: %s", e)
             return None
 
-    def get_providers_by_zipcode(
+    async def get_providers_by_zipcode(
         self, zipcode: str, specialty: str, max_results: int = 5
     ):
         """Get providers by zipcode instead of coordinates"""
-        coords = self.geocode_zipcode(zipcode)
+        coords = await self.geocode_zipcode(zipcode)
         if not coords:
-            print(f"❌ Could not geocode zipcode: {zipcode}")
+            logger.warning("Could not geocode zipcode: %s", zipcode)
             return []
 
         lat, lng = coords
-        return self.get_nearby_healthcare_providers(
+        return await self.get_nearby_healthcare_providers(
             lat, lng, specialty, radius=20000, max_results=max_results
         )
 
@@ -0,0 +1,153 @@
+# app/services/password_hasher.py
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# Defaults match passlib's. Hashes made with other parameters verify as usual
+# and are rehashed with these on the user's next login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    # passlib only flags a lower time cost as outdated when min_rounds is set
+    argon2__min_rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+# 0 workers hashes inline in the calling thread (the old behaviour)
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Hashes queued or running before new ones are rejected with a 429
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already waiting; the caller should retry later."""
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def _warm_up():
+    # Loads the argon2 backend so the first real request doesn't pay for it
+    return pwd_context.hash("warm-up")
+
+
+class PasswordHasher:
+    """Runs Argon2 in a small process pool, off the request threads.
+
+    Argon2 is deliberately CPU and memory heavy; doing it in the API worker
+    lets a burst of logins starve every other request. Work beyond
+    `max_pending` outstanding hashes fails fast with PasswordHasherBusy
+    rather than queueing without bound.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        timeout: float = PASSWORD_HASH_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.stats = {"hashed": 0, "verified": 0, "rejected": 0}
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None or self.workers <= 0:
+                return
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            for future in [
+                self._executor.submit(_warm_up) for _ in range(self.workers)
+            ]:
+                future.result()
+        except Exception as e:
+            logger.error("Password hasher pool failed to start, hashing inline: %s", e)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor, self.workers = None, 0
+            return
+        logger.info("Password hasher started (%d processes)", self.workers)
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Password hasher stopped: %s", self.stats)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+    def _run(self, stat: str, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+        future = None
+        try:
+            if self._executor is None and self.workers > 0:
+                self.start()
+            executor = self._executor
+            if executor is None:
+                result = fn(*args)
+            else:
+                future = executor.submit(fn, *args)
+                # The slot is freed when the hash finishes, not when we stop
+                # waiting: a timed-out hash still occupies a worker
+                future.add_done_callback(self._release)
+                try:
+                    result = future.result(self.timeout)
+                except TimeoutError:
+                    future.cancel()
+                    with self._lock:
+                        self.stats["rejected"] += 1
+                    raise PasswordHasherBusy()
+            with self._lock:
+                self.stats[stat] += 1
+            return result
+        finally:
+            if future is None:
+                self._release()
+
+    def hash(self, password: str) -> str:
+        return self._run("hashed", _hash, password)
+
+    def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Returns (matches, new_hash); new_hash is set when `hashed` used
+        outdated parameters and should replace the stored one."""
+        return self._run("verified", _verify_and_update, password, hashed)
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
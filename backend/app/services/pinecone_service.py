@@ -1,5 +1,9 @@
+import logging
 import pinecone
 import os
+from app.services.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
 
 
 class PineconeService:
@@ -13,20 +17,21 @@ class PineconeService:
 
             # Connect to your existing index
             self.index = self.pc.Index(self.index_name)
-            print("✅ Pinecone initialized successfully")
+            logger.info("Pinecone initialized successfully")
 
         except Exception as e:
-            print(f"❌ Pinecone initialization error: {e}")
+            logger.error("Pinecone initialization error: %s", e)
             self.index = None
 
+    @single_flight("pinecone_query")
     def query_medical_knowledge(self, query: str, n_results: int = 5):
         """Query medical knowledge using Pinecone's integrated embeddings"""
         try:
             if not self.index:
-                print("❌ Pinecone index not available")
+                logger.error("Pinecone index not available")
                 return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
 
-            print(f"🔍 Querying Pinecone for: {query}")
+            logger.debug("Querying Pinecone for: %.200s", query)
 
             # Use search() for integrated embeddings
             results = self.index.search(
@@ -45,7 +50,7 @@ class PineconeService:
                 metadatas.append(hit["fields"])
                 distances.append(1 - hit["_score"])  # Convert similarity to distance
 
-            print(f"✅ Found {len(documents)} results in Pinecone")
+            logger.debug("Found %d results in Pinecone", len(documents))
             return {
                 "documents": [documents],
                 "metadatas": [metadatas],
@@ -53,17 +58,17 @@ class PineconeService:
             }
 
         except Exception as e:
-            print(f"❌ Pinecone query error: {e}")
+            logger.error("Pinecone query error: %s", e)
             return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
 
     def store_articles(self, articles):
         """Store PubMed articles in Pinecone using integrated embeddings"""
         try:
             if not self.index:
-                print("❌ Pinecone index not available for storage")
+                logger.error("Pinecone index not available for storage")
                 return False
 
-            print(f"📝 Storing {len(articles)} PubMed articles in Pinecone")
+            logger.info("Storing %d PubMed articles in Pinecone", len(articles))
 
             records = []
             for i, article in enumerate(articles):
@@ -86,19 +91,19 @@ class PineconeService:
                 records.append(record)
 
             if not records:
-                print("❌ No valid articles to store")
+                logger.warning("No valid articles to store")
                 return False
 
-            print(f"🚀 Upserting {len(records)} records to Pinecone...")
+            logger.debug("Upserting %d records to Pinecone", len(records))
 
             # Use upsert_records for integrated embeddings
             self.index.upsert_records("medical-namespace", records)
 
-            print(f"✅ Successfully stored {len(records)} articles in Pinecone")
+            logger.info("Stored %d articles in Pinecone", len(records))
             return True
 
         except Exception as e:
-            print(f"❌ Pinecone storage error: {e}")
+            logger.error("Pinecone storage error: %s", e)
             return False
 
 
@@ -0,0 +1,189 @@
+# app/services/provider_cache.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.services.cache import ExpiringLRUCache
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_CACHE_SIZE = int(os.getenv("PROVIDER_CACHE_SIZE", "5000"))
+# Places listings change slowly; a day keeps results fresh enough
+PROVIDER_CACHE_TTL = float(os.getenv("PROVIDER_CACHE_TTL", "86400"))
+# Geohash length of a cache cell; 5 is roughly 4.9 km x 4.9 km
+PROVIDER_CACHE_PRECISION = int(os.getenv("PROVIDER_CACHE_PRECISION", "5"))
+
+EARTH_RADIUS_KM = 6371
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+Point = Tuple[float, float]
+
+
+def geohash_encode(lat: float, lng: float, precision: int) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lng_min, lng_max) of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def geohash_neighbours(geohash: str) -> List[str]:
+    """The eight cells surrounding `geohash` (fewer at the poles)."""
+    lat_min, lat_max, lng_min, lng_max = geohash_bounds(geohash)
+    height, width = lat_max - lat_min, lng_max - lng_min
+    lat, lng = lat_min + height / 2, lng_min + width / 2
+    cells = []
+    for dlat in (-1, 0, 1):
+        for dlng in (-1, 0, 1):
+            n_lat = lat + dlat * height
+            if (dlat, dlng) == (0, 0) or not -90 < n_lat < 90:
+                continue
+            n_lng = (lng + dlng * width + 180) % 360 - 180
+            cells.append(geohash_encode(n_lat, n_lng, len(geohash)))
+    return cells
+
+
+def haversine_km(
+    lat: float, lng: float, points: Sequence[Optional[Point]]
+) -> List[Optional[float]]:
+    """Distances from (lat, lng) to every point, rounded to 10 m.
+
+    Computed over numpy arrays in one pass. None points give None.
+    """
+    coords = np.array(
+        [(np.nan, np.nan) if point is None else point for point in points],
+        dtype=float,
+    ).reshape(-1, 2)
+    lat_r, lng_r = np.radians(lat), np.radians(lng)
+    p_lat, p_lng = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    a = (
+        np.sin((p_lat - lat_r) / 2) ** 2
+        + np.cos(lat_r) * np.cos(p_lat) * np.sin((p_lng - lng_r) / 2) ** 2
+    )
+    km = np.round(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)), 2)
+    return [None if point is None else float(d) for point, d in zip(points, km)]
+
+
+class ProviderCache:
+    """Places results shared between users in the same area.
+
+    Entries are keyed by (specialty, geohash cell, radius). A lookup reads the
+    user's cell and its eight neighbours, merges their providers and re-ranks
+    them by distance from the user, so anyone near an earlier search reuses it.
+    """
+
+    def __init__(
+        self,
+        max_size: int = PROVIDER_CACHE_SIZE,
+        ttl: float = PROVIDER_CACHE_TTL,
+        precision: int = PROVIDER_CACHE_PRECISION,
+    ):
+        self.ttl = ttl
+        self.precision = precision
+        self._cache = ExpiringLRUCache(max_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, lat: float, lng: float, specialty: str, radius: int, max_results: int
+    ) -> Optional[List[Dict]]:
+        """Up to `max_results` cached providers nearest to (lat, lng), or None
+        when the cache can't answer as well as a fresh search would."""
+        cell = geohash_encode(lat, lng, self.precision)
+        candidates: Dict[str, Tuple[Point, Dict]] = {}
+        exhaustive = False
+        for neighbour in [cell, *geohash_neighbours(cell)]:
+            entry = self._cache.get((specialty, neighbour, radius))
+            if entry is None:
+                continue
+            providers, complete = entry
+            exhaustive = exhaustive or (neighbour == cell and complete)
+            for point, provider in providers:
+                candidates.setdefault(provider["place_id"], (point, provider))
+
+        found = list(candidates.values())
+        distances = haversine_km(lat, lng, [point for point, _ in found])
+        ranked = sorted(
+            (distance, i)
+            for i, distance in enumerate(distances)
+            if distance <= radius / 1000
+        )
+        if not (len(ranked) >= max_results or (exhaustive and ranked)):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return [
+            {**found[i][1], "distance_km": distance}
+            for distance, i in ranked[:max_results]
+        ]
+
+    def put(
+        self,
+        lat: float,
+        lng: float,
+        specialty: str,
+        radius: int,
+        providers: List[Tuple[Point, Dict]],
+        complete: bool,
+    ):
+        """Stores (location, provider) pairs for the cell around (lat, lng).
+
+        `complete` means the search returned everything Google had, so fewer
+        than max_results is still a full answer for this cell.
+        """
+        if not providers:
+            return
+        cell = geohash_encode(lat, lng, self.precision)
+        self._cache.set(
+            (specialty, cell, radius), (providers, complete), time.time() + self.ttl
+        )
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "size": self._cache.stats()["size"],
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Singleton instance
+provider_cache = ProviderCache()
@@ -0,0 +1,123 @@
+# app/services/provider_directory.py
+import logging
+import math
+import os
+from typing import Dict, List
+from urllib.parse import quote_plus
+from sqlalchemy import text
+from app.database.database import AsyncSessionLocal
+from app.services.provider_cache import haversine_km
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_DIRECTORY_ENABLED = (
+    os.getenv("PROVIDER_DIRECTORY_ENABLED", "true").lower() == "true"
+)
+
+# NUCC taxonomy codes imported for each specialty key used by maps_service
+SPECIALTY_TAXONOMIES = {
+    "ophthalmologist": {"207W00000X"},
+    "optometrist": {"152W00000X"},
+    "cardiologist": {"207RC0000X"},
+    "dermatologist": {"207N00000X"},
+    "neurologist": {"2084N0400X"},
+    "gastroenterologist": {"207RG0100X"},
+    "orthopedist": {"207X00000X"},
+    "primary_care": {"207Q00000X", "207R00000X", "208D00000X", "208000000X"},
+    "hospital": {"282N00000X"},
+}
+TAXONOMY_SPECIALTY = {
+    code: specialty
+    for specialty, codes in SPECIALTY_TAXONOMIES.items()
+    for code in codes
+}
+
+KM_PER_DEGREE = 111.32
+
+# Ordered by equirectangular distance, which matches great-circle order at
+# these scales; haversine_km gives the reported distance afterwards
+NEAREST_SQL = text("""
+    SELECT npi, name, address, city, state, zipcode, phone, latitude, longitude
+    FROM provider_directory
+    WHERE specialty = :specialty
+      AND latitude BETWEEN :lat_min AND :lat_max
+      AND longitude BETWEEN :lng_min AND :lng_max
+    ORDER BY power(latitude - :lat, 2)
+        + power((longitude - :lng) * :lng_scale, 2)
+    LIMIT :limit
+""")
+
+
+class ProviderDirectory:
+    """Nearest-provider queries over the imported NPPES directory."""
+
+    @staticmethod
+    async def nearest(
+        latitude: float,
+        longitude: float,
+        specialty: str,
+        max_results: int = 5,
+        radius_km: float = 20.0,
+    ) -> List[Dict]:
+        """Up to `max_results` providers within `radius_km`, nearest first,
+        shaped like MapsService results. Empty when the directory can't
+        answer, so callers fall back to Places."""
+        if not PROVIDER_DIRECTORY_ENABLED or specialty not in SPECIALTY_TAXONOMIES:
+            return []
+
+        lat_delta = radius_km / KM_PER_DEGREE
+        lng_scale = max(math.cos(math.radians(latitude)), 0.01)
+        lng_delta = lat_delta / lng_scale
+        params = {
+            "specialty": specialty,
+            "lat": latitude,
+            "lng": longitude,
+            "lat_min": latitude - lat_delta,
+            "lat_max": latitude + lat_delta,
+            "lng_min": longitude - lng_delta,
+            "lng_max": longitude + lng_delta,
+            "lng_scale": lng_scale,
+            "limit": max_results,
+        }
+        try:
+            async with AsyncSessionLocal(info={"read_only": True}) as db:
+                rows = (await db.execute(NEAREST_SQL, params)).all()
+        except Exception as e:
+            logger.warning("Provider directory lookup failed: %s", e)
+            return []
+
+        distances = haversine_km(
+            latitude, longitude, [(row.latitude, row.longitude) for row in rows]
+        )
+        return [
+            ProviderDirectory._to_provider(row, specialty, distance_km)
+            for row, distance_km in zip(rows, distances)
+            if distance_km <= radius_km
+        ]
+
+    @staticmethod
+    def _to_provider(row, specialty: str, distance_km: float) -> Dict:
+        address = ", ".join(
+            part
+            for part in (row.address, row.city, f"{row.state or ''} {row.zipcode}")
+            if part and part.strip()
+        )
+        return {
+            "name": row.name,
+            "address": address,
+            "phone": row.phone,
+            "website": None,
+            "rating": None,
+            "total_ratings": None,
+            "open_now": None,
+            "place_id": None,
+            "types": [specialty],
+            "google_maps_url": "https://www.google.com/maps/search/?api=1&query="
+            + quote_plus(f"{row.name} {address}"),
+            "distance_km": distance_km,
+            "npi": row.npi,
+        }
+
+
+# Singleton instance
+provider_directory = ProviderDirectory()
@@ -1,9 +1,12 @@
 # pubmed flow
+import logging
 import requests
 import time
 from starlette.requests import cookie_parser
 from bs4 import BeautifulSoup
 
+logger = logging.getLogger(__name__)
+
 # try call api
 PUBMED_BASE_URL_SEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 PUBMED_BASE_URL_FETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
@@ -42,8 +45,7 @@ def get_article_from_pubmed(common_symptoms: list[str]):
             responses = requests.get(PUBMED_BASE_URL_SEARCH, params=param)
             data = responses.json()
 
-            print(f"StatusfCode: {responses.status_code}")
-            print(f"URL: {responses.url}")
+            logger.debug("PubMed search %s: %s", responses.status_code, responses.url)
 
             data = responses.json()
 
@@ -51,11 +53,11 @@ def get_article_from_pubmed(common_symptoms: list[str]):
             all_article_ids.extend(articles_id)
 
             if i < len(common_symptoms) - 1:
-                print("Waiting for one second before next request .. ")
+                logger.debug("Waiting for one second before next request")
                 time.sleep(1)
 
         except Exception as e:
-            print(f"Error {e}")
+            logger.warning("PubMed request failed: %s", e)
             continue
     processed_article = fetch_article_from_ids(all_article_ids)
     return processed_article
@@ -106,7 +108,7 @@ def parse_articles(responses):
                 }
             )
         except Exception as e:
-            print(f"Error {e}")
+            logger.warning("PubMed request failed: %s", e)
             continue
 
     return articles
@@ -131,6 +133,6 @@ def fetch_article_from_ids(all_article_ids):
                 articles.extend(article)
 
         except Exception as e:
-            print(f"Error {e}")
+            logger.warning("PubMed request failed: %s", e)
             continue
     return articles
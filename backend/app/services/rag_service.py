@@ -3,9 +3,12 @@ from app.services.pubmed_service import get_article_from_pubmed
 from app.openrouter_client import extract_medical_keywords
 from app.services.pinecone_service import pinecone_service
 import asyncio
+import logging
 from functools import wraps
 import signal
 
+logger = logging.getLogger(__name__)
+
 
 def timeout(seconds=30):
     def decorator(func):
@@ -16,7 +19,7 @@ def timeout(seconds=30):
                 # but we can add timeout to specific external calls
                 return func(*args, **kwargs)
             except Exception as e:
-                print(f"Timeout error in {func.__name__}: {e}")
+                logger.error("Timeout error in %s: %s", func.__name__, e)
                 return {"error": f"Service timeout: {str(e)}", "articles": []}
 
         return wrapper
@@ -26,7 +29,7 @@ def timeout(seconds=30):
 
 @timeout(30)
 def get_medical_context(symptoms: str, min_results: int = 2):
-    print(f"🔧 Pinecone index available: {pinecone_service.index is not None}")
+    logger.debug("Pinecone index available: %s", pinecone_service.index is not None)
 
     # First try Pinecone
     results = query_medical_knowledge(symptoms, n_results=min_results + 1)
@@ -34,7 +37,7 @@ def get_medical_context(symptoms: str, min_results: int = 2):
     metadatas = results.get("metadatas", [[]])[0]
     distances = results.get("distances", [[]])[0]
     documents_found = len(documents)
-    print(f"Found {documents_found} documents in Pinecone")
+    logger.debug("Found %d documents in Pinecone", documents_found)
 
     if documents_found >= min_results:
         formatted_articles = []
@@ -68,8 +71,9 @@ def get_medical_context(symptoms: str, min_results: int = 2):
             metadatas = results.get("metadatas", [[]])[0]
             distances = results.get("distances", [[]])[0]
             documents_found = len(documents)
-            print(
-                f"Found {documents_found} documents in Pinecone after storing new articles"
+            logger.debug(
+                "Found %d documents in Pinecone after storing new articles",
+                documents_found,
             )
 
             if documents_found >= min_results:
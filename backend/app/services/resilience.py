@@ -0,0 +1,141 @@
+# app/services/resilience.py - circuit breakers, latency tracking, deadlines
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures.
+
+    closed: calls go through; `failure_threshold` consecutive failures open
+    the circuit. open: calls are refused until `reset_timeout` has passed,
+    then one probe is let through (half-open). The probe's outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.probe_started = now
+                return True
+            # A probe that never reported back doesn't hold the circuit forever
+            if self.state == "half_open" and now - self.probe_started >= (
+                self.reset_timeout
+            ):
+                self.probe_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+class LatencyTracker:
+    """Rolling window of recent call durations."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        """None until `min_samples` durations have been recorded."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(len(samples) * pct), len(samples) - 1)]
+
+
+# Default time budget for a route's upstream calls, see with_deadline
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "45"))
+
+# Absolute time.monotonic() by which the current request's upstream calls
+# must finish; set by routes with `deadline()`, read by clients
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the upstream answered."""
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """Bounds every upstream call made inside the block to `seconds` in total.
+
+    Nested deadlines can only shorten the outer one.
+    """
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def with_deadline(seconds: float):
+    """Route decorator: runs the endpoint inside `deadline(seconds)`."""
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with deadline(seconds):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with deadline(seconds):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,122 @@
+# app/services/single_flight.py
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Hashable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# name -> SingleFlight, for /health
+_flights: Dict[str, "SingleFlight"] = {}
+
+
+def fingerprint(*parts) -> str:
+    """Stable key for call arguments (dicts are order-insensitive)."""
+    encoded = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one upstream call.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait and get a copy of its result, or its exception.
+    Nothing is kept once the call returns, so this is not a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0  # upstream calls made
+        self.shared = 0  # calls answered by another caller's upstream call
+
+    def do(self, key: Hashable, fn, *args, **kwargs):
+        return self.share(key, fn, *args, **kwargs)[1].result()
+
+    def share(self, key: Hashable, fn, *args, **kwargs) -> Tuple[bool, Future]:
+        """Like do(), but returns (led, future) once the call has finished.
+
+        `led` is True for the caller that ran `fn`, so side effects that must
+        happen once per upstream call (metrics, circuit breakers) can be
+        left to it. The future holds the result or exception.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.debug("%s: joined in-flight call", self.name)
+            joined = Future()
+            error = future.exception()
+            if error is not None:
+                joined.set_exception(error)
+            else:
+                # Copied so one caller mutating the result can't affect another
+                joined.set_result(copy.deepcopy(future.result()))
+            return False, joined
+
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return True, future
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "calls": self.calls,
+                "saved": self.shared,
+            }
+
+
+def single_flight(name: str, exclude: Iterable[str] = ()):
+    """Decorator: concurrent calls with equal arguments share one execution.
+
+    Arguments are bound to the signature first, so f(x, n=5) and f(x) match;
+    `self` and the parameters named in `exclude` are left out of the key.
+    The leader's values for excluded parameters apply to everyone joining.
+    `wrapper.share(...)` returns (led, future) instead, see SingleFlight.share.
+    """
+    flight = _flights.setdefault(name, SingleFlight(name))
+    excluded = {"self", *exclude}
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k not in excluded}
+            return fingerprint(arguments)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return flight.do(key(args, kwargs), fn, *args, **kwargs)
+
+        def share(*args, **kwargs) -> Tuple[bool, Future]:
+            return flight.share(key(args, kwargs), fn, *args, **kwargs)
+
+        wrapper.flight = flight
+        wrapper.share = share
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> Dict:
+    return {name: flight.stats() for name, flight in _flights.items()}
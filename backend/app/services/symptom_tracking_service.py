@@ -1,14 +1,21 @@
 # services/symptom_tracking_service.py - FIXED DURATION CONSTRAINT
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database.database import get_db
 from app.schemas.schemas import SymptomIntensityCreate
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 from zoneinfo import ZoneInfo
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class SymptomTrackingService:
+    """Writes take a sync Session (they run from the write-behind thread,
+    scripts and sync routes); dashboard reads take an AsyncSession."""
+
     TAMPA_TZ = ZoneInfo("US/Eastern")
 
     @staticmethod
@@ -37,157 +44,199 @@ class SymptomTrackingService:
         db: Session, intensity_data: SymptomIntensityCreate
     ) -> bool:
         """Record symptom intensity for a patient - WITH TIMEZONE HANDLING"""
-        try:
-            duration_minutes = intensity_data.duration_minutes or 1
-            if duration_minutes < 1:
-                duration_minutes = 1
+        stored = SymptomTrackingService.record_symptom_intensities(db, [intensity_data])
+        return stored == 1
 
-            # DEBUG: Check what time we're sending to database
-            current_timestamp = SymptomTrackingService.get_local_time()
-
-            print("🔍 DEBUG - BEFORE DATABASE INSERT:")
-            print(f"  Python datetime.now(): {datetime.now()}")
-            print(f"  Tampa time (get_local_time): {current_timestamp}")
-            print(f"  UTC time: {datetime.now(timezone.utc)}")
-
-            # Insert into symptom_intensity table
+    @staticmethod
+    def record_symptom_intensities(
+        db: Session,
+        intensities: List[SymptomIntensityCreate],
+        recorded_at: Optional[List[datetime]] = None,
+    ) -> int:
+        """Record a batch of symptom intensities in one statement and one commit.
+
+        The raw rows, the monthly symptom_frequency counters and the
+        symptom_daily_rollup aggregates are all written by a single
+        data-modifying CTE, so a batch of N symptoms costs one round trip
+        plus the commit. `recorded_at` carries per-row event times (UTC) for
+        writes that were deferred; it defaults to now. Returns the number of
+        rows stored (0 on failure).
+        """
+        if not intensities:
+            return 0
+        try:
+            if recorded_at is None:
+                recorded_at = [datetime.now(timezone.utc)] * len(intensities)
             query = text("""
-                INSERT INTO symptom_intensity 
-                (user_id, symptom_name, intensity, duration_minutes, notes, created_at)
-                VALUES (:user_id, :symptom_name, :intensity, :duration_minutes, :notes, :created_at)
+                WITH new_rows AS (
+                    INSERT INTO symptom_intensity
+                    (user_id, symptom_name, intensity, duration_minutes, notes, created_at)
+                    SELECT u, s, i, d, n, c
+                    FROM unnest(
+                        CAST(:user_ids AS integer[]),
+                        CAST(:symptom_names AS varchar[]),
+                        CAST(:intensities AS integer[]),
+                        CAST(:durations AS integer[]),
+                        CAST(:notes AS text[]),
+                        CAST(:created_ats AS timestamptz[])
+                    ) AS t(u, s, i, d, n, c)
+                    RETURNING user_id, symptom_name, intensity, duration_minutes,
+                        created_at, (created_at AT TIME ZONE 'US/Eastern') as local_time
+                ),
+                freq AS (
+                    INSERT INTO symptom_frequency
+                    (user_id, symptom_name, month_year, occurrence_count, last_occurrence)
+                    SELECT user_id, symptom_name, date_trunc('month', local_time),
+                           COUNT(*), MAX(created_at)
+                    FROM new_rows
+                    GROUP BY user_id, symptom_name, date_trunc('month', local_time)
+                    ON CONFLICT (user_id, symptom_name, month_year)
+                    DO UPDATE SET
+                        occurrence_count = symptom_frequency.occurrence_count + EXCLUDED.occurrence_count,
+                        last_occurrence = GREATEST(
+                            symptom_frequency.last_occurrence, EXCLUDED.last_occurrence
+                        )
+                ),
+                rollup AS (
+                    INSERT INTO symptom_daily_rollup
+                    (user_id, symptom_name, local_date, event_count, intensity_sum,
+                     intensity_min, intensity_max, duration_sum)
+                    SELECT user_id, symptom_name, DATE(local_time), COUNT(*),
+                           SUM(intensity), MIN(intensity), MAX(intensity),
+                           SUM(duration_minutes)
+                    FROM new_rows
+                    GROUP BY user_id, symptom_name, DATE(local_time)
+                    ON CONFLICT (user_id, symptom_name, local_date)
+                    DO UPDATE SET
+                        event_count = symptom_daily_rollup.event_count + EXCLUDED.event_count,
+                        intensity_sum = symptom_daily_rollup.intensity_sum + EXCLUDED.intensity_sum,
+                        intensity_min = LEAST(symptom_daily_rollup.intensity_min, EXCLUDED.intensity_min),
+                        intensity_max = GREATEST(symptom_daily_rollup.intensity_max, EXCLUDED.intensity_max),
+                        duration_sum = symptom_daily_rollup.duration_sum + EXCLUDED.duration_sum
+                )
+                SELECT COUNT(*) FROM new_rows
             """)
 
-            result = db.execute(
+            stored = db.execute(
                 query,
                 {
-                    "user_id": intensity_data.user_id,
-                    "symptom_name": intensity_data.symptom_name,
-                    "intensity": intensity_data.intensity,
-                    "duration_minutes": duration_minutes,
-                    "notes": intensity_data.notes,
-                    "created_at": datetime.now(timezone.utc),
+                    "user_ids": [i.user_id for i in intensities],
+                    "symptom_names": [i.symptom_name for i in intensities],
+                    "intensities": [i.intensity for i in intensities],
+                    # duration_minutes has a >= 1 constraint
+                    "durations": [max(i.duration_minutes or 1, 1) for i in intensities],
+                    "notes": [i.notes for i in intensities],
+                    "created_ats": list(recorded_at),
                 },
-            )
+            ).scalar()
 
-            # DEBUG: Query back the record we just inserted
-            debug_query = text("""
-                SELECT created_at, created_at AT TIME ZONE 'UTC' as utc_time, 
-                    created_at AT TIME ZONE 'US/Eastern' as tampa_time
-                FROM symptom_intensity 
-                WHERE user_id = :user_id AND symptom_name = :symptom_name
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """)
+            db.commit()
+            logger.info("Stored %d symptom intensities", stored)
+            return stored
 
-            debug_result = db.execute(
-                debug_query,
-                {
-                    "user_id": intensity_data.user_id,
-                    "symptom_name": intensity_data.symptom_name,
-                },
-            )
-            debug_row = debug_result.fetchone()
-
-            print("🔍 DEBUG - AFTER DATABASE INSERT:")
-            if debug_row:
-                print(f"Stored to db: {current_timestamp}")
-                print(f"  Stored created_at: {debug_row.created_at}")
-                print(f"  As UTC: {debug_row.utc_time}")
-                print(f"  As Tampa time: {debug_row.tampa_time}")
-            else:
-                print("  ❌ Could not retrieve inserted record")
-
-            # Update symptom_frequency table
-            current_month = (
-                SymptomTrackingService.get_local_time().date().replace(day=1)
-            )
-            freq_query = text("""
-                INSERT INTO symptom_frequency 
-                (user_id, symptom_name, month_year, occurrence_count, last_occurrence)
-                VALUES (:user_id, :symptom_name, :month_year, 1, :now)
-                ON CONFLICT (user_id, symptom_name, month_year) 
-                DO UPDATE SET 
-                    occurrence_count = symptom_frequency.occurrence_count + 1,
-                    last_occurrence = :now
-            """)
-            db.execute(
-                freq_query,
-                {
-                    "user_id": intensity_data.user_id,
-                    "symptom_name": intensity_data.symptom_name,
-                    "month_year": current_month,
-                    "now": SymptomTrackingService.get_local_time(),
-                },
-            )
+        except Exception as e:
+            db.rollback()
+            logger.error("Error recording symptom intensities: %s", e)
+            return 0
 
-            db.commit()
-            print(
-                f"✅ Stored symptom: {intensity_data.symptom_name} for user {intensity_data.user_id}"
-            )
-            return True
+    @staticmethod
+    def backfill_daily_rollup(db: Session, user_id: Optional[int] = None) -> int:
+        """Rebuild symptom_daily_rollup from raw symptom_intensity rows.
 
+        Recomputes every affected (user, symptom, day) row, so it is safe to
+        re-run. Pass user_id to limit the rebuild to one user.
+        """
+        try:
+            user_filter = "WHERE user_id = :user_id" if user_id is not None else ""
+            params = {"user_id": user_id} if user_id is not None else {}
+            db.execute(text(f"DELETE FROM symptom_daily_rollup {user_filter}"), params)
+            result = db.execute(
+                text(f"""
+                    INSERT INTO symptom_daily_rollup
+                    (user_id, symptom_name, local_date, event_count, intensity_sum,
+                     intensity_min, intensity_max, duration_sum)
+                    SELECT
+                        user_id,
+                        symptom_name,
+                        DATE(created_at AT TIME ZONE 'US/Eastern') as local_date,
+                        COUNT(*),
+                        SUM(intensity),
+                        MIN(intensity),
+                        MAX(intensity),
+                        COALESCE(SUM(duration_minutes), 0)
+                    FROM symptom_intensity
+                    {user_filter}
+                    GROUP BY user_id, symptom_name, local_date
+                """),
+                params,
+            )
+            db.commit()
+            logger.info("Backfilled %d symptom rollup rows", result.rowcount)
+            return result.rowcount
         except Exception as e:
             db.rollback()
-            print(f"❌ Error recording symptom intensity: {e}")
-            return False
+            logger.error("Error backfilling symptom rollup: %s", e)
+            raise
 
     @staticmethod
-    def get_symptom_intensity_history(
-        db: Session, user_id: int, days: int = 30
+    async def get_symptom_intensity_history(
+        db: AsyncSession, user_id: int, days: int = 30
     ) -> List:
         """Get symptom intensity history - FIXED FOR TIMEZONE CONFUSION"""
         try:
             # Calculate start date
             # tampa_now = SymptomTrackingService.get_local_time()
             # start_date = tampa_now - timedelta(days=days)
-            start_date = datetime.now(timezone.utc) - timedelta(days=days)
-            # print(f"🔍 DEBUG - Querying from {start_date.date()} to {tampa_now.date()}")
+            start_date = (
+                SymptomTrackingService.get_local_time() - timedelta(days=days)
+            ).date()
 
-            # FIXED: Since created_at is stored as EST but contains UTC values,
-            # we need to treat it as UTC when converting to Tampa time
+            # Reads the per-day rollup (one row per symptom-day) instead of
+            # grouping raw symptom_intensity events on every dashboard load.
             query = text("""
                 SELECT 
                     symptom_name,
-                    DATE(created_at) as date,  
-                    AVG(intensity) as daily_avg_intensity,
-                    COUNT(*) as daily_occurrences,
-                    AVG(duration_minutes) as avg_duration
-                FROM symptom_intensity 
+                    local_date as date,
+                    intensity_sum::float / event_count as daily_avg_intensity,
+                    event_count as daily_occurrences,
+                    duration_sum::float / event_count as avg_duration,
+                    AVG(intensity_sum::float / event_count)
+                        OVER (PARTITION BY local_date) as day_avg_intensity
+                FROM symptom_daily_rollup 
                 WHERE user_id = :user_id 
-                AND created_at >= :start_date
-                GROUP BY symptom_name, DATE(created_at)  
+                AND local_date >= :start_date
                 ORDER BY date ASC, symptom_name
             """)
 
-            result = db.execute(query, {"user_id": user_id, "start_date": start_date})
+            result = await db.execute(
+                query, {"user_id": user_id, "start_date": start_date}
+            )
             rows = result.fetchall()
 
-            print(f"📊 Fetched {len(rows)} intensity records")
-
-            # Debug the dates found
-            unique_dates = set(row.date for row in rows)
-            print(f"📅 UNIQUE DATES FOUND: {sorted(unique_dates)}")
-
-            for row in rows:
-                print(f"  - {row.date}: {row.symptom_name}")
+            logger.debug(
+                "Fetched %d intensity records over %d dates",
+                len(rows),
+                len({row.date for row in rows}),
+            )
 
             return rows
 
         except Exception as e:
-            print(f"❌ Error fetching symptom history: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error fetching symptom history: %s", e)
             return []
 
     @staticmethod
-    def get_symptom_frequency(db: Session, user_id: int, months: int = 6) -> List:
+    async def get_symptom_frequency(
+        db: AsyncSession, user_id: int, months: int = 6
+    ) -> List:
         """Get symptom frequency for pie chart - WITH TIMEZONE HANDLING"""
         try:
-            # Calculate start month in Tampa time but convert to UTC for query
+            # month_year is a naive Tampa-local month start, so compare it with
+            # a naive local datetime (asyncpg won't mix naive and aware values)
             tampa_now = SymptomTrackingService.get_local_time()
-            start_month = (tampa_now - timedelta(days=30 * months)).replace(day=1)
-            start_month_utc = SymptomTrackingService.local_to_utc(start_month)
+            start_month = (tampa_now - timedelta(days=30 * months)).replace(
+                day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+            )
 
             query = text("""
                 SELECT 
@@ -200,19 +249,21 @@ class SymptomTrackingService:
                 GROUP BY symptom_name
                 ORDER BY total_occurrences DESC
             """)
-            result = db.execute(
-                query, {"user_id": user_id, "start_month": start_month_utc}
+            result = await db.execute(
+                query, {"user_id": user_id, "start_month": start_month}
             )
             rows = result.fetchall()
 
-            print(f"📊 Fetched {len(rows)} frequency records for user {user_id}")
+            logger.debug("Fetched %d frequency records for user %s", len(rows), user_id)
             return rows  # No conversion needed - SQL handled it
         except Exception as e:
-            print(f"❌ Error fetching symptom frequency: {e}")
+            logger.error("Error fetching symptom frequency: %s", e)
             return []
 
     @staticmethod
-    def get_recent_symptoms(db: Session, user_id: int, limit: int = 10) -> List:
+    async def get_recent_symptoms(
+        db: AsyncSession, user_id: int, limit: int = 10
+    ) -> List:
         """Get recent symptoms for timeline view - WITH TIMEZONE HANDLING"""
         try:
             query = text("""
@@ -227,24 +278,24 @@ class SymptomTrackingService:
                 ORDER BY created_at DESC
                 LIMIT :limit
             """)
-            result = db.execute(query, {"user_id": user_id, "limit": limit})
+            result = await db.execute(query, {"user_id": user_id, "limit": limit})
             rows = result.fetchall()
             return rows  # No conversion needed - SQL handled it
         except Exception as e:
-            print(f"❌ Error fetching recent symptoms: {e}")
+            logger.error("Error fetching recent symptoms: %s", e)
             return []
 
     @staticmethod
-    def get_symptom_summary(db: Session, user_id: int) -> dict:
+    async def get_symptom_summary(db: AsyncSession, user_id: int) -> dict:
         """Get overall symptom summary"""
         try:
             # Total symptoms recorded
             total_query = text("""
-                SELECT COUNT(*) as total_count 
-                FROM symptom_intensity 
+                SELECT SUM(event_count) as total_count 
+                FROM symptom_daily_rollup 
                 WHERE user_id = :user_id
             """)
-            total_result = db.execute(total_query, {"user_id": user_id})
+            total_result = await db.execute(total_query, {"user_id": user_id})
             total_count = total_result.scalar() or 0
 
             # Most frequent symptom
@@ -256,19 +307,19 @@ class SymptomTrackingService:
                 ORDER BY total DESC
                 LIMIT 1
             """)
-            freq_result = db.execute(freq_query, {"user_id": user_id})
+            freq_result = await db.execute(freq_query, {"user_id": user_id})
             most_frequent = freq_result.fetchone()
 
             # Highest intensity symptom
             intensity_query = text("""
-                SELECT symptom_name, MAX(intensity) as max_intensity
-                FROM symptom_intensity 
+                SELECT symptom_name, MAX(intensity_max) as max_intensity
+                FROM symptom_daily_rollup 
                 WHERE user_id = :user_id
                 GROUP BY symptom_name
                 ORDER BY max_intensity DESC
                 LIMIT 1
             """)
-            intensity_result = db.execute(intensity_query, {"user_id": user_id})
+            intensity_result = await db.execute(intensity_query, {"user_id": user_id})
             highest_intensity = intensity_result.fetchone()
 
             summary = {
@@ -283,11 +334,11 @@ class SymptomTrackingService:
                 else 0,
             }
 
-            print(f"📊 Summary: {summary}")
+            logger.debug("Summary: %s", summary)
             return summary
 
         except Exception as e:
-            print(f"❌ Error fetching symptom summary: {e}")
+            logger.error("Error fetching symptom summary: %s", e)
             return {
                 "total_symptoms_recorded": 0,
                 "most_frequent_symptom": None,
@@ -297,28 +348,32 @@ class SymptomTrackingService:
             }
 
     @staticmethod
-    def get_symptom_trends(db: Session, user_id: int, period_days: int = 30) -> Dict:
+    async def get_symptom_trends(
+        db: AsyncSession, user_id: int, period_days: int = 30
+    ) -> Dict:
         """Get comprehensive symptom trends for analytics"""
         try:
             # Get intensity history
-            intensity_history = SymptomTrackingService.get_symptom_intensity_history(
-                db, user_id, period_days
+            intensity_history = (
+                await SymptomTrackingService.get_symptom_intensity_history(
+                    db, user_id, period_days
+                )
             )
 
             # Get frequency data
-            frequency_data = SymptomTrackingService.get_symptom_frequency(
+            frequency_data = await SymptomTrackingService.get_symptom_frequency(
                 db,
                 user_id,
                 max(1, period_days // 30),  # Ensure at least 1 month
             )
 
             # Get recent symptoms
-            recent_symptoms = SymptomTrackingService.get_recent_symptoms(
+            recent_symptoms = await SymptomTrackingService.get_recent_symptoms(
                 db, user_id, 20
             )
 
             # Get summary
-            summary = SymptomTrackingService.get_symptom_summary(db, user_id)
+            summary = await SymptomTrackingService.get_symptom_summary(db, user_id)
 
             return {
                 "intensity_history": intensity_history,
@@ -329,11 +384,11 @@ class SymptomTrackingService:
             }
 
         except Exception as e:
-            print(f"❌ Error getting symptom trends: {e}")
+            logger.error("Error getting symptom trends: %s", e)
             return {}
 
     @staticmethod
-    def debug_symptom_data(db: Session, user_id: int, limit: int = 20):
+    async def debug_symptom_data(db: AsyncSession, user_id: int, limit: int = 20):
         """Debug method to see raw symptom data with timestamps"""
         try:
             query = text("""
@@ -349,18 +404,22 @@ class SymptomTrackingService:
                 LIMIT :limit
             """)
 
-            result = db.execute(query, {"user_id": user_id, "limit": limit})
+            result = await db.execute(query, {"user_id": user_id, "limit": limit})
             rows = result.fetchall()
 
-            print("🔍 DEBUG - RAW SYMPTOM DATA IN DATABASE:")
-            for row in rows:
-                print(
-                    f"  {row.tampa_date} {row.tampa_time.strftime('%H:%M:%S')} - {row.symptom_name} (intensity: {row.intensity})"
-                )
-                print(f"    Stored as UTC: {row.stored_utc}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for row in rows:
+                    logger.debug(
+                        "%s %s - %s (intensity: %s), stored as UTC: %s",
+                        row.tampa_date,
+                        row.tampa_time.strftime("%H:%M:%S"),
+                        row.symptom_name,
+                        row.intensity,
+                        row.stored_utc,
+                    )
 
             return rows
 
         except Exception as e:
-            print(f"❌ Error in debug_symptom_data: {e}")
+            logger.error("Error in debug_symptom_data: %s", e)
             return []
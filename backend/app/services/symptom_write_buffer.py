@@ -0,0 +1,352 @@
+# app/services/symptom_write_buffer.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from app.database.database import SessionLocal
+from app.schemas.schemas import SymptomIntensityCreate
+from app.services.symptom_tracking_service import SymptomTrackingService
+
+SYMPTOM_WRITE_BEHIND = os.getenv("SYMPTOM_WRITE_BEHIND", "true").lower() == "true"
+SYMPTOM_BUFFER_MAX = int(os.getenv("SYMPTOM_BUFFER_MAX", "5000"))
+SYMPTOM_FLUSH_SIZE = int(os.getenv("SYMPTOM_FLUSH_SIZE", "200"))
+SYMPTOM_FLUSH_INTERVAL = float(os.getenv("SYMPTOM_FLUSH_INTERVAL", "2.0"))
+# How long submit() waits for room before writing inline instead
+SYMPTOM_BUFFER_PUT_TIMEOUT = float(os.getenv("SYMPTOM_BUFFER_PUT_TIMEOUT", "0.5"))
+SYMPTOM_SPILL_DIR = os.getenv("SYMPTOM_SPILL_DIR", "symptom_spill")
+# How often the flush thread retries spilled records
+SYMPTOM_REPLAY_INTERVAL = float(os.getenv("SYMPTOM_REPLAY_INTERVAL", "60"))
+# A claimed spill file untouched this long is taken over by another worker
+SYMPTOM_CLAIM_TIMEOUT = float(os.getenv("SYMPTOM_CLAIM_TIMEOUT", "600"))
+
+Record = Tuple[SymptomIntensityCreate, datetime]
+
+logger = logging.getLogger(__name__)
+
+
+class SymptomWriteBuffer:
+    """Write-behind buffer for symptom intensity records.
+
+    Requests hand records to `submit()` and return immediately. A background
+    thread flushes them to Postgres with `record_symptom_intensities` once
+    `flush_size` records are waiting or `flush_interval` seconds have passed.
+
+    When the buffer is full, `submit()` waits briefly and then writes the
+    records inline, so callers slow down instead of records being dropped.
+    Records that can't be written while the database is down are spilled to
+    JSONL files in `spill_dir`, which the flush thread replays every
+    `replay_interval` seconds. With `write_behind` off every write is inline
+    and the thread only replays spills.
+
+    A batch that fails while the database is reachable is retried row by
+    row, and rows that still fail are moved to `spill_dir/quarantine` for
+    inspection, so one bad row can't block the rest forever.
+    """
+
+    def __init__(
+        self,
+        max_size: int = SYMPTOM_BUFFER_MAX,
+        flush_size: int = SYMPTOM_FLUSH_SIZE,
+        flush_interval: float = SYMPTOM_FLUSH_INTERVAL,
+        spill_dir: str = SYMPTOM_SPILL_DIR,
+        write_behind: bool = SYMPTOM_WRITE_BEHIND,
+        replay_interval: float = SYMPTOM_REPLAY_INTERVAL,
+    ):
+        self.queue: "queue.Queue[Record]" = queue.Queue(maxsize=max_size)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self.quarantine_dir = os.path.join(spill_dir, "quarantine")
+        self.write_behind = write_behind
+        self.replay_interval = replay_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "queued": 0,
+            "flushed": 0,
+            "inline": 0,
+            "spilled": 0,
+            "quarantined": 0,
+        }
+
+    def _count(self, key: str, n: int):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="symptom-write-buffer", daemon=True
+        )
+        self._thread.start()
+        if self.write_behind:
+            logger.info(
+                "Symptom write-behind buffer started (flush %d / %ss)",
+                self.flush_size,
+                self.flush_interval,
+            )
+
+    def stop(self):
+        """Stop the flusher, write what's left, spill anything that fails."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        remaining = self._drain(self.queue.qsize())
+        if remaining:
+            _, unwritten = self._write(remaining)
+            if unwritten:
+                self._spill(unwritten)
+        logger.info("Symptom write-behind buffer stopped: %s", self.stats)
+
+    def submit(self, intensities: List[SymptomIntensityCreate]) -> int:
+        """Queue records for a later batched write. Returns how many were
+        accepted (queued or, under backpressure, written inline)."""
+        if not intensities:
+            return 0
+        now = datetime.now(timezone.utc)
+        if not (self.write_behind and self.running):
+            return self._write_inline([(i, now) for i in intensities])
+
+        overflow = []
+        for intensity in intensities:
+            try:
+                self.queue.put((intensity, now), timeout=SYMPTOM_BUFFER_PUT_TIMEOUT)
+                self._count("queued", 1)
+            except queue.Full:
+                overflow.append((intensity, now))
+        if overflow:
+            logger.warning(
+                "Symptom buffer full, writing %d records inline", len(overflow)
+            )
+            return len(intensities) - len(overflow) + self._write_inline(overflow)
+        return len(intensities)
+
+    def _run(self):
+        next_replay = time.monotonic()
+        while not self._stop.is_set():
+            if time.monotonic() >= next_replay:
+                self._replay_spill()
+                next_replay = time.monotonic() + self.replay_interval
+            if not self.write_behind:
+                self._stop.wait(max(next_replay - time.monotonic(), 0))
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.flush_size and not self._stop.is_set():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=min(timeout, 0.25)))
+                except queue.Empty:
+                    continue
+            batch.extend(self._drain(self.flush_size - len(batch)))
+            if batch:
+                _, unwritten = self._write(batch)
+                if unwritten:
+                    self._spill(unwritten)
+
+    def _drain(self, limit: int) -> List[Record]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _insert(batch: List[Record]) -> bool:
+        db = SessionLocal()
+        try:
+            stored = SymptomTrackingService.record_symptom_intensities(
+                db, [r[0] for r in batch], [r[1] for r in batch]
+            )
+        finally:
+            db.close()
+        return stored == len(batch)
+
+    @staticmethod
+    def _database_reachable() -> bool:
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+        finally:
+            db.close()
+
+    def _write(self, batch: List[Record]) -> Tuple[int, List[Record]]:
+        """Stores the batch. Returns (records stored, records to spill).
+
+        If the batch fails but the database answers, the failure is in the
+        data (e.g. a user deleted since the request), so rows are retried
+        one at a time and the ones that still fail are quarantined.
+        """
+        if self._insert(batch):
+            self._count("flushed", len(batch))
+            return len(batch), []
+        if not self._database_reachable():
+            return 0, batch
+
+        stored, unwritten, bad = 0, [], []
+        for record in batch:
+            if self._insert([record]):
+                stored += 1
+            elif self._database_reachable():
+                bad.append(record)
+            else:
+                unwritten.append(record)
+        self._count("flushed", stored)
+        if bad:
+            self._quarantine([_spill_line(record) for record in bad])
+        return stored, unwritten
+
+    def _write_inline(self, batch: List[Record]) -> int:
+        stored, unwritten = self._write(batch)
+        self._count("inline", stored)
+        if unwritten:
+            self._spill(unwritten)
+        return stored
+
+    @staticmethod
+    def _write_lines(directory: str, prefix: str, lines: List[str]) -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}-{os.getpid()}-{uuid.uuid4().hex}.jsonl"
+        tmp_path = os.path.join(directory, name + ".tmp")
+        with open(tmp_path, "w") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        # Rename so a half-written file is never replayed
+        os.replace(tmp_path, os.path.join(directory, name))
+        return name
+
+    def _spill(self, batch: List[Record]):
+        lines = [_spill_line(record) for record in batch]
+        name = self._write_lines(self.spill_dir, "spill", lines)
+        self._count("spilled", len(batch))
+        logger.info("Spilled %d symptom records to %s", len(batch), name)
+
+    def _quarantine(self, lines: List[str]):
+        name = self._write_lines(self.quarantine_dir, "quarantine", lines)
+        self._count("quarantined", len(lines))
+        logger.error(
+            "Quarantined %d symptom records that can't be stored: %s",
+            len(lines),
+            os.path.join(self.quarantine_dir, name),
+        )
+
+    def _claim(self, name: str):
+        """Renames a spill file to this process's claim, or returns None if
+        another worker holds it. Claims left by dead or stuck workers (or a
+        previous run that reused this PID) are taken over."""
+        path = os.path.join(self.spill_dir, name)
+        claimed = os.path.join(
+            self.spill_dir, f"{name.split('.claimed-')[0]}.claimed-{os.getpid()}"
+        )
+        if ".claimed-" in name:
+            owner = name.rsplit("-", 1)[1]
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except OSError:
+                return None
+            if (
+                owner.isdigit()
+                and int(owner) != os.getpid()
+                and _pid_alive(int(owner))
+                and age < SYMPTOM_CLAIM_TIMEOUT
+            ):
+                return None
+        try:
+            os.rename(path, claimed)
+            # Claim age is measured from here, not from when it was spilled
+            os.utime(claimed)
+        except OSError:
+            return None
+        return claimed
+
+    def _replay_spill(self):
+        """Writes back every spill file; never raises, so a bad file can't
+        take down the flush thread."""
+        if not os.path.isdir(self.spill_dir):
+            return
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not name.startswith("spill-") or name.endswith(".tmp"):
+                continue
+            claimed = self._claim(name)
+            if claimed is None:
+                continue
+            original = os.path.join(self.spill_dir, name.split(".claimed-")[0])
+            try:
+                self._replay_file(claimed, original)
+            except Exception as e:
+                logger.exception("Could not replay %s: %s", name, e)
+                os.rename(claimed, original)
+
+    def _replay_file(self, claimed: str, original: str):
+        batch, bad = [], []
+        with open(claimed) as f:
+            for line in filter(str.strip, f):
+                try:
+                    row = json.loads(line)
+                    batch.append(
+                        (
+                            SymptomIntensityCreate(**row["intensity"]),
+                            datetime.fromisoformat(row["recorded_at"]),
+                        )
+                    )
+                except (ValueError, KeyError, TypeError):
+                    bad.append(line.rstrip("\n"))
+        if bad:
+            self._quarantine(bad)
+
+        stored, unwritten = self._write(batch) if batch else (0, [])
+        name = os.path.basename(original)
+        if unwritten and len(unwritten) == len(batch) and not bad:
+            # Database still down: put the file back untouched for next time
+            os.rename(claimed, original)
+            logger.warning("Could not replay %s, will retry", name)
+            return
+        if unwritten:
+            self._spill(unwritten)
+        os.remove(claimed)
+        logger.info("Replayed %d spilled symptom records from %s", stored, name)
+
+
+def _spill_line(record: Record) -> str:
+    intensity, recorded_at = record
+    return json.dumps(
+        {"intensity": intensity.model_dump(), "recorded_at": recorded_at.isoformat()}
+    )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Singleton instance
+symptom_write_buffer = SymptomWriteBuffer()
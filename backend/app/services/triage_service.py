@@ -1,5 +1,6 @@
 import re
-from app.schemas.schemas import TriageOut
+from typing import Dict, Iterable, List
+from app.schemas.schemas import TriageOut, TriageMatch
 
 RED_FLAGS = [
     r"\b(chest pain|pressure in chest)\b",
@@ -10,20 +11,196 @@ RED_FLAGS = [
     r"\b(suicidal|kill myself|end my life)\b",
 ]
 
+# Synonym lexicon, one entry per RED_FLAGS pattern (same order). Every term
+# here is folded into a single compiled automaton, so growing the lists does
+# not add extra passes over the text.
+RED_FLAG_LEXICON: Dict[str, List[str]] = {
+    "cardiac": [
+        "chest pain",
+        "pressure in chest",
+        "chest pressure",
+        "chest tightness",
+        "tightness in chest",
+        "crushing chest pain",
+        "pain radiating to left arm",
+        "heart attack",
+    ],
+    "respiratory": [
+        "shortness of breath",
+        "short of breath",
+        "difficulty breathing",
+        "trouble breathing",
+        "can't breathe",
+        "cannot breathe",
+        "struggling to breathe",
+        "gasping for air",
+        "choking",
+        "lips turning blue",
+    ],
+    "neurological": [
+        "stroke",
+        "slurred speech",
+        "face droop",
+        "facial droop",
+        "face drooping",
+        "arm weakness",
+        "sudden numbness",
+        "sudden confusion",
+        "worst headache of my life",
+        "seizure",
+        "unresponsive",
+    ],
+    "bleeding": [
+        "uncontrolled bleeding",
+        "bleeding won't stop",
+        "heavy bleeding",
+        "vomiting blood",
+        "coughing up blood",
+        "faint",
+        "fainting",
+        "fainted",
+        "passed out",
+        "loss of consciousness",
+    ],
+    "allergic": [
+        "anaphylaxis",
+        "severe allergy",
+        "severe allergic reaction",
+        "throat swelling",
+        "throat closing",
+        "swollen tongue",
+    ],
+    "self_harm": [
+        "suicidal",
+        "kill myself",
+        "end my life",
+        "want to die",
+        "hurt myself",
+        "self harm",
+        "overdose",
+    ],
+}
+
+NEGATION_CUES = [
+    "no",
+    "not",
+    "never",
+    "denies",
+    "denied",
+    "without",
+    "negative for",
+    "free of",
+    "no longer",
+    "don't have",
+    "do not have",
+    "haven't had",
+]
+
+# A cue only negates a red flag that directly follows it ("no chest pain",
+# "denies any chest pain"). Anything in between - other words, commas,
+# "and" - leaves the red flag positive: a missed emergency costs far more
+# than a false alarm.
+_NEGATED_GAP = re.compile(r"\s+(?:any\s+)?")
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Build a prefix-factored alternation so the regex engine branches once
+    per character instead of trying every term at every position."""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def walk(node: Dict[str, dict]) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + walk(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(sorted(branches)) + ")"
+        return body + "?" if end else body
+
+    return walk(trie)
+
+
+def _normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class TriageMatcher:
+    """Single-pass red-flag matcher.
+
+    All lexicon terms and negation cues are compiled into one regex with a
+    named group per category, and ``scan`` walks the text once with
+    ``finditer`` to collect spans and their negation state.
+    """
+
+    def __init__(self, lexicon: Dict[str, List[str]], patterns: List[str] = None):
+        self.categories = list(lexicon.keys())
+        self.patterns = dict(zip(self.categories, patterns or []))
+        groups = [
+            f"(?P<neg>{_trie_pattern(_normalize_term(t) for t in NEGATION_CUES)})",
+        ]
+        for i, category in enumerate(self.categories):
+            terms = {_normalize_term(t) for t in lexicon[category] if t.strip()}
+            groups.append(f"(?P<c{i}>{_trie_pattern(terms)})")
+        # \s+ inside terms lets "chest   pain" match "chest pain"
+        pattern = r"\b(?:" + "|".join(groups) + r")\b"
+        pattern = pattern.replace(r"\ ", r"\s+")
+        self.regex = re.compile(pattern)
+        self.term_count = sum(len(v) for v in lexicon.values())
+
+    def scan(self, text: str) -> List[TriageMatch]:
+        t = (text or "").lower()
+        matches: List[TriageMatch] = []
+        negated_at = -1  # where a red flag must start to be negated
+        for m in self.regex.finditer(t):
+            kind = m.lastgroup
+            if kind == "neg":
+                gap = _NEGATED_GAP.match(t, m.end())
+                negated_at = gap.end() if gap else -1
+                continue
+            category = self.categories[int(kind[1:])]
+            matches.append(
+                TriageMatch(
+                    category=category,
+                    term=m.group(),
+                    start=m.start(),
+                    end=m.end(),
+                    negated=m.start() == negated_at,
+                )
+            )
+        return matches
+
+
+_matcher = TriageMatcher(RED_FLAG_LEXICON, RED_FLAGS)
+
+
+def get_matcher() -> TriageMatcher:
+    return _matcher
+
 
 def triage_rules(text: str) -> TriageOut:
-    t = (text or "").lower()
-    red = [p for p in RED_FLAGS if re.search(p, t)]
+    matches = _matcher.scan(text)
+    positive = [m for m in matches if not m.negated]
+    red = list(
+        dict.fromkeys(_matcher.patterns.get(m.category, m.category) for m in positive)
+    )
     if red:
         return TriageOut(
             risk="emergency",
             next_step="call_emergency",
             red_flags=red,
+            matches=matches,
             disclaimer="Possible emergency. Call 911 (or local equivalent).",
         )
     return TriageOut(
         risk="routine",
         next_step="self_care",
         red_flags=[],
+        matches=matches,
         disclaimer="This is not a diagnosis. If symptoms worsen, seek medical care.",
     )
@@ -1,5 +1,8 @@
+import logging
 from app.services.pinecone_service import pinecone_service
 
+logger = logging.getLogger(__name__)
+
 
 def query_medical_knowledge(query: str, n_results: int):
     return pinecone_service.query_medical_knowledge(query, n_results)
@@ -8,9 +11,9 @@ def query_medical_knowledge(query: str, n_results: int):
 def check_collection():
     if pinecone_service.index:
         stats = pinecone_service.index.describe_index_stats()
-        print(f"📊 Pinecone index stats: {stats}")
+        logger.info("Pinecone index stats: %s", stats)
     else:
-        print("❌ Pinecone index not available")
+        logger.error("Pinecone index not available")
 
 
 if __name__ == "__main__":
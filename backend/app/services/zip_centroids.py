@@ -0,0 +1,111 @@
+# app/services/zip_centroids.py
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Built by app/scripts/build_zip_centroids.py from the Census ZCTA Gazetteer
+ZIP_CENTROIDS_PATH = os.getenv(
+    "ZIP_CENTROIDS_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "zip_centroids.bin"),
+)
+
+# File layout: header, then one little-endian (float32 lat, float32 lng) slot
+# per five-digit ZIP 00000-99999. Unused slots hold NaN. A lookup is a single
+# offset read, and the 800 KB body is paged in by the OS only as it is touched.
+MAGIC = b"ZIPC"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, populated slots
+SLOT = struct.Struct("<ff")
+ZIP_SLOTS = 100_000
+FILE_SIZE = HEADER.size + ZIP_SLOTS * SLOT.size
+
+
+def normalize_zip(zipcode) -> Optional[int]:
+    """'33620', '33620-1234' and 33620 all give 33620; anything else None."""
+    digits = str(zipcode).strip()[:5]
+    if len(digits) != 5 or not digits.isdigit():
+        return None
+    return int(digits)
+
+
+class ZipCentroids:
+    """Read-only ZIP -> (lat, lng) table over a memory-mapped file."""
+
+    def __init__(self, path: str = ZIP_CENTROIDS_PATH):
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self.count = 0
+
+    def load(self) -> bool:
+        """Maps the table; returns False (and lookups miss) if it's unusable."""
+        if self._map is not None:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "ZIP centroid table unavailable (%s), geocoding online: %s",
+                self.path,
+                e,
+            )
+            return False
+
+        try:
+            magic, version, count = HEADER.unpack_from(mapped, 0)
+        except struct.error:  # shorter than the header
+            magic = version = count = None
+        if magic != MAGIC or version != VERSION or len(mapped) != FILE_SIZE:
+            mapped.close()
+            logger.warning("ZIP centroid table %s has an unknown format", self.path)
+            return False
+
+        self._map, self.count = mapped, count
+        logger.info("Loaded %d ZIP centroids from %s", count, self.path)
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self.count = 0
+
+    def lookup(self, zipcode) -> Optional[Tuple[float, float]]:
+        zip_int = normalize_zip(zipcode)
+        if self._map is None or zip_int is None:
+            return None
+        lat, lng = SLOT.unpack_from(self._map, HEADER.size + zip_int * SLOT.size)
+        if lat != lat:  # NaN: not a ZCTA
+            return None
+        # float32 keeps ~1 m; round off the widening noise
+        return round(lat, 6), round(lng, 6)
+
+
+def write_table(path: str, centroids) -> int:
+    """Writes {zip: (lat, lng)} in the layout ZipCentroids reads."""
+    nan = float("nan")
+    body = bytearray(SLOT.pack(nan, nan) * ZIP_SLOTS)
+    count = 0
+    for zipcode, (lat, lng) in centroids.items():
+        zip_int = normalize_zip(zipcode)
+        if zip_int is None:
+            continue
+        SLOT.pack_into(body, zip_int * SLOT.size, lat, lng)
+        count += 1
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count))
+        f.write(body)
+    # Atomic swap: a running process keeps its mapping of the old file
+    os.replace(tmp_path, path)
+    return count
+
+
+# Singleton instance
+zip_centroids = ZipCentroids()
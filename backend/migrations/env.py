@@ -0,0 +1,54 @@
+# migrations/env.py - Alembic environment wired to the app's engine/metadata
+import re
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database.database import engine, Base, DATABASE_URL
+from app.database import models  # noqa: F401  (registers tables on Base)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Monthly/default partitions (migration 0003) aren't modelled on Base
+_PARTITION_TABLE = re.compile(r"_(p\d{6}|default)$")
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and _PARTITION_TABLE.search(name):
+        return False
+    if type_ == "index" and reflected and _PARTITION_TABLE.search(obj.table.name):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
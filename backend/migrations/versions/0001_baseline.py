@@ -0,0 +1,189 @@
+"""baseline schema
+
+Creates the tables that existed before migrations were introduced. Each
+table is only created if missing, so this revision can be applied on top of
+a database that was previously built with Base.metadata.create_all().
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    "users",
+    "user_fhir_mapping",
+    "symptom_intensity",
+    "symptom_frequency",
+    "symptom_daily_rollup",
+    "reminders",
+    "chat_sessions",
+    "chat_messages",
+]
+
+
+def _missing(name: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if _missing("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("age", sa.Integer()),
+            sa.Column("sex", sa.String()),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+            sa.Column("role", sa.String()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if _missing("user_fhir_mapping"):
+        op.create_table(
+            "user_fhir_mapping",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "user_id",
+                sa.Integer(),
+                sa.ForeignKey("users.id"),
+                unique=True,
+                nullable=False,
+            ),
+            sa.Column("fhir_patient_id", sa.String(), nullable=False),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+        )
+        op.create_index("ix_user_fhir_mapping_id", "user_fhir_mapping", ["id"])
+
+    if _missing("symptom_intensity"):
+        op.create_table(
+            "symptom_intensity",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+            ),
+            sa.Column("symptom_name", sa.String(100), nullable=False),
+            sa.Column("intensity", sa.Integer(), nullable=False),
+            sa.Column("duration_minutes", sa.Integer()),
+            sa.Column("notes", sa.Text()),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+        )
+        op.create_index("ix_symptom_intensity_id", "symptom_intensity", ["id"])
+
+    if _missing("symptom_frequency"):
+        op.create_table(
+            "symptom_frequency",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+            ),
+            sa.Column("symptom_name", sa.String(100), nullable=False),
+            sa.Column("month_year", sa.DateTime(), nullable=False),
+            sa.Column("occurrence_count", sa.Integer()),
+            sa.Column(
+                "last_occurrence",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            ),
+        )
+        op.create_index("ix_symptom_frequency_id", "symptom_frequency", ["id"])
+
+    if _missing("symptom_daily_rollup"):
+        op.create_table(
+            "symptom_daily_rollup",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+            ),
+            sa.Column("symptom_name", sa.String(100), nullable=False),
+            sa.Column("local_date", sa.Date(), nullable=False),
+            sa.Column("event_count", sa.Integer(), nullable=False),
+            sa.Column("intensity_sum", sa.Integer(), nullable=False),
+            sa.Column("intensity_min", sa.Integer()),
+            sa.Column("intensity_max", sa.Integer()),
+            sa.Column("duration_sum", sa.Integer(), nullable=False),
+            sa.UniqueConstraint(
+                "user_id",
+                "symptom_name",
+                "local_date",
+                name="uq_symptom_daily_rollup",
+            ),
+        )
+        op.create_index("ix_symptom_daily_rollup_id", "symptom_daily_rollup", ["id"])
+
+    if _missing("reminders"):
+        op.create_table(
+            "reminders",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("reminder_type", sa.String(50)),
+            sa.Column("scheduled_time", sa.Time(), nullable=False),
+            sa.Column("scheduled_date", sa.Date()),
+            sa.Column("days_of_week", postgresql.ARRAY(sa.String(20))),
+            sa.Column("is_recurring", sa.Boolean()),
+            sa.Column("recurrence_pattern", sa.String(20)),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("is_completed", sa.Boolean()),
+            sa.Column("source", sa.String(50)),
+            sa.Column("ai_suggestion_context", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True)),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+            sa.Column("completed_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_reminders_id", "reminders", ["id"])
+
+    if _missing("chat_sessions"):
+        op.create_table(
+            "chat_sessions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("context_data", sa.JSON()),
+        )
+        op.create_index("ix_chat_sessions_id", "chat_sessions", ["id"])
+
+    if _missing("chat_messages"):
+        op.create_table(
+            "chat_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("session_id", sa.Integer(), sa.ForeignKey("chat_sessions.id")),
+            sa.Column("role", sa.String(20)),
+            sa.Column("content", sa.Text()),
+            sa.Column("message_type", sa.String(20)),
+            sa.Column("timestamp", sa.DateTime()),
+            sa.Column("message_metadata", sa.JSON()),
+        )
+        op.create_index("ix_chat_messages_id", "chat_messages", ["id"])
+
+
+def downgrade():
+    for name in reversed(TABLES):
+        op.drop_table(name)
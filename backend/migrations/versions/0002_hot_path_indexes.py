@@ -0,0 +1,71 @@
+"""composite indexes for hot query paths
+
+Indexes are built CONCURRENTLY so they can be applied to a live database
+without blocking writes. The symptom_frequency unique index is then
+attached as the constraint behind the ON CONFLICT upsert.
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "ix_symptom_intensity_user_created",
+        "symptom_intensity",
+        ["user_id", "created_at"],
+    ),
+    (
+        "ix_chat_messages_session_timestamp",
+        "chat_messages",
+        ["session_id", "timestamp"],
+    ),
+    ("ix_chat_sessions_user_updated", "chat_sessions", ["user_id", "updated_at"]),
+    ("ix_reminders_user_active", "reminders", ["user_id", "is_active"]),
+]
+
+FREQUENCY_UNIQUE = "uq_symptom_frequency_user_symptom_month"
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.create_index(
+            FREQUENCY_UNIQUE,
+            "symptom_frequency",
+            ["user_id", "symptom_name", "month_year"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints("symptom_frequency")
+    if not any(c["name"] == FREQUENCY_UNIQUE for c in constraints):
+        op.execute(
+            f"ALTER TABLE symptom_frequency ADD CONSTRAINT {FREQUENCY_UNIQUE} "
+            f"UNIQUE USING INDEX {FREQUENCY_UNIQUE}"
+        )
+
+
+def downgrade():
+    op.drop_constraint(FREQUENCY_UNIQUE, "symptom_frequency", type_="unique")
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,135 @@
+"""monthly range partitioning for symptom_intensity and chat_messages
+
+Rebuilds both tables as RANGE-partitioned parents keyed on their time
+column, with one partition per month from the oldest row through three
+months ahead plus a DEFAULT partition as a safety net. Existing rows are
+copied across and the id sequences are kept, so ids keep increasing.
+New partitions are created ahead of time by app/database/partitions.py.
+
+The primary keys become (id, <time column>) because Postgres requires the
+partition key to be part of every unique constraint.
+
+Revision ID: 0003_partition_time_series
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0003_partition_time_series"
+down_revision = "0002_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+TABLES = {
+    "symptom_intensity": {
+        "key": "created_at",
+        "tz": True,
+        "columns": """
+            id integer NOT NULL DEFAULT nextval('symptom_intensity_id_seq'),
+            user_id integer NOT NULL REFERENCES users(id),
+            symptom_name varchar(100) NOT NULL,
+            intensity integer NOT NULL,
+            duration_minutes integer,
+            notes text,
+            created_at timestamptz NOT NULL DEFAULT now()
+        """,
+        "copy": "id, user_id, symptom_name, intensity, duration_minutes, notes",
+        "indexes": {
+            "ix_symptom_intensity_id": "id",
+            "ix_symptom_intensity_user_created": "user_id, created_at",
+        },
+    },
+    "chat_messages": {
+        "key": "timestamp",
+        "tz": False,
+        "columns": """
+            id integer NOT NULL DEFAULT nextval('chat_messages_id_seq'),
+            session_id integer REFERENCES chat_sessions(id),
+            role varchar(20),
+            content text,
+            message_type varchar(20),
+            timestamp timestamp NOT NULL DEFAULT now(),
+            message_metadata json
+        """,
+        "copy": "id, session_id, role, content, message_type, message_metadata",
+        "indexes": {
+            "ix_chat_messages_id": "id",
+            "ix_chat_messages_session_timestamp": "session_id, timestamp",
+        },
+    },
+}
+
+
+def _swap_in(table: str, spec: dict, partitioned: bool):
+    """Rename `table` aside, build its replacement, copy rows, drop the old."""
+    key = spec["key"]
+    old = f"{table}_old"
+    seq = f"{table}_id_seq"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    for index in spec["indexes"]:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    # Detach the sequence so dropping the old table doesn't drop it too
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} ({spec['columns']}, PRIMARY KEY (id, {key})) "
+            f"PARTITION BY RANGE ({key})"
+        )
+        _create_month_partitions(table, old, spec)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    else:
+        op.execute(f"CREATE TABLE {table} ({spec['columns']}, PRIMARY KEY (id))")
+
+    op.execute(
+        f"INSERT INTO {table} ({spec['copy']}, {key}) "
+        f"SELECT {spec['copy']}, COALESCE({key}, now()) FROM {old}"
+    )
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {old}")
+    for index, columns in spec["indexes"].items():
+        op.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+
+
+def _create_month_partitions(table: str, source: str, spec: dict):
+    key = spec["key"]
+    # timestamptz bounds are pinned to UTC; naive timestamps use plain dates
+    as_utc = f"{key} AT TIME ZONE 'UTC'" if spec["tz"] else key
+    now = "now() AT TIME ZONE 'UTC'" if spec["tz"] else "LOCALTIMESTAMP"
+    suffix = " 00:00:00+00" if spec["tz"] else ""
+    op.execute(f"""
+        DO $$
+        DECLARE
+            m date;
+            last_month date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN({as_utc}), {now}))::date
+            INTO m FROM {source};
+            last_month := (date_trunc('month', {now})
+                           + interval '{MONTHS_AHEAD} months')::date;
+            WHILE m <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(m, 'YYYYMM'),
+                    m::text || '{suffix}',
+                    (m + interval '1 month')::date::text || '{suffix}'
+                );
+                m := (m + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+
+
+def upgrade():
+    for table, spec in TABLES.items():
+        _swap_in(table, spec, partitioned=True)
+
+
+def downgrade():
+    for table, spec in TABLES.items():
+        _swap_in(table, spec, partitioned=False)
@@ -0,0 +1,66 @@
+"""chat_messages (session_id, timestamp, id) index for keyset pagination
+
+Replaces ix_chat_messages_session_timestamp with an index that also covers
+the id tie-breaker, so "(timestamp, id) < cursor" pages and the latest-N
+window are both a single index range scan (forwards or backwards).
+
+chat_messages is partitioned, and Postgres can't build an index on a
+partitioned parent CONCURRENTLY. The index is therefore created on the
+parent ONLY (invalid until complete), built CONCURRENTLY on each partition,
+and each partition index is attached; the parent becomes valid once the
+last one is attached.
+
+Revision ID: 0004_chat_messages_keyset_index
+Revises: 0003_partition_time_series
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_chat_messages_keyset_index"
+down_revision = "0003_partition_time_series"
+branch_labels = None
+depends_on = None
+
+TABLE = "chat_messages"
+OLD_INDEX = ("ix_chat_messages_session_timestamp", "session_id, timestamp")
+NEW_INDEX = ("ix_chat_messages_session_timestamp_id", "session_id, timestamp, id")
+
+
+def _partitions():
+    rows = op.get_bind().execute(
+        sa.text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            ORDER BY c.relname
+        """),
+        {"table": TABLE},
+    )
+    return [r.relname for r in rows]
+
+
+def _create_partitioned_index(name: str, columns: str):
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {TABLE} ({columns})")
+    partitions = _partitions()
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_{name} "
+                f"ON {partition} ({columns})"
+            )
+    for partition in partitions:
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition}_{name}")
+
+
+def upgrade():
+    _create_partitioned_index(*NEW_INDEX)
+    op.execute(f"DROP INDEX IF EXISTS {OLD_INDEX[0]}")
+
+
+def downgrade():
+    _create_partitioned_index(*OLD_INDEX)
+    op.execute(f"DROP INDEX IF EXISTS {NEW_INDEX[0]}")
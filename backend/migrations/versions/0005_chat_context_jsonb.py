@@ -0,0 +1,63 @@
+"""chat_sessions.context_data as JSONB with a GIN index
+
+Converts context_data from json to jsonb so context merges can be done
+server-side with ||, and adds a jsonb_path_ops GIN index for containment
+queries. Existing rows get a normalized "symptom_terms" array derived from
+their free-text "symptoms"/"symptom" values (same split as
+ChatService.symptom_terms), which is what "sessions mentioning X" queries
+match against.
+
+Revision ID: 0005_chat_context_jsonb
+Revises: 0004_chat_messages_keyset_index
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0005_chat_context_jsonb"
+down_revision = "0004_chat_messages_keyset_index"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_chat_sessions_context_data"
+
+
+def upgrade():
+    op.execute(
+        "ALTER TABLE chat_sessions "
+        "ALTER COLUMN context_data TYPE jsonb USING context_data::jsonb"
+    )
+    op.execute(r"""
+        UPDATE chat_sessions s
+        SET context_data = s.context_data
+            || jsonb_build_object('symptom_terms', t.terms)
+        FROM (
+            SELECT id, jsonb_agg(DISTINCT term ORDER BY term) AS terms
+            FROM (
+                SELECT id, btrim(regexp_split_to_table(
+                    lower(value), '\s*(,|;|/|\mand\M)\s*'
+                )) AS term
+                FROM chat_sessions,
+                     jsonb_each_text(context_data)
+                WHERE key IN ('symptoms', 'symptom')
+                  AND jsonb_typeof(context_data->key) = 'string'
+            ) split
+            WHERE term <> ''
+            GROUP BY id
+        ) t
+        WHERE s.id = t.id
+    """)
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} "
+            "ON chat_sessions USING gin (context_data jsonb_path_ops)"
+        )
+
+
+def downgrade():
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    # symptom_terms is left in place; it is harmless extra context
+    op.execute(
+        "ALTER TABLE chat_sessions "
+        "ALTER COLUMN context_data TYPE json USING context_data::json"
+    )
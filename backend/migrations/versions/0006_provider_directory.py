@@ -0,0 +1,48 @@
+"""provider_directory table for offline provider lookups
+
+Holds providers imported from an NPPES NPI dump (app/scripts/import_nppes.py),
+one row per NPI, located at the centroid of the practice ZIP. The
+(specialty, latitude, longitude) index turns "nearest N of a specialty" into
+a range scan over a small bounding box, without needing PostGIS.
+
+Revision ID: 0006_provider_directory
+Revises: 0005_chat_context_jsonb
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_provider_directory"
+down_revision = "0005_chat_context_jsonb"
+branch_labels = None
+depends_on = None
+
+TABLE = "provider_directory"
+INDEX = "ix_provider_directory_specialty_lat_lng"
+
+
+def upgrade():
+    op.create_table(
+        TABLE,
+        sa.Column("npi", sa.String(10), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("specialty", sa.String(50), nullable=False),
+        sa.Column("taxonomy_code", sa.String(10), nullable=False),
+        sa.Column("address", sa.String(255)),
+        sa.Column("city", sa.String(100)),
+        sa.Column("state", sa.String(2)),
+        sa.Column("zipcode", sa.String(5), nullable=False),
+        sa.Column("phone", sa.String(20)),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+    op.create_index(INDEX, TABLE, ["specialty", "latitude", "longitude"])
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name=TABLE)
+    op.drop_table(TABLE)
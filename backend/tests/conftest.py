@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+
+# Required at import time by auth_service and openrouter_client
+os.environ.setdefault("SECRET_KEY", "test-only")
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test")
@@ -0,0 +1,57 @@
+# tests/test_cache.py
+import time
+
+from app.services.cache import ExpiringLRUCache
+
+LATER = time.time() + 3600
+
+
+def test_entries_expire_at_their_own_time():
+    cache = ExpiringLRUCache(10)
+    cache.set("short", 1, time.time() + 0.05)
+    cache.set("long", 2, LATER)
+    assert cache.get("short") == 1
+
+    time.sleep(0.06)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    # Expired entries are dropped on read
+    assert cache.stats()["size"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ExpiringLRUCache(2)
+    cache.set("a", 1, LATER)
+    cache.set("b", 2, LATER)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.set("c", 3, LATER)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_set_refreshes_recency_and_value():
+    cache = ExpiringLRUCache(2)
+    cache.set("a", 1, LATER)
+    cache.set("b", 2, LATER)
+    cache.set("a", 10, LATER)
+    cache.set("c", 3, LATER)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_pop_removes_entry_and_ignores_missing_keys():
+    cache = ExpiringLRUCache(10)
+    cache.set("a", 1, LATER)
+    cache.pop("a")
+    cache.pop("never-set")
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "hits": 0, "misses": 1}
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = ExpiringLRUCache(0)
+    cache.set("a", 1, LATER)
+    assert cache.get("a") is None
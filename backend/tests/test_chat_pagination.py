@@ -0,0 +1,150 @@
+# tests/test_chat_pagination.py
+import asyncio
+import base64
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.database.database import AsyncSessionLocal, async_engine
+from app.database.models import ChatMessage, ChatSession, User
+from app.routes.chat import get_chat_messages
+from app.services.chat_service import ChatService
+
+T0 = datetime(2026, 1, 15, 9, 30, 0)
+
+
+def b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def test_cursor_round_trip():
+    cursor = ChatService.encode_cursor(SimpleNamespace(timestamp=T0, id=42))
+    assert ChatService.decode_cursor(cursor) == (T0, 42)
+
+
+def tampered_cursors():
+    cursor = ChatService.encode_cursor(SimpleNamespace(timestamp=T0, id=42))
+    raw, signature = base64.urlsafe_b64decode(cursor).decode().rsplit("|", 1)
+    return [
+        b64(raw.replace("|42", "|43") + "|" + signature),  # another id
+        b64(raw.replace("09:30", "09:31") + "|" + signature),  # another time
+        b64(raw + "|" + "0" * len(signature)),  # forged signature
+        b64(raw + "|" + "é" * len(signature)),  # non-ASCII signature
+        b64(raw),  # unsigned
+    ]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "not base64!", b64("garbage"), b64("a|b|c"), "\udcff", *tampered_cursors()],
+)
+def test_malformed_or_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        ChatService.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("param", ["before", "after"])
+def test_route_answers_400_for_bad_cursor(param):
+    cursor = tampered_cursors()[0]
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(
+            get_chat_messages(
+                1, limit=50, **{param: cursor}, db=None, current_user=None
+            )
+        )
+    assert excinfo.value.status_code == 400
+
+
+async def _database_available() -> bool:
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        await async_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def database():
+    if not asyncio.run(_database_available()):
+        pytest.skip("Postgres not reachable at DATABASE_URL")
+
+
+async def _walk_pages(timestamps, limit):
+    """Inserts messages (rolled back afterwards) and pages through them in
+    both directions. Returns (expected ids, ids paging older, ids paging
+    newer)."""
+    async with AsyncSessionLocal() as db:
+        try:
+            tag = uuid.uuid4().hex
+            user = User(username=f"test-{tag}", email=f"test-{tag}@example.invalid")
+            db.add(user)
+            await db.flush()
+            session = ChatSession(user_id=user.id, context_data={})
+            db.add(session)
+            await db.flush()
+            messages = [
+                ChatMessage(
+                    session_id=session.id, role="user", content=str(i), timestamp=ts
+                )
+                for i, ts in enumerate(timestamps)
+            ]
+            db.add_all(messages)
+            await db.flush()
+            expected = [
+                m.id for m in sorted(messages, key=lambda m: (m.timestamp, m.id))
+            ]
+
+            # Newest page first, then follow older cursors
+            page, has_older, _ = await ChatService.get_messages_page(
+                db, session.id, limit=limit
+            )
+            older = [m.id for m in page]
+            while has_older:
+                cursor = ChatService.encode_cursor(page[0])
+                page, has_older, has_newer = await ChatService.get_messages_page(
+                    db,
+                    session.id,
+                    limit=limit,
+                    before=ChatService.decode_cursor(cursor),
+                )
+                assert has_newer
+                older = [m.id for m in page] + older
+
+            # From before the first message, follow newer cursors
+            start = (T0 - timedelta(days=1), 0)
+            page, _, has_newer = await ChatService.get_messages_page(
+                db, session.id, limit=limit, after=start
+            )
+            newer = [m.id for m in page]
+            while has_newer:
+                cursor = ChatService.encode_cursor(page[-1])
+                page, has_older, has_newer = await ChatService.get_messages_page(
+                    db,
+                    session.id,
+                    limit=limit,
+                    after=ChatService.decode_cursor(cursor),
+                )
+                assert has_older
+                newer += [m.id for m in page]
+            return expected, older, newer
+        finally:
+            await db.rollback()
+            await async_engine.dispose()
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4])
+def test_equal_timestamps_are_neither_skipped_nor_repeated(database, limit):
+    # Bursts of messages saved in one turn share a timestamp
+    timestamps = (
+        [T0] * 3 + [T0 + timedelta(seconds=1)] * 4 + [T0 + timedelta(seconds=2)]
+    )
+    expected, older, newer = asyncio.run(_walk_pages(timestamps, limit))
+    assert older == expected
+    assert newer == expected
@@ -0,0 +1,279 @@
+# tests/test_openrouter_client.py
+import threading
+import time
+
+import pytest
+
+from app import openrouter_client as oc
+from app.services.resilience import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    LatencyTracker,
+    deadline,
+)
+
+MODEL = "test/model"
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    oc._breakers.clear()
+    oc._latencies.clear()
+    oc._rate_limited_at.clear()
+    yield
+    oc._breakers.clear()
+    oc._latencies.clear()
+    oc._rate_limited_at.clear()
+
+
+def concurrently(fn, n):
+    barrier = threading.Barrier(n)
+    outcomes = [None] * n
+
+    def run(i):
+        barrier.wait()
+        try:
+            outcomes[i] = fn()
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+def test_shared_failure_counts_once_in_breaker(monkeypatch):
+    def post(*args, **kwargs):
+        time.sleep(0.2)
+        raise oc.requests.Timeout("read timed out")
+
+    monkeypatch.setattr(oc.requests, "post", post)
+    params = {"max_tokens": 10, "temperature": 0.0, "timeout": 1}
+    outcomes = concurrently(lambda: oc._call_model(MESSAGES, MODEL, params), 5)
+
+    assert all(isinstance(o, oc.LLMUnavailable) for o in outcomes)
+    assert oc._breaker(MODEL).failures == 1
+    assert oc._breaker(MODEL).state == "closed"
+
+
+def test_shared_success_records_one_latency(monkeypatch):
+    class Response:
+        status_code = 200
+        ok = True
+
+        def json(self):
+            return {"choices": [{"message": {"content": "hi"}}]}
+
+    def post(*args, **kwargs):
+        time.sleep(0.2)
+        return Response()
+
+    monkeypatch.setattr(oc.requests, "post", post)
+    params = {"max_tokens": 10, "temperature": 0.0, "timeout": 1}
+    outcomes = concurrently(lambda: oc._call_model(MESSAGES, MODEL, params), 5)
+
+    assert outcomes == ["hi"] * 5
+    assert len(oc._latency(MODEL)._samples) == 1
+
+
+class FakeOpenRouter:
+    """Stands in for requests.post; replies per model from a script.
+
+    Each script entry is (delay, outcome): outcome is a reply text, an HTTP
+    error status or "timeout". A model's last entry repeats.
+    """
+
+    def __init__(self, **scripts):
+        self.scripts = scripts
+        self.calls = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def post(self, url, json, headers, timeout):
+        model = json["model"]
+        with self._lock:
+            script = self.scripts[model]
+            n = sum(1 for m in self.calls if m == model)
+            self.calls.append(model)
+        delay, outcome = script[min(n, len(script) - 1)]
+        if delay:
+            self.release.wait(delay)
+        if outcome == "timeout":
+            raise oc.requests.Timeout("read timed out")
+        return FakeResponse(outcome)
+
+
+class FakeResponse:
+    def __init__(self, outcome):
+        self.status_code = outcome if isinstance(outcome, int) else 200
+        self.ok = self.status_code < 400
+        self.text = "error" if not self.ok else outcome
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.text}}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fakes = []
+
+    def install(**scripts):
+        fake = FakeOpenRouter(**scripts)
+        monkeypatch.setattr(oc.requests, "post", fake.post)
+        fakes.append(fake)
+        return fake
+
+    monkeypatch.setattr(oc, "_hedge_stats", {"hedged": 0, "hedge_wins": 0})
+    monkeypatch.setattr(oc, "LLM_HEDGING", False)
+    yield install
+    # Let requests abandoned by complete() finish before the next test
+    for fake in fakes:
+        fake.release.set()
+    deadline = time.monotonic() + 2
+    while oc.chat_completion.flight.stats()["in_flight"] and (
+        time.monotonic() < deadline
+    ):
+        time.sleep(0.01)
+
+
+def complete(models, **overrides):
+    return oc.complete(MESSAGES, task="classify", models=models, **overrides)
+
+
+@pytest.mark.parametrize("failure", [429, 500, 503, "timeout"])
+def test_falls_through_to_next_model(upstream, failure):
+    fake = upstream(a=[(0, failure)], b=[(0, "from b")])
+    assert complete(["a", "b"]) == "from b"
+    assert fake.calls == ["a", "b"]
+    assert oc._breaker("a").failures == 1
+    assert oc._breaker("b").failures == 0
+
+
+def test_client_error_is_not_retried(upstream):
+    fake = upstream(a=[(0, 400)], b=[(0, "from b")])
+    with pytest.raises(RuntimeError) as excinfo:
+        complete(["a", "b"])
+    assert not isinstance(excinfo.value, oc.LLMUnavailable)
+    assert fake.calls == ["a"]
+    assert oc._breaker("a").failures == 0
+
+
+def test_all_models_unavailable_raises_last_error(upstream):
+    upstream(a=[(0, 503)], b=[(0, 429)])
+    with pytest.raises(oc.LLMUnavailable) as excinfo:
+        complete(["a", "b"])
+    assert excinfo.value.status_code == 429
+
+
+def test_skips_model_with_open_circuit(upstream):
+    fake = upstream(a=[(0, "from a")], b=[(0, "from b")])
+    for _ in range(oc.LLM_BREAKER_FAILURES):
+        oc._breaker("a").record_failure()
+    assert complete(["a", "b"]) == "from b"
+    assert fake.calls == ["b"]
+
+
+def test_all_circuits_open_raises_without_calling(upstream):
+    fake = upstream(a=[(0, "from a")])
+    for _ in range(oc.LLM_BREAKER_FAILURES):
+        oc._breaker("a").record_failure()
+    with pytest.raises(oc.LLMUnavailable, match="circuits open"):
+        complete(["a"])
+    assert fake.calls == []
+
+
+def test_slow_request_is_hedged_to_next_model(upstream, monkeypatch):
+    monkeypatch.setattr(oc, "LLM_HEDGING", True)
+    monkeypatch.setattr(oc, "_hedge_delay", lambda model: 0.05)
+    fake = upstream(a=[(5, "from a")], b=[(0, "from b")])
+    assert complete(["a", "b"]) == "from b"
+    assert fake.calls == ["a", "b"]
+    assert oc._hedge_stats == {"hedged": 1, "hedge_wins": 1}
+
+
+def test_single_model_is_hedged_to_itself(upstream, monkeypatch):
+    monkeypatch.setattr(oc, "LLM_HEDGING", True)
+    monkeypatch.setattr(oc, "_hedge_delay", lambda model: 0.05)
+    fake = upstream(a=[(5, "first"), (0, "hedge")])
+    assert complete(["a"]) == "hedge"
+    assert fake.calls == ["a", "a"]
+
+
+def test_no_same_model_hedge_while_rate_limited(upstream, monkeypatch):
+    monkeypatch.setattr(oc, "LLM_HEDGING", True)
+    monkeypatch.setattr(oc, "_hedge_delay", lambda model: 0.05)
+    oc._rate_limited_at["a"] = time.monotonic()
+    fake = upstream(a=[(0.3, "first"), (0, "hedge")])
+    assert complete(["a"]) == "first"
+    assert fake.calls == ["a"]
+    assert oc._hedge_stats["hedged"] == 0
+
+
+def test_hedge_429_does_not_count_against_breaker(upstream, monkeypatch):
+    monkeypatch.setattr(oc, "LLM_HEDGING", True)
+    monkeypatch.setattr(oc, "_hedge_delay", lambda model: 0.05)
+    upstream(a=[(0.3, "first"), (0, 429)])
+    assert complete(["a"]) == "first"
+    assert oc._breaker("a").failures == 0
+    assert oc._rate_limited("a")
+
+
+def test_deadline_exceeded_while_waiting(upstream):
+    upstream(a=[(5, "from a")])
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline(0.1):
+            complete(["a"])
+    assert time.monotonic() - start < 1
+
+
+def test_spent_deadline_raises_before_calling(upstream):
+    fake = upstream(a=[(0, "from a")])
+    with pytest.raises(DeadlineExceeded):
+        with deadline(0):
+            complete(["a"])
+    assert fake.calls == []
+
+
+def test_deadline_capped_timeout_is_not_a_breaker_failure(upstream):
+    upstream(a=[(0.05, "timeout")])
+    with pytest.raises((DeadlineExceeded, oc.LLMUnavailable)):
+        with deadline(0.5):
+            complete(["a"], timeout=5)
+    time.sleep(0.1)
+    assert oc._breaker("a").failures == 0
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(0.95) is None
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+    assert tracker.percentile(0.95) == pytest.approx(0.096)
+    assert tracker.percentile(0.95, min_samples=101) is None
+    for _ in range(100):
+        tracker.record(1.0)
+    assert tracker.percentile(0.5) == 1.0  # old samples left the window
@@ -0,0 +1,47 @@
+# tests/test_provider_cache.py
+import pytest
+
+from app.services.provider_cache import haversine_km
+
+NEW_YORK = (40.7128, -74.0060)
+LOS_ANGELES = (34.0522, -118.2437)
+LONDON = (51.5074, -0.1278)
+PARIS = (48.8566, 2.3522)
+SYDNEY = (-33.8688, 151.2093)
+TOKYO = (35.6762, 139.6503)
+SAN_FRANCISCO = (37.7749, -122.4194)
+
+
+@pytest.mark.parametrize(
+    "origin, point, km",
+    [
+        (NEW_YORK, LOS_ANGELES, 3936),
+        (LONDON, PARIS, 344),
+        (SYDNEY, TOKYO, 7826),
+        # Crosses the antimeridian
+        (TOKYO, SAN_FRANCISCO, 8275),
+    ],
+)
+def test_known_city_pair_distances(origin, point, km):
+    assert haversine_km(*origin, [point]) == [pytest.approx(km, abs=1)]
+    assert haversine_km(*point, [origin]) == [pytest.approx(km, abs=1)]
+
+
+def test_batch_keeps_order_and_passes_none_through():
+    distances = haversine_km(*NEW_YORK, [LONDON, None, NEW_YORK, LOS_ANGELES])
+
+    assert distances[1] is None
+    assert distances[2] == 0.0
+    assert distances[0] == pytest.approx(5570, abs=1)
+    assert distances[3] == pytest.approx(3936, abs=1)
+    assert all(isinstance(d, float) for d in distances if d is not None)
+
+
+def test_distances_are_rounded_to_10_metres():
+    [km] = haversine_km(*LONDON, [PARIS])
+    assert km == round(km, 2)
+
+
+def test_empty_batch():
+    assert haversine_km(*LONDON, []) == []
+    assert haversine_km(*LONDON, [None]) == [None]
@@ -0,0 +1,144 @@
+# tests/test_single_flight.py
+import threading
+
+import pytest
+
+from app.services.single_flight import SingleFlight, fingerprint, single_flight
+
+
+def run_together(fn, n, started=None):
+    """Calls fn from n threads; returns results (or exceptions) in order."""
+    outcomes = [None] * n
+
+    def run(i):
+        try:
+            outcomes[i] = fn()
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+        if started is not None:
+            # The first thread leads; wait until it is inside fn
+            started.wait()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+class Upstream:
+    """Blocks every call until released, counting how many were made."""
+
+    def __init__(self, result=None, error=None):
+        self.result, self.error = result, error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def release_when_joined(flight, upstream, n):
+    """Releases `upstream` once n - 1 callers have joined the leader."""
+
+    def wait():
+        for _ in range(1000):
+            if flight.shared >= n - 1:
+                break
+            threading.Event().wait(0.005)
+        upstream.release.set()
+
+    thread = threading.Thread(target=wait, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_joiners_get_a_deep_copy_of_the_result():
+    flight = SingleFlight("test")
+    upstream = Upstream(result={"items": [1, 2]})
+    waiter = release_when_joined(flight, upstream, 3)
+    results = run_together(lambda: flight.do("k", upstream), 3, upstream.started)
+    waiter.join()
+
+    assert upstream.calls == 1
+    assert all(r == {"items": [1, 2]} for r in results)
+    assert len({id(r) for r in results}) == 3
+    results[1]["items"].append(3)
+    assert results[0]["items"] == [1, 2] and results[2]["items"] == [1, 2]
+
+
+def test_leader_exception_reaches_every_joiner():
+    flight = SingleFlight("test")
+    error = ValueError("upstream down")
+    upstream = Upstream(error=error)
+    waiter = release_when_joined(flight, upstream, 4)
+    outcomes = run_together(lambda: flight.do("k", upstream), 4, upstream.started)
+    waiter.join()
+
+    assert upstream.calls == 1
+    assert all(o is error for o in outcomes)
+
+
+def test_share_reports_which_caller_led():
+    flight = SingleFlight("test")
+    upstream = Upstream(result="ok")
+    waiter = release_when_joined(flight, upstream, 3)
+    outcomes = run_together(lambda: flight.share("k", upstream), 3, upstream.started)
+    waiter.join()
+
+    assert sorted(led for led, _ in outcomes) == [False, False, True]
+    assert all(future.result() == "ok" for _, future in outcomes)
+
+
+def test_key_is_removed_after_the_call():
+    flight = SingleFlight("test")
+    assert flight.do("k", lambda: 1) == 1
+    with pytest.raises(KeyError):
+        flight.do("k", lambda: {}["missing"])
+    assert flight.stats()["in_flight"] == 0
+    # Sequential calls are never coalesced
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.stats() == {"in_flight": 0, "calls": 3, "saved": 0}
+
+
+def test_excluded_arguments_share_one_call():
+    upstream = Upstream(result="reply")
+
+    @single_flight("test_excluded", exclude=("timeout",))
+    def call(prompt, timeout=60):
+        return upstream(prompt, timeout)
+
+    flight = call.flight
+    waiter = release_when_joined(flight, upstream, 3)
+    timeouts = iter([10, 20, 30])
+    lock = threading.Lock()
+
+    def next_call():
+        with lock:
+            timeout = next(timeouts)
+        return call("same prompt", timeout=timeout)
+
+    results = run_together(next_call, 3, upstream.started)
+    waiter.join()
+    assert results == ["reply"] * 3
+    assert upstream.calls == 1
+
+
+def test_key_binds_defaults_and_ignores_dict_order():
+    calls = []
+
+    @single_flight("test_keys")
+    def call(payload, n=5):
+        calls.append(payload)
+        return n
+
+    assert call({"a": 1, "b": 2}) == call({"b": 2, "a": 1}, n=5)
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
@@ -0,0 +1,40 @@
+# tests/test_triage_service.py
+import pytest
+
+from app.services.triage_service import get_matcher, triage_rules
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "No, I have crushing chest pain",
+        "no fever and chest pain",
+        "I do not know if this is chest pain",
+        "no fever, chest pain since this morning",
+        "I don't have a fever but I have chest pain",
+        "not sure, but I think I'm having a stroke",
+    ],
+)
+def test_negation_does_not_hide_emergency(text):
+    assert triage_rules(text).risk == "emergency"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "no chest pain",
+        "Denies chest pain.",
+        "I don't have any chest pain",
+        "negative for shortness of breath",
+    ],
+)
+def test_directly_negated_red_flag_is_routine(text):
+    assert triage_rules(text).risk == "routine"
+
+
+def test_negation_only_covers_the_next_term():
+    matches = get_matcher().scan("no chest pain, shortness of breath")
+    assert [(m.term, m.negated) for m in matches] == [
+        ("chest pain", True),
+        ("shortness of breath", False),
+    ]